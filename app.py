@@ -1,15 +1,37 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import altair as alt
-import graphviz
-import folium
-from streamlit_folium import st_folium
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
 import time
-import os
-st.write("logo.jpg:", os.listdir())
+import html
+import re
+
+# Only lightweight modules are imported here, so public pages render without
+# loading the data stack. pandas, NumPy, Altair, graphviz, folium and the
+# engine modules that use them are imported inside the functions that need
+# them (Python caches each module, so later imports are a dict lookup).
+from avellon.audit import AuditLog
+from avellon.cache import backend_cache
+from avellon.profiling import profiler
+
+def count_sent_bytes(add):
+    # Profiler payload hook: meters this session's outgoing messages while the outermost
+    # span is open; the span restores the original in a finally. ScriptRunContext._enqueue
+    # is private, so requirements.txt caps Streamlit at the last version checked, and if an
+    # upgrade moves or changes it anyway, spans just report 0 bytes instead of breaking.
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+    enqueue = getattr(ctx, "_enqueue", None)
+    if not callable(enqueue):
+        return None
+
+    def counting(msg):
+        size = getattr(msg, "ByteSize", None)
+        if size is not None:
+            add(size())
+        enqueue(msg)
+    ctx._enqueue = counting
+    return lambda: setattr(ctx, "_enqueue", enqueue)
+
+profiler.payload_hook = count_sent_bytes
 
 # -----------------------------------------------------------------------------
 # 1. CONFIGURATION & STYLING
@@ -22,7 +44,7 @@ st.set_page_config(
 )
 
 # Custom CSS for Enterprise/Military Aesthetic
-st.markdown("""
+APP_CSS = """
 <style>
     /* Global Background & Font */
     .stApp {
@@ -91,7 +113,11 @@ st.markdown("""
         padding-top: 20px;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+# Minified once per process; it has to be re-sent on every full rerun (Streamlit drops
+# elements a run does not emit), but fragment reruns skip it.
+APP_CSS = re.sub(r"\s*([{};:,>])\s*", r"\1", re.sub(r"/\*.*?\*/|\n", " ", APP_CSS, flags=re.S)).strip()
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # -----------------------------------------------------------------------------
 # 2. STATE MANAGEMENT & BACKEND MOCK
@@ -103,44 +129,250 @@ if 'authenticated' not in st.session_state:
 if 'user_role' not in st.session_state:
     st.session_state['user_role'] = None
 
+@st.cache_resource
+def get_snapshotter():
+    # Backend state is restored from the last snapshot as each engine is first built,
+    # written back periodically and once more on a clean shutdown.
+    import atexit
+    from avellon.snapshot import Snapshotter
+    snapshots = Snapshotter().start()
+    atexit.register(snapshots.stop, 5)
+    return snapshots
+
+@st.cache_resource
+def get_ingestor():
+    # One polling worker per process; every session reads its store.
+    from avellon.events import EventStore
+    from avellon.geocode import Geocoder
+    from avellon.ingest import FeedIngestor, load_feed_config
+    from avellon.live import FeedBus
+    from avellon.riskindex import RiskIndex
+    from avellon.scoring import SeverityScorer
+    from avellon.stories import StoryClusterer
+    ingestor = FeedIngestor(
+        load_feed_config(), scorer=SeverityScorer(), geocoder=Geocoder(), store=EventStore(),
+        risk_index=RiskIndex(), bus=FeedBus(), clusterer=StoryClusterer(),
+    )
+    # Warm start: the first poll only catches up on what changed since the snapshot. The
+    # ingestor is attached (and so snapshotted) first, so its feed validators are never
+    # newer than the store they vouch for.
+    snapshots = get_snapshotter()
+    for name, engine in (("ingest", ingestor), ("events", ingestor.store), ("risk_index", ingestor.risk_index),
+                         ("scoring", ingestor.scorer), ("stories", ingestor.clusterer)):
+        snapshots.attach(name, engine)
+    get_risk_recorder(ingestor)
+    return ingestor.start()
+
+@st.cache_resource
+def get_risk_history():
+    from avellon.timeseries import TimeSeriesStore
+    return get_snapshotter().attach("risk_history", TimeSeriesStore())
+
+@st.cache_resource
+def get_risk_recorder(_ingestor):
+    # Runs alongside ingestion, so the minute series fills whether or not anyone is viewing
+    # War Room or Analytics. Built from the ingestor's own engines: the thread never goes
+    # through the Streamlit-cached getters.
+    from avellon.timeseries import HistoryRecorder
+    store, index, asset_index, graph = _ingestor.store, _ingestor.risk_index, get_asset_index(), get_supply_graph()
+
+    def sync_assets():
+        # The one writer of asset-derived state: escalated levels are diffed into the risk
+        # index and onto the graph nodes that are monitored assets (unchanged ones are no-ops).
+        assets = escalate_assets(store, asset_index)
+        index.update_assets(assets)
+        for asset in assets:
+            node = graph.find(asset['name'])
+            if node is not None:
+                graph.set_risk(node, asset['risk'])
+        return assets
+
+    # Applied once up front, so the first render already sees the escalated levels.
+    sync_assets()
+    return HistoryRecorder(get_risk_history(), lambda: risk_sample(sync_assets(), index.snapshot())).start()
+
+@st.cache_resource
+def get_audit_log():
+    log = AuditLog()
+    log.record("SYSTEM", "SERVICE_START", "INTERNAL")
+    return log
+
+def audit(action, detail=""):
+    # Queued only; the audit writer thread does the I/O, so this never blocks a render.
+    ip = getattr(st.context, "ip_address", None)
+    ip = ip if isinstance(ip, str) else "UNKNOWN"
+    get_audit_log().record(st.session_state.get('user'), action, ip, detail)
+
+@st.cache_resource
+def get_supply_graph():
+    from avellon.graph import SupplyGraph, load_graph_path
+    return SupplyGraph.load(load_graph_path())
+
+@st.cache_resource
+def get_screening_index():
+    from avellon.screening import ScreeningIndex, load_lists_path
+    # Mapped back from the snapshot; only lists whose file changed since are rebuilt.
+    index = get_snapshotter().attach("screening", ScreeningIndex(load_lists_path()))
+    index.sync()
+    index.compact()
+    return index
+
+@st.cache_resource
+def get_sweep_cache():
+    from avellon.sweep import SweepCache
+    return SweepCache()
+
+@st.cache_resource
+def get_asset_index():
+    from avellon.spatial import AssetIndex
+    return AssetIndex([a['lat'] for a in MONITORED_ASSETS], [a['lon'] for a in MONITORED_ASSETS])
+
+@st.cache_resource(max_entries=2)
+def get_asset_layer(feed_version):
+    # Asset risk follows the event store, so the layer is rebuilt only when it changes.
+    from avellon.mapping import PointLayer
+    return PointLayer.from_records(AvellonBackend.get_assets())
+
+def get_base_map():
+    # Built once per session and reused so its leaflet hash stays stable across reruns.
+    if 'base_map' not in st.session_state:
+        from streamlit_folium import generate_leaflet_string
+        from avellon.mapping import build_base_map
+        base = build_base_map()
+        # streamlit_folium rewrites element ids on its first serialization; run that pass
+        # up front so the map hashes identically from the very first rerun.
+        generate_leaflet_string(base)
+        st.session_state['base_map'] = base
+    return st.session_state['base_map']
+
+def format_age(ts, now):
+    delta = max(0, int(now - ts))
+    if delta < 3600:
+        return f"{delta // 60}m ago"
+    if delta < 86400:
+        return f"{delta // 3600}h ago"
+    return f"{delta // 86400}d ago"
+
+MONITORED_ASSETS = [
+    {"name": "Strait of Malacca", "lat": 4.2105, "lon": 101.9758, "type": "Choke Point", "region": "APAC", "risk": "CRITICAL", "conf": 98},
+    {"name": "Taiwan Strait", "lat": 23.9037, "lon": 119.6763, "type": "Conflict Zone", "region": "APAC", "risk": "HIGH", "conf": 92},
+    {"name": "Suez Canal", "lat": 30.5852, "lon": 32.3999, "type": "Choke Point", "region": "EMEA", "risk": "MEDIUM", "conf": 89},
+    {"name": "Rotterdam Hub", "lat": 51.9225, "lon": 4.47917, "type": "Port", "region": "EMEA", "risk": "LOW", "conf": 99},
+    {"name": "Panama Canal", "lat": 9.1012, "lon": -79.6955, "type": "Chokepoint", "region": "AMER", "risk": "LOW", "conf": 95},
+    {"name": "Gulf of Aden", "lat": 12.8, "lon": 45.0, "type": "Trade Route", "region": "EMEA", "risk": "HIGH", "conf": 88},
+]
+ASSET_RADIUS_KM = 250
+ASSET_EVENT_HORIZON = 24 * 3600
+
+LOG_PAGE_SIZE = 50
+FEED_PAGE_SIZE = 10
+TREND_WINDOWS = {"Past 24h": 86400, "Past 7d": 7 * 86400, "Past 30d": 30 * 86400, "Past year": 365 * 86400, "All time": None}
+FEED_WINDOWS = {"All time": None, "Past 1h": 3600, "Past 6h": 6 * 3600, "Past 24h": 86400}
+# War Room panels refresh independently (seconds); each run re-executes only its own fragment.
+METRICS_REFRESH = 10
+MAP_REFRESH = 30
+FEED_REFRESH = 5
+
+def escalate_assets(store, asset_index):
+    # Baseline risk escalated by placed events near each asset.
+    from avellon.events import SEVERITIES
+    from avellon.spatial import escalate
+    rows = store.select(since=time.time() - ASSET_EVENT_HORIZON)
+    ev_lat, ev_lon, ev_sev, ev_conf = store.points(rows)
+    ev, ids, dist = asset_index.join(ev_lat, ev_lon, ASSET_RADIUS_KM)
+    risk, conf = escalate(
+        [SEVERITIES.index(a['risk']) for a in MONITORED_ASSETS], [a['conf'] for a in MONITORED_ASSETS],
+        ev, ids, dist, ev_sev, ev_conf, ASSET_RADIUS_KM
+    )
+    return [dict(a, risk=SEVERITIES[r], conf=int(c)) for a, r, c in zip(MONITORED_ASSETS, risk, conf)]
+
+def risk_sample(assets, current):
+    # One value per risk series; samples within the same minute are averaged by the rollups.
+    from avellon.events import SEVERITIES
+    from avellon.riskindex import LEVEL_SCORE
+    sample = {"global": current['global_index']}
+    regions = {}
+    for a in assets:
+        score = LEVEL_SCORE[SEVERITIES.index(a['risk'])]
+        sample[f"asset:{a['name']}"] = score
+        regions.setdefault(a['region'], []).append(score)
+    for region, scores in regions.items():
+        sample[f"region:{region}"] = sum(scores) / len(scores)
+    return sample
+
+# Reads are served from the process-wide backend_cache (per-method TTL, stale-while-revalidate);
+# returned objects are shared across sessions and must not be mutated.
 class AvellonBackend:
     @staticmethod
+    @backend_cache.cached(ttl=10, stale=60)
     def get_risk_metrics():
+        # Asset levels are kept current in the index by the risk recorder; see get_risk_recorder.
+        current, change = get_ingestor().risk_index.delta()
         return {
-            "global_index": 72.4,
-            "critical_assets": 4,
-            "watchlist": 12,
+            "global_index": round(current['global_index'], 1),
+            "global_index_delta": change,
+            "critical_assets": current['critical'],
+            "watchlist": current['watchlist'],
             "uptime": "99.998%",
             "last_scan": datetime.now().strftime("%H:%M:%S UTC")
         }
 
     @staticmethod
+    @backend_cache.cached(ttl=30, stale=60)
+    def get_risk_trend(series, window):
+        import pandas as pd
+        since = time.time() - window if window else None
+        ts, values, resolution = get_risk_history().query(series, since=since)
+        return pd.DataFrame({'Date': pd.to_datetime(ts, unit='s'), 'Risk Score': values}), resolution
+
+    @staticmethod
+    @backend_cache.cached(ttl=15, stale=60)
     def get_assets():
-        return [
-            {"name": "Strait of Malacca", "lat": 4.2105, "lon": 101.9758, "type": "Choke Point", "risk": "CRITICAL", "conf": 98},
-            {"name": "Taiwan Strait", "lat": 23.9037, "lon": 119.6763, "type": "Conflict Zone", "risk": "HIGH", "conf": 92},
-            {"name": "Suez Canal", "lat": 30.5852, "lon": 32.3999, "type": "Choke Point", "risk": "MEDIUM", "conf": 89},
-            {"name": "Rotterdam Hub", "lat": 51.9225, "lon": 4.47917, "type": "Port", "risk": "LOW", "conf": 99},
-            {"name": "Panama Canal", "lat": 9.1012, "lon": -79.6955, "type": "Chokepoint", "risk": "LOW", "conf": 95},
-             {"name": "Gulf of Aden", "lat": 12.8, "lon": 45.0, "type": "Trade Route", "risk": "HIGH", "conf": 88},
-        ]
+        return escalate_assets(get_ingestor().store, get_asset_index())
+
+    @staticmethod
+    @backend_cache.cached(ttl=30, stale=120)
+    def get_dependency_graph():
+        # Graph nodes that are monitored assets track their live (escalated) risk, set by
+        # the risk recorder; see get_risk_recorder.
+        return get_supply_graph()
+
+    @staticmethod
+    @backend_cache.cached(ttl=60, stale=300)
+    def get_supplier_screening(version):
+        # ``version`` (the index's, after a sync) keys the cache; see render_analytics.
+        index = get_screening_index()
+        names = get_supply_graph().names
+        return [dict(hit, supplier=names[i]) for i, hits in index.screen_many(names).items() for hit in hits]
+
+    @staticmethod
+    @backend_cache.cached(ttl=60, stale=300, max_entries=256)
+    def screen_counterparty(name, version):
+        return get_screening_index().screen(name)
+
+    @staticmethod
+    @backend_cache.cached(ttl=10, stale=30, max_entries=512)
+    def get_intel_feed(severity=None, cat=None, window=None, limit=50, offset=0):
+        # Ages are formatted at render time, so a cached page never shows stale ones.
+        since = time.time() - window if window else None
+        return get_ingestor().store.query(severity=severity, cat=cat, since=since, limit=limit, offset=offset)
 
     @staticmethod
-    def get_intel_feed():
-        return [
-            {"id": "EVT-902", "title": "Unverified Drone Activity", "loc": "Red Sea Sector 4", "severity": "CRITICAL", "cat": "Conflict", "time": "14m ago", "conf": 94},
-            {"id": "EVT-901", "title": "Typhoon Beryl Formation", "loc": "Philippine Sea", "severity": "HIGH", "cat": "Weather", "time": "42m ago", "conf": 88},
-            {"id": "EVT-899", "title": "Port Labor Strike Notice", "loc": "Hamburg Terminal", "severity": "MEDIUM", "cat": "Labor", "time": "2h ago", "conf": 76},
-            {"id": "EVT-898", "title": "New Sanctions List Issued", "loc": "Global / OFAC", "severity": "LOW", "cat": "Regulatory", "time": "5h ago", "conf": 100},
-        ]
+    @backend_cache.cached(ttl=60, stale=300)
+    def get_intel_categories():
+        return sorted(get_ingestor().store.categories())
 
     @staticmethod
-    def get_logs():
+    @backend_cache.cached(ttl=5, stale=10, max_entries=256)
+    def get_logs(user=None, action=None, ip=None, window=None, before_id=None, after_id=None, limit=LOG_PAGE_SIZE):
+        import pandas as pd
+        since = time.time() - window if window else None
+        rows = get_audit_log().query(user, action, ip, since=since, before_id=before_id, after_id=after_id, limit=limit)
         return pd.DataFrame([
-            {"Timestamp": "14:12:01", "User": "ADMIN_SEC", "Action": "ACCESS_WAR_ROOM", "IP": "10.2.4.12"},
-            {"Timestamp": "14:08:45", "User": "SYSTEM", "Action": "AUTO_SCALING_EVENT", "IP": "INTERNAL"},
-            {"Timestamp": "13:55:22", "User": "ANALYST_04", "Action": "OVERRIDE_CONFIDENCE", "IP": "10.2.5.99"},
-        ])
+            {"ID": r['id'], "Timestamp": datetime.fromtimestamp(r['ts']).strftime("%Y-%m-%d %H:%M:%S"),
+             "User": r['user'], "Action": r['action'], "IP": r['ip'], "Detail": r['detail']}
+            for r in rows
+        ], columns=["ID", "Timestamp", "User", "Action", "IP", "Detail"])
 
 # -----------------------------------------------------------------------------
 # 3. NAVIGATION CONTROLLER
@@ -161,7 +393,10 @@ def sidebar_nav():
         
         st.sidebar.markdown("---")
         if st.sidebar.button("Log Out"):
+            audit("LOGOUT")
             st.session_state['authenticated'] = False
+            st.session_state['user'] = None
+            st.session_state['user_role'] = None
             st.session_state['page'] = 'Home'
             st.rerun()
             
@@ -195,6 +430,7 @@ def sidebar_nav():
 
 # --- PUBLIC PAGES ---
 
+@profiler.profiled()
 def render_home():
     st.title("The Geometry of Risk.")
     st.markdown("""
@@ -234,7 +470,9 @@ def render_home():
         st.session_state['page'] = "Contact"
         st.rerun()
 
+@profiler.profiled()
 def render_platform():
+    import pandas as pd
     st.title("Generative Risk Operating System")
     st.markdown("AVELLON is not a dashboard. It is a computational engine for global stability.")
     
@@ -260,6 +498,7 @@ def render_platform():
         "Standard": ["FEDRAMP High / IL5 Ready", "On-Prem / Air-Gapped / Hybrid Cloud", "Immutable Blockchain Logs", "< 50ms Global Edge"]
     }).set_index("Feature"))
 
+@profiler.profiled()
 def render_solutions():
     st.title("Strategic Solutions")
     
@@ -283,6 +522,7 @@ def render_solutions():
         st.markdown("**The AVELLON Approach:** Real-time quantification of macro-risk factors mapped to specific tickers and commodities.")
         st.markdown("**Outcome:** Alpha generation through superior information asymmetry.")
 
+@profiler.profiled()
 def render_services():
     st.title("Advisory & Engagement")
     st.write("Beyond the platform, AVELLON provides high-touch strategic services for our most critical partners.")
@@ -299,6 +539,7 @@ def render_services():
         st.markdown("#### Sovereign Advisory")
         st.caption("Confidential consultation for heads of state and ministries on national resilience architecture.")
 
+@profiler.profiled()
 def render_about():
     st.title("About AVELLON")
     st.markdown("""
@@ -311,6 +552,7 @@ def render_about():
     **Headquarters:** London | Washington D.C. | Singapore
     """)
 
+@profiler.profiled()
 def render_contact():
     st.title("Secure Engagement")
     st.write("For strategic inquiries, please utilize the channels below. All communications are encrypted.")
@@ -327,6 +569,7 @@ def render_contact():
         st.markdown("10 Downing Street, London\n\n1600 Pennsylvania Ave, Washington D.C.\n\n1 Raffles Quay, Singapore")
         st.caption("PGP Key available upon request.")
 
+@profiler.profiled()
 def render_insights():
     st.title("Strategic Insights")
     st.write("Briefings for the decision-making elite.")
@@ -347,6 +590,7 @@ def render_insights():
 
 # --- PRIVATE / SECURE PAGES ---
 
+@profiler.profiled()
 def render_login():
     st.markdown("<br><br><br>", unsafe_allow_html=True)
     c1, c2, c3 = st.columns([1, 1, 1])
@@ -360,177 +604,527 @@ def render_login():
         if st.button("Authenticate", use_container_width=True):
             if user and pwd: # Mock auth
                 st.session_state['authenticated'] = True
+                st.session_state['user'] = user
                 st.session_state['user_role'] = "COMMANDER"
                 st.session_state['page'] = "War Room"
+                audit("LOGIN_SUCCESS")
                 st.rerun()
             else:
+                audit("LOGIN_FAILED", f"identity={user!r}")
                 st.error("Invalid Credentials. Attempt Logged.")
 
-def render_war_room():
-    # Header Metrics
-    metrics = AvellonBackend.get_risk_metrics()
+@st.fragment(run_every=METRICS_REFRESH)
+@profiler.profiled()
+def render_header_metrics():
+    with profiler.span("metrics.fetch"):
+        metrics = AvellonBackend.get_risk_metrics()
     c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Global Risk Index", metrics['global_index'], "+1.2%")
-    c2.metric("Critical Assets", metrics['critical_assets'], "Active")
+    change = metrics['global_index_delta']
+    c1.metric("Global Risk Index", metrics['global_index'], None if change is None else f"{change:+.1f}%",
+              help="Change over 24h; shown once the index has 24h of history.")
+    c2.metric("Critical Assets", metrics['critical_assets'], f"{metrics['watchlist']} on watchlist", delta_color="off")
     c3.metric("System Uptime", metrics['uptime'])
     c4.metric("Last Scan", metrics['last_scan'])
+
+@st.fragment(run_every=MAP_REFRESH)
+@profiler.profiled()
+def render_theater_map():
+    import copy
+    from streamlit_folium import st_folium
+    from avellon.mapping import WORLD, bounds_from_folium, build_overlay
+    st.subheader("OPERATIONAL THEATER")
+    version = get_ingestor().store.version
+    layer = get_asset_layer(version)
+    view = st.session_state.get('war_room_map') or {}
+    bounds = bounds_from_folium(view.get('bounds')) or WORLD
+    zoom = view.get('zoom') or 2
     
-    st.markdown("---")
+    # The overlay is rebuilt only when the asset layer or the viewport changes; otherwise
+    # the same FeatureGroup is resent and both halves of the map hash identically.
+    key = (version, tuple(sorted(bounds.items())), zoom)
+    cached = st.session_state.get('war_room_overlay')
+    if cached is not None and cached[0] == key:
+        _, clusters, overlay = cached
+    else:
+        with profiler.span("map.build"):
+            clusters = layer.clusters(bounds, zoom)
+            overlay = build_overlay(layer, clusters)
+        st.session_state['war_room_overlay'] = (key, clusters, overlay)
+    # st_folium adds the overlay to the map it is given, so it gets a copy and the
+    # session's base map is never changed.
+    base = copy.deepcopy(get_base_map())
+    with profiler.span("map.serialize"):
+        st_folium(
+            base, key="war_room_map", height=500, use_container_width=True,
+            feature_group_to_add=overlay, returned_objects=["bounds", "zoom"],
+        )
+    if len(clusters['count']) < int(clusters['count'].sum()):
+        st.caption(f"{int(clusters['count'].sum()):,} assets in view • {len(clusters['count']):,} clusters")
+
+def live_feed_view(severities, cats, window):
+    # The session's first page follows the feed bus; other pages are plain cached queries.
+    from avellon.live import FeedView
+    ingestor = get_ingestor()
+    view = st.session_state.get('feed_view')
+    if view is None or view.filters != (tuple(severities), tuple(cats), window):
+        view = FeedView(severities, cats, window, size=FEED_PAGE_SIZE)
+        view.sync(ingestor.store, ingestor.bus)
+        st.session_state['feed_view'] = view
+    else:
+        view.refresh(ingestor.store, ingestor.bus)
+    return view
+
+@st.fragment(run_every=FEED_REFRESH)
+@profiler.profiled()
+def render_intel_stream():
+    from avellon.events import SEVERITIES
+    st.subheader("INTELLIGENCE STREAM")
+    f1, f2, f3 = st.columns(3)
+    severities = f1.multiselect("Severity", list(reversed(SEVERITIES)), placeholder="All", label_visibility="collapsed")
+    cats = f2.multiselect("Category", AvellonBackend.get_intel_categories(), placeholder="All", label_visibility="collapsed")
+    window = f3.selectbox("Window", list(FEED_WINDOWS), label_visibility="collapsed")
     
-    # Map & Feed
-    col_map, col_feed = st.columns([2, 1])
+    with profiler.span("feed.query"):
+        view = live_feed_view(severities, cats, FEED_WINDOWS[window])
+    total = view.total
+    pages = max(1, -(-total // FEED_PAGE_SIZE))
+    page = min(st.number_input("Page", 1, pages, 1, key="feed_page"), pages) if pages > 1 else 1
+    if page == 1:
+        feed = view.items
+    else:
+        with profiler.span("feed.query"):
+            _, feed = AvellonBackend.get_intel_feed(
+                severities or None, cats or None, FEED_WINDOWS[window],
+                limit=FEED_PAGE_SIZE, offset=(page - 1) * FEED_PAGE_SIZE
+            )
+    if not feed:
+        st.caption("Awaiting first ingestion cycle..." if not total else "No events match the current filters.")
+    else:
+        st.caption(f"{total} events • page {page} of {pages}")
     
-    with col_map:
-        st.subheader("OPERATIONAL THEATER")
-        assets = AvellonBackend.get_assets()
-        m = folium.Map(location=[20, 10], zoom_start=2, tiles="CartoDB dark_matter")
-        
-        risk_colors = {"CRITICAL": "red", "HIGH": "orange", "MEDIUM": "yellow", "LOW": "green"}
-        
-        for a in assets:
-            color = risk_colors.get(a['risk'], 'blue')
-            # Pulse for critical
-            if a['risk'] == "CRITICAL":
-                folium.CircleMarker(
-                    location=[a['lat'], a['lon']], radius=20, color=color, fill=True, fill_opacity=0.2
-                ).add_to(m)
-            
-            folium.CircleMarker(
-                location=[a['lat'], a['lon']],
-                radius=6,
-                popup=f"<b>{a['name']}</b><br>Risk: {a['risk']}<br>Conf: {a['conf']}%",
-                color=color,
-                fill=True,
-                fill_color=color,
-                fill_opacity=1
-            ).add_to(m)
-            
-        st_folium(m, height=500, use_container_width=True)
-        
-    with col_feed:
-        st.subheader("INTELLIGENCE STREAM")
-        feed = AvellonBackend.get_intel_feed()
+    # Only the visible page is turned into HTML, in a single markdown call.
+    with profiler.span("feed.render"):
+        now = time.time()
+        cards = []
         for item in feed:
             badge_class = f"badge-{item['severity'].lower()}"
-            with st.container():
-                st.markdown(f"""
-                <div class='css-card' style='padding: 10px; margin-bottom:10px;'>
-                    <div style='display:flex; justify-content:space-between;'>
-                        <span class='{badge_class}'>{item['severity']}</span>
-                        <span style='color:#666; font-size:0.8rem;'>{item['time']}</span>
-                    </div>
-                    <div style='font-weight:bold; margin-top:5px;'>{item['title']}</div>
-                    <div style='font-size:0.8rem; color:#aaa;'>{item['loc']} • {item['cat']}</div>
-                    <div style='font-size:0.7rem; color:#444; margin-top:5px;'>Conf: {item['conf']}% | ID: {item['id']}</div>
+            sources = item.get('sources', 1)
+            corroborated = f" • {sources} sources" if sources > 1 else ""
+            cards.append(f"""
+            <div class='css-card' style='padding: 10px; margin-bottom:10px;'>
+                <div style='display:flex; justify-content:space-between;'>
+                    <span class='{badge_class}'>{item['severity']}</span>
+                    <span style='color:#666; font-size:0.8rem;'>{format_age(item['ts'], now)}</span>
                 </div>
-                """, unsafe_allow_html=True)
+                <div style='font-weight:bold; margin-top:5px;'>{html.escape(item['title'])}</div>
+                <div style='font-size:0.8rem; color:#aaa;'>{html.escape(item['loc'])} • {html.escape(item['cat'])}{corroborated}</div>
+                <div style='font-size:0.7rem; color:#444; margin-top:5px;'>Conf: {item['conf']}% | ID: {item['id']}</div>
+            </div>
+            """)
+        if cards:
+            st.markdown("".join(cards), unsafe_allow_html=True)
+
+@profiler.profiled()
+def render_war_room():
+    # Header metrics, map and feed are fragments on their own timers: a new feed card
+    # reruns only the stream, never the map.
+    render_header_metrics()
+    
+    st.markdown("---")
+    
+    col_map, col_feed = st.columns([2, 1])
+    with col_map:
+        render_theater_map()
+    with col_feed:
+        render_intel_stream()
 
+@profiler.profiled()
 def render_analytics():
+    import altair as alt
+    import graphviz
+    import pandas as pd
+    from avellon.timeseries import RESOLUTION_LABELS
     st.title("Strategic Analytics")
     
-    tab1, tab2 = st.tabs(["RISK VELOCITY", "DEPENDENCY GRAPH"])
+    tab1, tab2, tab3 = st.tabs(["RISK VELOCITY", "DEPENDENCY GRAPH", "SANCTIONS SCREENING"])
     
     with tab1:
-        st.markdown("#### 30-Day Risk Trend Analysis")
-        # Mock Data
-        data = pd.DataFrame({
-            'Date': pd.date_range(start='2024-01-01', periods=30),
-            'Risk Score': np.random.normal(70, 5, 30).cumsum() + 50
-        })
-        chart = alt.Chart(data).mark_area(
-            line={'color':'#00d4ff'},
-            color=alt.Gradient(
-                gradient='linear',
-                stops=[alt.GradientStop(color='#00d4ff', offset=0),
-                       alt.GradientStop(color='rgba(0, 212, 255, 0)', offset=1)],
-                x1=1, x2=1, y1=1, y2=0
-            )
-        ).encode(
-            x='Date',
-            y=alt.Y('Risk Score', scale=alt.Scale(domain=[40, 100]))
-        ).properties(height=300)
-        st.altair_chart(chart, use_container_width=True)
+        st.markdown("#### Risk Trend Analysis")
+        names = get_risk_history().names()
+        names.sort(key=lambda n: (0 if n == "global" else 1 if n.startswith("region:") else 2, n))
+        t1, t2 = st.columns(2)
+        series = t1.selectbox("Series", names, format_func=lambda n: "Global Risk Index" if n == "global" else n.replace("region:", "Region: ").replace("asset:", "Asset: "))
+        window = t2.selectbox("Window", list(TREND_WINDOWS))
+        with profiler.span("trend.query"):
+            data, resolution = AvellonBackend.get_risk_trend(series, TREND_WINDOWS[window])
+        with profiler.span("chart.encode"):
+            chart = alt.Chart(data).mark_area(
+                line={'color':'#00d4ff'},
+                color=alt.Gradient(
+                    gradient='linear',
+                    stops=[alt.GradientStop(color='#00d4ff', offset=0),
+                           alt.GradientStop(color='rgba(0, 212, 255, 0)', offset=1)],
+                    x1=1, x2=1, y1=1, y2=0
+                )
+            ).encode(
+                x='Date',
+                y=alt.Y('Risk Score', scale=alt.Scale(domain=[0, 100]))
+            ).properties(height=300)
+            st.altair_chart(chart, width="stretch")
+        st.caption(f"{len(data):,} points • {RESOLUTION_LABELS[resolution]} rollup, LTTB downsampled")
+        if len(data) < 2:
+            st.info("Collecting risk history: readings are rolled up per minute while the platform is in use.")
         
     with tab2:
         st.markdown("#### Supply Chain Critical Path")
-        graph = graphviz.Digraph()
-        graph.attr(bgcolor='transparent', rankdir='LR')
-        graph.attr('node', shape='box', style='filled', color='black', fontcolor='white')
-        graph.node('A', 'Rare Earth Mine (Source)', fillcolor='#444')
-        graph.node('B', 'Refining Facility (Processing)', fillcolor='#444')
-        graph.node('C', 'Choke Point (Logistics)', fillcolor='#7f1d1d') # Critical
-        graph.node('D', 'Component Fab (Mfg)', fillcolor='#444')
-        graph.node('E', 'Assembly Plant (Final)', fillcolor='#444')
+        deps = AvellonBackend.get_dependency_graph()
+        path = deps.critical_path()
+        on_path = set(path)
+        cut = set(deps.articulation.tolist())
+        score = deps.criticality()
+        # Single points of failure on the critical path, most critical first.
+        failure_points = sorted(on_path & cut, key=lambda i: -score[i])
         
-        graph.edge('A', 'B')
-        graph.edge('B', 'C', label='Delay risk', color='red')
-        graph.edge('C', 'D')
-        graph.edge('D', 'E')
+        # Only the focus node's k-hop neighborhood is laid out; graphviz cannot lay out the full graph interactively.
+        choices = list(dict.fromkeys(failure_points + deps.top_critical(50).tolist() + path))
+        g1, g2 = st.columns([3, 1])
+        focus = g2.selectbox("Focus Node", choices, format_func=lambda i: deps.names[i])
+        hops = g2.slider("Hops", 1, 4, 2)
+        nodes, edges = deps.neighborhood(focus, hops)
         
-        st.graphviz_chart(graph)
-        st.caption("CRITICAL FAILURE POINT DETECTED: Node C (Logistics Choke Point)")
+        with profiler.span("graph.layout"):
+            graph = graphviz.Digraph()
+            graph.attr(bgcolor='transparent', rankdir='LR')
+            graph.attr('node', shape='box', style='filled', color='black', fontcolor='white')
+            for i in nodes:
+                fill = '#7f1d1d' if i in on_path and i in cut else '#1e3a5f' if i in on_path else '#444'
+                graph.node(str(i), f"{deps.names[i]} ({deps.kinds[i]})", fillcolor=fill, penwidth='3' if i == focus else '1')
+            for a, b in edges:
+                if a in on_path and b in on_path:
+                    graph.edge(str(a), str(b), color='red')
+                else:
+                    graph.edge(str(a), str(b), color='#888')
+            with g1:
+                st.graphviz_chart(graph)
+        
+        through = deps.through()
+        g2.metric("Critical Path", f"{through[path].max() if path else 0:.0f} days", f"{len(path)} nodes", delta_color="off")
+        g2.metric("Single Points of Failure", f"{len(cut):,}", f"of {len(deps):,} nodes", delta_color="off")
+        if failure_points:
+            node = deps.node(failure_points[0])
+            st.caption(f"CRITICAL FAILURE POINT DETECTED: {node['name']} ({node['kind']}, risk {node['risk']})")
+        
+        top = deps.top_critical(10)
+        st.dataframe(pd.DataFrame({
+            "Node": [deps.names[i] for i in top],
+            "Tier": [deps.kinds[i] for i in top],
+            "Risk": [deps.node(i)['risk'] for i in top],
+            "Path Share": [f"{deps.share[i]:.0%}" for i in top],
+            "Longest Path (days)": [round(float(through[i]), 1) for i in top],
+            "Criticality": [round(float(score[i]), 3) for i in top],
+        }), width="stretch", hide_index=True)
+
+    with tab3:
+        st.markdown("#### Counterparty Screening")
+        index = get_screening_index()
+        # Picks up new or changed list files (a stat per list; only those lists are
+        # re-indexed). Results are cached per index version, so a list change is never
+        # answered from a cache filled before it -- least of all with "No match".
+        index.sync()
+        lists = index.lists()
+        st.caption(f"{len(index):,} listed entries in {len(lists)} list(s): " + ", ".join(l['list'] for l in lists)
+                   + f" • match threshold {index.threshold:.0%} (trigram Dice, transliterated)")
+        name = st.text_input("Counterparty name", placeholder="e.g. Meridian Bunkering FZE")
+        if name.strip():
+            with profiler.span("screening.query"):
+                hits = AvellonBackend.screen_counterparty(name.strip(), index.version)
+            if hits:
+                st.error(f"{len(hits)} potential match(es) for {name.strip()!r}")
+                st.dataframe(pd.DataFrame(hits)[["score", "name", "matched", "id", "program", "list"]],
+                             width="stretch", hide_index=True)
+            else:
+                st.success("No match on any loaded list.")
 
+        st.markdown("#### Supplier Master")
+        with profiler.span("screening.suppliers"):
+            flagged = AvellonBackend.get_supplier_screening(index.version)
+        if flagged:
+            st.dataframe(pd.DataFrame(flagged)[["supplier", "score", "name", "matched", "id", "program", "list"]],
+                         width="stretch", hide_index=True)
+        else:
+            st.caption(f"All {len(get_supply_graph()):,} supply-graph nodes screened: no match.")
+
+@profiler.profiled()
 def render_simulation():
+    import numpy as np
+    import pandas as pd
+    from avellon.cascade import SHOCK_KINDS, run_cascade
+    from avellon.simulation import SCENARIOS, SEVERITY_MULTIPLIER, run_simulation
     st.title("Scenario Modeling")
+    if st.radio("Mode", ["Single Run", "Parameter Sweep"], horizontal=True, label_visibility="collapsed") == "Parameter Sweep":
+        render_sweep()
+        return
     st.markdown("### Monte Carlo Risk Simulation")
     
     c1, c2 = st.columns([1, 2])
     with c1:
         st.markdown("#### Input Parameters")
-        st.selectbox("Scenario Type", ["Strait Closure", "Pandemic Event", "Cyber Grid Down", "Sanctions Escalation"])
+        scenario = st.selectbox("Scenario Type", list(SCENARIOS))
         days = st.slider("Duration (Days)", 1, 90, 14)
-        severity = st.select_slider("Severity Level", options=["Localized", "Regional", "Global Systemic"])
-        st.button("Run Simulation", type="primary")
+        severity = st.select_slider("Severity Level", options=list(SEVERITY_MULTIPLIER))
+        deps = AvellonBackend.get_dependency_graph()
+        score = deps.criticality()
+        targets = sorted((i for i in range(len(deps)) if deps.kinds[i] in SHOCK_KINDS[scenario]), key=lambda i: -score[i])
+        shock = st.selectbox("Shock Target", targets, format_func=lambda i: deps.names[i])
+        
+        # Results track the last submitted parameters; identical runs are served from the engine cache.
+        if st.button("Run Simulation", type="primary") or 'sim_params' not in st.session_state:
+            st.session_state['sim_params'] = (scenario, days, severity, shock)
         
     with c2:
+        scenario, days, severity, shock = st.session_state['sim_params']
+        with profiler.span("simulation.run"):
+            result = run_simulation(scenario, days, severity)
+        with profiler.span("cascade.run"):
+            cascade = run_cascade(deps, [shock], scenario, days, severity)
+        rev_p5, rev_p50, rev_p95 = result['revenue_at_risk']
+        burn_p5, burn_p50, burn_p95 = result['inventory_burn']
+        
         st.markdown("#### Projected Impact")
+        st.caption(f"{scenario} • {days} days • {severity} • {result['paths']:,} paths")
         m1, m2 = st.columns(2)
-        m1.metric("Revenue at Risk", f"${days * 12.5}M", "High Confidence")
-        m2.metric("Inventory Burn", f"{days * 2.4}%", "Critical")
+        m1.metric("Revenue at Risk (P50)", f"${rev_p50:,.1f}M", f"P5 ${rev_p5:,.1f}M – P95 ${rev_p95:,.1f}M", delta_color="off")
+        m2.metric("Inventory Burn (P50)", f"{burn_p50:.1f}%", f"P5 {burn_p5:.1f}% – P95 {burn_p95:.1f}%", delta_color="off")
         
-        st.progress(min(100, days * 2))
-        st.caption("Probability of cascading failure: 68%")
+        st.progress(int(min(100, burn_p50)))
+        st.caption(f"Probability of cascading failure: {cascade['cascade_probability']:.0%} "
+                   f"(shock at {deps.names[shock]} reaching final assembly, {cascade['trials']:,} trials)")
+        st.caption(f"Probability of stockout: {result['stockout_probability']:.0%}")
+        
+        # Nodes most likely to fail, with mean days until their buffers run dry.
+        exposed = [i for i in np.argsort(-cascade['failure_probability'], kind="stable")[:8]
+                   if cascade['failure_probability'][i] > 0 and i != shock]
+        if exposed:
+            st.dataframe(pd.DataFrame({
+                "Node": [deps.names[i] for i in exposed],
+                "Tier": [deps.kinds[i] for i in exposed],
+                "Failure Probability": [f"{cascade['failure_probability'][i]:.0%}" for i in exposed],
+                "Time to Failure (days)": [round(float(cascade['time_to_failure'][i]), 1) for i in exposed],
+            }), width="stretch", hide_index=True)
         
         st.info("AI RECOMMENDATION: Initiate buffer stock release in EMEA region immediately to mitigate Day 14 stockout.")
 
+def sweep_heatmap(results, metric):
+    import altair as alt
+    import pandas as pd
+    from avellon.sweep import METRICS
+    data = pd.DataFrame([
+        {"Scenario": f"{scenario} • {severity}", "Days": days, metric: result[METRICS[metric]]}
+        for (scenario, severity, days), result in results.items()
+    ])
+    return alt.Chart(data).mark_rect().encode(
+        x=alt.X('Days:O', title="Duration (Days)"),
+        y=alt.Y('Scenario:N', title=None),
+        color=alt.Color(f'{metric}:Q', scale=alt.Scale(scheme='orangered')),
+        tooltip=['Scenario', 'Days', alt.Tooltip(f'{metric}:Q', format=',.2f')],
+    ).properties(height=max(120, 28 * data['Scenario'].nunique()))
+
+def render_sweep():
+    import pandas as pd
+    from avellon.simulation import SCENARIOS, SEVERITY_MULTIPLIER
+    from avellon.sweep import DEFAULT_DURATIONS, METRICS, grid, run_sweep
+    st.markdown("### Parameter Sweep")
+    s1, s2, s3, s4 = st.columns(4)
+    scenarios = s1.multiselect("Scenarios", list(SCENARIOS), default=list(SCENARIOS))
+    severities = s2.multiselect("Severity Levels", list(SEVERITY_MULTIPLIER), default=list(SEVERITY_MULTIPLIER))
+    durations = s3.multiselect("Durations (Days)", list(range(1, 91)), default=list(DEFAULT_DURATIONS))
+    metric = s4.selectbox("Metric", list(METRICS))
+    cells = grid(scenarios, severities, sorted(durations)) if scenarios and severities and durations else []
+    if not cells:
+        st.caption("Select at least one scenario, severity and duration.")
+        return
+    
+    # Finished cells come straight from the shared on-disk cache; the rest is computed
+    # only once this grid has been submitted, and lands on the heatmap as it finishes.
+    if st.button(f"Run Sweep ({len(cells)} cells)", type="primary"):
+        st.session_state['sweep_cells'] = cells
+    submitted = st.session_state.get('sweep_cells') == cells
+    deps = AvellonBackend.get_dependency_graph()
+    chart, progress = st.empty(), st.empty()
+    results, computed, drawn = {}, 0, time.perf_counter()
+    with profiler.span("sweep.run"):
+        for cell, result, cached in run_sweep(deps, cells, get_sweep_cache(), compute=submitted):
+            results[cell] = result
+            computed += not cached
+            if not cached and time.perf_counter() - drawn > 0.5:
+                chart.altair_chart(sweep_heatmap(results, metric), width="stretch")
+                progress.progress(len(results) / len(cells), text=f"{len(results)} of {len(cells)} cells")
+                drawn = time.perf_counter()
+    progress.empty()
+    if not results:
+        chart.caption(f"No cached results for this grid yet. Run the sweep to compute its {len(cells)} cells.")
+        return
+    chart.altair_chart(sweep_heatmap(results, metric), width="stretch")
+    missing = len(cells) - len(results)
+    st.caption(f"{len(results)} of {len(cells)} cells • {computed} computed, {len(results) - computed} from cache"
+               + (f" • {missing} not yet run" if missing else ""))
+    
+    field = METRICS[metric]
+    table = pd.DataFrame([
+        {"Scenario": scenario, "Severity": severity, "Days": days, metric: round(result[field], 3)}
+        for (scenario, severity, days), result in sorted(results.items())
+    ]).pivot(index=["Scenario", "Severity"], columns="Days", values=metric)
+    st.dataframe(table, width="stretch")
+    st.download_button("Export CSV", pd.DataFrame([
+        dict(scenario=scenario, severity=severity, days=days, **result)
+        for (scenario, severity, days), result in sorted(results.items())
+    ]).to_csv(index=False), file_name="avellon_sweep.csv", mime="text/csv")
+
+@profiler.profiled()
 def render_logs():
+    import pandas as pd
     st.title("System Audit Logs")
-    logs = AvellonBackend.get_logs()
-    st.dataframe(logs, use_container_width=True)
+    f1, f2, f3, f4 = st.columns(4)
+    user = f1.text_input("User", placeholder="Any user").strip()
+    action = f2.selectbox("Action", ["All actions"] + get_audit_log().actions())
+    ip = f3.text_input("IP", placeholder="Any IP").strip()
+    window = f4.selectbox("Time Range", list(FEED_WINDOWS))
+    filters = (user, action, ip, window)
+    
+    # Keyset pagination: the cursor is the boundary id of the page being left.
+    if st.session_state.get('log_filters') != filters:
+        st.session_state['log_filters'] = filters
+        st.session_state['log_cursor'] = None
+    cursor = st.session_state.get('log_cursor')
+    before_id, after_id = (cursor[1], None) if cursor and cursor[0] == 'before' else (None, cursor[1] if cursor else None)
+    with profiler.span("logs.query"):
+        logs = AvellonBackend.get_logs(user or None, None if action == "All actions" else action, ip or None, FEED_WINDOWS[window], before_id, after_id)
+    st.dataframe(logs.drop(columns="ID"), width="stretch", hide_index=True)
+    
+    p1, p2, _ = st.columns([1, 1, 4])
+    if p1.button("◀ Newer", disabled=cursor is None or logs.empty):
+        st.session_state['log_cursor'] = ('after', int(logs['ID'].iloc[0]))
+        st.rerun()
+    if p2.button("Older ▶", disabled=len(logs) < LOG_PAGE_SIZE):
+        st.session_state['log_cursor'] = ('before', int(logs['ID'].iloc[-1]))
+        st.rerun()
+    audit_stats = get_audit_log().stats()
+    st.caption(f"Audit writer: {audit_stats['written']:,} written • {audit_stats['queued']:,} queued • {audit_stats['dropped']:,} dropped")
+    
+    st.markdown("### BACKEND CACHE")
+    cache = backend_cache.stats()
+    served = sum(r['hits'] + r['stale_hits'] for r in cache.values())
+    lookups = served + sum(r['misses'] + r['coalesced'] for r in cache.values())
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Cache Hit Rate", f"{served / lookups if lookups else 0:.1%}")
+    k2.metric("Backend Fetches", f"{sum(r['misses'] + r['refreshes'] for r in cache.values()):,}")
+    k3.metric("Coalesced Waits", f"{sum(r['coalesced'] for r in cache.values()):,}")
+    k4.metric("Evictions", f"{sum(r['evictions'] for r in cache.values()):,}")
+    st.dataframe(pd.DataFrame([
+        {"Method": name.split(".")[-1], "TTL s": r['ttl'], "Stale s": r['stale'], "Entries": f"{r['entries']} / {r['max_entries']}",
+         "Hits": r['hits'], "Stale Hits": r['stale_hits'], "Misses": r['misses'], "Coalesced": r['coalesced'],
+         "Refreshes": r['refreshes'], "Evictions": r['evictions'], "Errors": r['errors'], "Hit Rate": f"{r['hit_rate']:.1%}"}
+        for name, r in sorted(cache.items())
+    ]), width="stretch", hide_index=True)
+    
+    st.markdown("### RENDER PROFILE")
+    enabled = st.toggle("Render profiling", value=profiler.enabled, help="Process-wide; takes effect from each session's next rerun.")
+    if enabled != profiler.enabled:
+        profiler.enabled = enabled
+        audit("PROFILING_ON" if enabled else "PROFILING_OFF")
+    spans = profiler.stats()
+    if not spans:
+        st.caption("No samples yet: turn profiling on and open the secure pages.")
+    else:
+        st.dataframe(pd.DataFrame([
+            {"Span": name, "Samples": r['samples'], "p50 ms": round(r['p50'] * 1e3, 1), "p95 ms": round(r['p95'] * 1e3, 1),
+             "Max ms": round(r['max'] * 1e3, 1), "CPU p50 ms": round(r['cpu_p50'] * 1e3, 1),
+             "Payload p50 KB": round(r['bytes_p50'] / 1024, 1), "Payload max KB": round(r['bytes_max'] / 1024, 1)}
+            for name, r in sorted(spans.items(), key=lambda kv: -kv[1]['p50'])
+        ]), width="stretch", hide_index=True)
+        h1, h2 = st.columns([1, 3])
+        focus = h1.selectbox("Span", sorted(spans))
+        buckets = profiler.window_histogram(focus)
+        h2.bar_chart(pd.DataFrame({
+            "Samples": [count for _, count in buckets],
+        }, index=[f"≤{bound * 1e3:g} ms" if bound != float("inf") else "slower" for bound, _ in buckets]), height=200)
+        h1.download_button("Export Prometheus", profiler.prometheus(), file_name="avellon_render.prom", mime="text/plain")
+        if profiler.export_path:
+            h1.caption(f"Also written to {profiler.export_path}")
+    
+    st.markdown("### INGESTION PIPELINE")
+    ingest = get_ingestor()
+    scoring = ingest.scorer.stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Items in Store", len(ingest.store))
+    c2.metric("Feed Errors", ingest.stats['errors'])
+    c3.metric("Scoring Throughput", f"{scoring['scored_per_sec']:,.0f}/s", "cache misses only", delta_color="off")
+    c4.metric("Score Cache Hit Rate", f"{scoring['hit_rate']:.1%}")
+    
+    geo = ingest.geocoder.stats()
+    g1, g2, g3, g4 = st.columns(4)
+    g1.metric("Events Placed", f"{geo['placed']:,} / {geo['items']:,}")
+    g2.metric("Geocode Cache Hit Rate", f"{geo['hit_rate']:.1%}")
+    g3.metric("Geocode Latency / Item", f"{geo['mean_us']:,.0f} µs", f"budget {geo['budget_us']} µs", delta_color="off")
+    g4.metric("Unresolved Locations", f"{geo['unresolved']:,}")
+    
+    stories = ingest.clusterer.stats
+    s1, s2, s3, s4 = st.columns(4)
+    s1.metric("Live Stories", f"{len(ingest.clusterer):,}")
+    s2.metric("Reports Merged", f"{stories['merged']:,} / {stories['items']:,}")
+    s3.metric("Stories Started", f"{stories['stories']:,}")
+    s4.metric("Stories Expired", f"{stories['expired']:,}")
+    
+    st.markdown("### WARM START")
+    snapshots = get_snapshotter()
+    age = snapshots.age()
+    restored = snapshots.stats['restored']
+    w1, w2, w3, w4 = st.columns(4)
+    w1.metric("Snapshot Age", "none yet" if age is None else format_age(time.time() - age, time.time()))
+    w2.metric("Snapshot Size", f"{snapshots.stats['bytes'] / 2**20:,.1f} MB" if age is not None else "—")
+    w3.metric("Restore Time", f"{sum(restored.values()):,.0f} ms", f"{len(restored)} engines", delta_color="off")
+    w4.metric("Snapshot Errors", f"{snapshots.stats['errors']:,}")
 
 # -----------------------------------------------------------------------------
 # 5. MAIN APP ROUTER
 # -----------------------------------------------------------------------------
 def main():
     # Sidebar Navigation
-    sidebar_nav()
+    with profiler.span("sidebar"):
+        sidebar_nav()
     
     # Page Routing
     page = st.session_state['page']
+    if st.session_state.get('audited_page') != page:
+        secure = page in ("War Room", "Analytics", "Simulation", "System Logs")
+        audit(("ACCESS_" if secure else "VIEW_") + page.upper().replace(" ", "_"))
+        st.session_state['audited_page'] = page
+    
+    # Each page is one root span; its render_* function and sub-spans nest inside it.
+    with profiler.span(f"page:{page}"):
+        # Public Routes
+        if page == "Home": render_home()
+        elif page == "Platform": render_platform()
+        elif page == "Solutions": render_solutions()
+        elif page == "Services": render_services()
+        elif page == "Insights": render_insights()
+        elif page == "About": render_about()
+        elif page == "Contact": render_contact()
+        elif page == "Login": render_login()
     
-    # Public Routes
-    if page == "Home": render_home()
-    elif page == "Platform": render_platform()
-    elif page == "Solutions": render_solutions()
-    elif page == "Services": render_services()
-    elif page == "Insights": render_insights()
-    elif page == "About": render_about()
-    elif page == "Contact": render_contact()
-    elif page == "Login": render_login()
-    
-    # Secure Routes (Protected)
-    elif page == "War Room": 
-        if st.session_state['authenticated']: render_war_room()
-        else: render_login()
-    elif page == "Analytics":
-        if st.session_state['authenticated']: render_analytics()
-        else: render_login()
-    elif page == "Simulation":
-        if st.session_state['authenticated']: render_simulation()
-        else: render_login()
-    elif page == "System Logs":
-        if st.session_state['authenticated']: render_logs()
-        else: render_login()
+        # Secure Routes (Protected)
+        elif page == "War Room": 
+            if st.session_state['authenticated']: render_war_room()
+            else: render_login()
+        elif page == "Analytics":
+            if st.session_state['authenticated']: render_analytics()
+            else: render_login()
+        elif page == "Simulation":
+            if st.session_state['authenticated']: render_simulation()
+            else: render_login()
+        elif page == "System Logs":
+            if st.session_state['authenticated']: render_logs()
+            else: render_login()
 
     # Footer
     st.markdown("""
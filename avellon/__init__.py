@@ -0,0 +1,6 @@
+"""AVELLON backend engines.
+
+Pure-Python/NumPy modules behind the Streamlit console in ``app.py``. Nothing in
+this package imports Streamlit, so every engine can be driven from scripts and
+benchmarks as well as from the app.
+"""
@@ -0,0 +1,153 @@
+"""Append-only audit log backed by SQLite in WAL mode.
+
+``AuditLog.record`` never touches the database: it drops the entry on a
+bounded queue and returns, and a single writer thread drains the queue in
+batched transactions. Reads use keyset pagination on the monotonically
+increasing row id, with composite ``(column, id)`` indexes for each filter, so
+fetching any page is an index range scan whether the table holds a thousand
+rows or tens of millions. Time bounds filter on ``ts`` itself: ids follow
+insertion order, which caller-supplied timestamps, clock steps and other
+processes writing the same file need not. UPDATE and DELETE are rejected by
+triggers.
+"""
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from avellon.config import state_path
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DB = "audit.sqlite"
+DEFAULT_QUEUE_SIZE = 100_000
+BATCH_SIZE = 1000
+FILTER_COLUMNS = ("user", "action", "ip")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    user TEXT NOT NULL,
+    action TEXT NOT NULL,
+    ip TEXT NOT NULL,
+    detail TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS audit_ts ON audit (ts);
+CREATE INDEX IF NOT EXISTS audit_user ON audit (user, id);
+CREATE INDEX IF NOT EXISTS audit_action ON audit (action, id);
+CREATE INDEX IF NOT EXISTS audit_ip ON audit (ip, id);
+CREATE TABLE IF NOT EXISTS audit_actions (action TEXT PRIMARY KEY);
+CREATE TRIGGER IF NOT EXISTS audit_no_update BEFORE UPDATE ON audit
+    BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS audit_no_delete BEFORE DELETE ON audit
+    BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+"""
+
+
+class AuditLog:
+    """Asynchronous writer and paginated reader for the audit table."""
+
+    def __init__(self, path=None, queue_size=DEFAULT_QUEUE_SIZE):
+        self.path = path or state_path(DEFAULT_DB)
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+        db = self._connect()
+        db.executescript(SCHEMA)
+        db.close()
+        self._actions = {row[0] for row in self._conn().execute("SELECT action FROM audit_actions")}
+        self._writer = threading.Thread(target=self._drain, name="avellon-audit", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _conn(self):
+        # One read connection per thread; WAL lets readers run alongside the writer.
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect()
+        return db
+
+    # -- writes ---------------------------------------------------------------
+    def record(self, user, action, ip="", detail="", ts=None):
+        """Queue one entry. Never blocks; entries are dropped (and counted) if the queue is full."""
+        try:
+            self._queue.put_nowait((ts or time.time(), user or "ANONYMOUS", action, ip or "UNKNOWN", detail))
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self):
+        db = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with db:
+                    db.executemany("INSERT INTO audit (ts, user, action, ip, detail) VALUES (?, ?, ?, ?, ?)", batch)
+                    new_actions = {row[2] for row in batch} - self._actions
+                    if new_actions:
+                        db.executemany("INSERT OR IGNORE INTO audit_actions VALUES (?)", [(a,) for a in new_actions])
+                        self._actions = self._actions | new_actions
+                self.written += len(batch)
+            except sqlite3.Error:
+                log.exception("Audit batch of %d entries failed", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued entry is written (for scripts and shutdown)."""
+        self._queue.join()
+
+    # -- reads ----------------------------------------------------------------
+    def actions(self):
+        return sorted(self._actions)
+
+    def query(self, user=None, action=None, ip=None, since=None, until=None, before_id=None, after_id=None, limit=50):
+        """One page of entries, newest first.
+
+        Pass ``before_id`` (the last id of the current page) for the next,
+        older page, or ``after_id`` (the first id of the current page) for the
+        previous, newer page. Returns a list of row dicts.
+        """
+        clauses, params = [], []
+        for column, value in zip(FILTER_COLUMNS, (user, action, ip)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until:
+            clauses.append("ts <= ?")
+            params.append(until)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        if after_id is not None:
+            clauses.append("id > ?")
+            params.append(after_id)
+        where = " AND ".join(clauses) or "1"
+        # Walking forward from after_id needs ascending order; flip back afterwards.
+        order = "ASC" if after_id is not None else "DESC"
+        rows = self._conn().execute(
+            f"SELECT id, ts, user, action, ip, detail FROM audit WHERE {where} ORDER BY id {order} LIMIT ?",
+            params + [limit],
+        ).fetchall()
+        if after_id is not None:
+            rows.reverse()
+        return [dict(zip(("id", "ts", "user", "action", "ip", "detail"), row)) for row in rows]
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped}
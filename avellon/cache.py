@@ -0,0 +1,153 @@
+"""Process-wide read-through cache for ``AvellonBackend`` methods.
+
+Streamlit re-executes ``app.py`` on every rerun of every session, but this
+module is imported once per process, so ``backend_cache`` is shared by all
+sessions. Each decorated method gets its own policy:
+
+* ``ttl`` -- seconds an entry is served as fresh;
+* ``stale`` -- further seconds it may be served while one background thread
+  refreshes it (stale-while-revalidate), so a slow backend read never blocks
+  a render once the entry exists;
+* ``max_entries`` -- LRU bound on distinct argument combinations.
+
+Concurrent misses on the same key are coalesced: one caller computes and the
+others wait for its result, so a burst of sessions costs one backend fetch.
+Cached values are shared between sessions and must be treated as read-only.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TTL = 30.0
+DEFAULT_MAX_ENTRIES = 128
+COUNTERS = ("hits", "stale_hits", "misses", "coalesced", "refreshes", "evictions", "errors")
+
+
+def _freeze(value):
+    # Lists, dicts and sets (e.g. multiselect values) become hashable key parts.
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+
+class BackendCache:
+    """TTL + LRU cache with stale-while-revalidate and single-flight misses."""
+
+    def __init__(self, max_workers=4):
+        self._lock = threading.Lock()
+        self._policies = {}
+        self._entries = {}
+        self._stats = {}
+        self._inflight = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="avellon-cache")
+
+    def cached(self, ttl=DEFAULT_TTL, stale=0.0, max_entries=DEFAULT_MAX_ENTRIES):
+        """Decorator registering ``fn`` under its qualified name with this policy.
+
+        Re-decorating on a later rerun keeps the existing entries and counters.
+        """
+        def decorator(fn):
+            name = fn.__qualname__
+            with self._lock:
+                self._policies[name] = (float(ttl), float(stale), int(max_entries))
+                self._entries.setdefault(name, OrderedDict())
+                self._stats.setdefault(name, dict.fromkeys(COUNTERS, 0))
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                return self.get(name, fn, args, kwargs)
+            return wrapper
+        return decorator
+
+    def get(self, name, fn, args=(), kwargs=None):
+        kwargs = kwargs or {}
+        key = _freeze((args, kwargs))
+        ttl, stale, _ = self._policies[name]
+        with self._lock:
+            stats = self._stats[name]
+            entries = self._entries[name]
+            entry = entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[1]
+                if age < ttl + stale:
+                    entries.move_to_end(key)
+                    if age < ttl:
+                        stats["hits"] += 1
+                    else:
+                        stats["stale_hits"] += 1
+                        if (name, key) not in self._inflight:
+                            stats["refreshes"] += 1
+                            self._inflight[(name, key)] = self._pool.submit(self._load, name, key, fn, args, kwargs)
+                    return entry[0]
+            pending = self._inflight.get((name, key))
+            if pending is None:
+                stats["misses"] += 1
+                pending = self._inflight[(name, key)] = Future()
+                owner = True
+            else:
+                stats["coalesced"] += 1
+                owner = False
+        if not owner:
+            return pending.result()
+        try:
+            value = self._load(name, key, fn, args, kwargs, pending)
+        except Exception as exc:
+            pending.set_exception(exc)
+            raise
+        pending.set_result(value)
+        return value
+
+    def _load(self, name, key, fn, args, kwargs, pending=None):
+        try:
+            value = fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._stats[name]["errors"] += 1
+                self._inflight.pop((name, key), None)
+            if pending is None:
+                # Background refresh: keep serving the stale value.
+                log.exception("Background refresh of %s failed", name)
+            raise
+        with self._lock:
+            entries = self._entries[name]
+            entries[key] = (value, time.monotonic())
+            entries.move_to_end(key)
+            max_entries = self._policies[name][2]
+            while len(entries) > max_entries:
+                entries.popitem(last=False)
+                self._stats[name]["evictions"] += 1
+            self._inflight.pop((name, key), None)
+        return value
+
+    def invalidate(self, name=None):
+        """Drop cached entries for one method (by qualified name) or all of them."""
+        with self._lock:
+            for method, entries in self._entries.items():
+                if name is None or method == name:
+                    entries.clear()
+
+    def stats(self):
+        """Per-method counters, entry counts and policy, keyed by qualified name."""
+        with self._lock:
+            out = {}
+            for name, counters in self._stats.items():
+                ttl, stale, max_entries = self._policies[name]
+                row = dict(counters, entries=len(self._entries[name]), ttl=ttl, stale=stale, max_entries=max_entries)
+                served = row["hits"] + row["stale_hits"]
+                lookups = served + row["misses"] + row["coalesced"]
+                row["hit_rate"] = served / lookups if lookups else 0.0
+                out[name] = row
+            return out
+
+
+# The one instance per process.
+backend_cache = BackendCache()
@@ -0,0 +1,19 @@
+"""Process-wide settings shared by the backend engines."""
+import os
+
+# Root for every on-disk artefact the backend keeps between restarts
+# (caches, logs, snapshots). Override with AVELLON_STATE_DIR.
+STATE_DIR = os.environ.get("AVELLON_STATE_DIR", ".avellon")
+
+# Reference data shipped with the repository.
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def state_path(name):
+    """Absolute path for ``name`` under the state directory, created on demand."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.abspath(os.path.join(STATE_DIR, name))
+
+
+def data_path(name):
+    return os.path.join(DATA_DIR, name)
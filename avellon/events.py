@@ -0,0 +1,352 @@
+"""Columnar, indexed in-memory event store for the Intelligence Stream.
+
+Scalar fields live in NumPy columns (timestamp, severity, category, source,
+confidence, corroborating source count and, once placed, coordinates); text
+payloads live in a parallel list. Secondary indexes on severity, category
+and source hold row ids sorted by timestamp, so a query such as "last 20
+CRITICAL Conflict events in the past 6h" binary-searches the smallest
+matching posting list and checks the other predicates on the candidates
+only -- the store is never scanned end to end.
+"""
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+from avellon.snapshot import PackedStrings
+
+SEVERITIES = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+SEVERITY_CODE = {name: code for code, name in enumerate(SEVERITIES)}
+DEFAULT_MAX_ROWS = 100_000
+PAYLOAD_FIELDS = ("id", "guid", "hash", "title", "summary", "link", "loc")
+COLUMNS = ("_ts", "_sev", "_cat", "_src", "_conf", "_nsrc", "_lat", "_lon")
+
+
+class _Dictionary:
+    """Value <-> small integer code mapping for dictionary-encoded columns."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class _Posting:
+    """Row ids for one index key, kept sorted by timestamp.
+
+    Appends are buffered and merged on the next read, so ingestion stays O(1)
+    and the sort cost is paid once per batch rather than once per row.
+    """
+
+    def __init__(self):
+        self.rows = np.empty(0, dtype=np.int64)
+        self.ts = np.empty(0, dtype=np.float64)
+        self._pending_rows = []
+        self._pending_ts = []
+
+    def __len__(self):
+        return len(self.rows) + len(self._pending_rows)
+
+    def append(self, row, ts):
+        self._pending_rows.append(row)
+        self._pending_ts.append(ts)
+
+    def sorted(self):
+        if self._pending_rows:
+            rows = np.concatenate([self.rows, np.asarray(self._pending_rows, dtype=np.int64)])
+            ts = np.concatenate([self.ts, np.asarray(self._pending_ts, dtype=np.float64)])
+            order = np.argsort(ts, kind="stable")
+            self.rows, self.ts = rows[order], ts[order]
+            self._pending_rows, self._pending_ts = [], []
+        return self.rows, self.ts
+
+    def window(self, since=None, until=None):
+        rows, ts = self.sorted()
+        lo = 0 if since is None else np.searchsorted(ts, since, side="left")
+        hi = len(ts) if until is None else np.searchsorted(ts, until, side="right")
+        return rows[lo:hi], ts[lo:hi]
+
+
+class _Payload:
+    """Payloads of rows restored from a snapshot, decoded on access, then rows appended since."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.base = len(columns["id"])
+        self.tail = []
+
+    def __len__(self):
+        return self.base + len(self.tail)
+
+    def __getitem__(self, row):
+        if row >= self.base:
+            return self.tail[row - self.base]
+        return {field: self.columns[field][row] for field in PAYLOAD_FIELDS}
+
+    def append(self, payload):
+        self.tail.append(payload)
+
+    def field(self, name):
+        if not self.tail:
+            return self.columns[name]
+        return list(self.columns[name]) + [p[name] for p in self.tail]
+
+
+class EventStore:
+    """Bounded columnar event store with severity/category/source/time indexes.
+
+    Drop-in replacement for ``FeedStore`` as the ingestion target: it exposes
+    the same ``add_many`` / ``snapshot`` / ``version`` surface and dedupes by
+    GUID or content hash. Every added item is stamped ``stored`` with the
+    running count of items ever added (``appended``), for live views to tell
+    what a query already counted. ``revise`` takes the story updates of a
+    ``stories.StoryClusterer`` stage; ``dump_state`` / ``load_state`` carry
+    it across restarts (see ``snapshot``).
+    """
+
+    def __init__(self, max_rows=DEFAULT_MAX_ROWS):
+        self.max_rows = max_rows
+        self.version = 0
+        self.appended = 0
+        self._lock = threading.RLock()
+        self._seen = OrderedDict()
+        self._reset(capacity=1024)
+
+    def _reset(self, capacity):
+        self._n = 0
+        self._ts = np.empty(capacity, dtype=np.float64)
+        self._sev = np.empty(capacity, dtype=np.int8)
+        self._cat = np.empty(capacity, dtype=np.int32)
+        self._src = np.empty(capacity, dtype=np.int32)
+        self._conf = np.empty(capacity, dtype=np.int16)
+        self._nsrc = np.empty(capacity, dtype=np.int16)
+        self._lat = np.empty(capacity, dtype=np.float64)
+        self._lon = np.empty(capacity, dtype=np.float64)
+        self._payload = []
+        self._by_id = {}
+        self._cats = _Dictionary()
+        self._sources = _Dictionary()
+        self._by_sev = {}
+        self._by_cat = {}
+        self._by_src = {}
+        self._by_time = _Posting()
+
+    def __len__(self):
+        return self._n
+
+    # -- writes ---------------------------------------------------------------
+    def _grow(self):
+        capacity = max(1024, len(self._ts) * 2)
+        for name in COLUMNS:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+    def _append(self, item):
+        if self._n == len(self._ts):
+            self._grow()
+        row, ts = self._n, float(item["ts"])
+        sev = SEVERITY_CODE.get(item.get("severity"), 0)
+        cat = self._cats.encode(item.get("cat", "General"))
+        src = self._sources.encode(item.get("source", ""))
+        self._ts[row], self._sev[row], self._cat[row], self._src[row] = ts, sev, cat, src
+        self._conf[row] = int(item.get("conf", 0))
+        self._nsrc[row] = int(item.get("sources", 1))
+        lat, lon = item.get("lat"), item.get("lon")
+        self._lat[row] = np.nan if lat is None else lat
+        self._lon[row] = np.nan if lon is None else lon
+        self._payload.append({k: item.get(k, "") for k in PAYLOAD_FIELDS})
+        self._by_id[item.get("id", "")] = row
+        self._by_sev.setdefault(sev, _Posting()).append(row, ts)
+        self._by_cat.setdefault(cat, _Posting()).append(row, ts)
+        self._by_src.setdefault(src, _Posting()).append(row, ts)
+        self._by_time.append(row, ts)
+        self._n += 1
+
+    def _remember(self, key):
+        self._seen[key] = None
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_rows * 4:
+            self._seen.popitem(last=False)
+
+    def add_many(self, items):
+        """Append unseen items; returns the list of items actually added."""
+        added = []
+        with self._lock:
+            for item in items:
+                guid, digest = item["guid"], item["hash"]
+                if guid in self._seen or digest in self._seen:
+                    continue
+                self._remember(guid)
+                self._remember(digest)
+                self._append(item)
+                self.appended += 1
+                item["stored"] = self.appended
+                added.append(item)
+            if self._n > self.max_rows:
+                self._compact()
+            if added:
+                self.version += 1
+        return added
+
+    def revise(self, updates):
+        """Apply ``(id, sources, conf)`` story revisions to stored items.
+
+        Returns revised copies of the items still in the store, flagged
+        ``merged`` so live views update them in place instead of counting them.
+        """
+        revised = []
+        with self._lock:
+            for item_id, sources, conf in updates:
+                row = self._by_id.get(item_id)
+                if row is None:
+                    continue
+                self._nsrc[row], self._conf[row] = sources, conf
+                revised.append(dict(self.record(row), merged=True))
+            if revised:
+                self.version += 1
+        return revised
+
+    def _compact(self):
+        # Keep the newest 90% of max_rows so compaction is amortised over many inserts.
+        keep = int(self.max_rows * 0.9)
+        rows, _ = self._by_time.sorted()
+        records = [self.record(r) for r in rows[-keep:]]
+        self._reset(capacity=max(1024, len(records)))
+        for item in records:
+            self._append(item)
+
+    # -- snapshots ------------------------------------------------------------
+    def dump_state(self):
+        """Columns, payloads and dedupe keys, copied under the lock; indexes are rebuilt on load."""
+        with self._lock:
+            n, payload = self._n, self._payload
+            if isinstance(payload, _Payload):
+                texts = {name: payload.field(name) for name in PAYLOAD_FIELDS}
+            else:
+                texts = {name: [p[name] for p in payload] for name in PAYLOAD_FIELDS}
+            return {
+                "columns": {name: getattr(self, name)[:n].copy() for name in COLUMNS},
+                "payload": {name: PackedStrings.pack(values) for name, values in texts.items()},
+                "cats": list(self._cats.values),
+                "sources": list(self._sources.values),
+                "seen": PackedStrings.pack(list(self._seen)),
+            }
+
+    def load_state(self, state):
+        """Replace the contents with a ``dump_state`` snapshot; columns stay memory-mapped until written."""
+        with self._lock:
+            self._reset(capacity=0)
+            for name in COLUMNS:
+                setattr(self, name, state["columns"][name])
+            n = self._n = len(self._ts)
+            self.appended = max(self.appended, n)
+            self._payload = _Payload(state["payload"])
+            for dictionary, values in ((self._cats, state["cats"]), (self._sources, state["sources"])):
+                for value in values:
+                    dictionary.encode(value)
+            self._seen = OrderedDict.fromkeys(state["seen"])
+            self._by_id = {item_id: row for row, item_id in enumerate(state["payload"]["id"])}
+            order = np.argsort(self._ts[:n], kind="stable")
+            self._by_time.rows, self._by_time.ts = order, self._ts[order]
+            for index, column in ((self._by_sev, self._sev), (self._by_cat, self._cat), (self._by_src, self._src)):
+                # Stable sort by code keeps each key's rows in time order.
+                by_code = order[np.argsort(column[order], kind="stable")]
+                codes = column[by_code]
+                for rows in np.split(by_code, np.flatnonzero(np.diff(codes)) + 1) if n else ():
+                    posting = index[int(column[rows[0]])] = _Posting()
+                    posting.rows, posting.ts = rows, self._ts[rows]
+            self.version += 1
+
+    # -- reads ----------------------------------------------------------------
+    def categories(self):
+        return list(self._cats.values)
+
+    def sources(self):
+        return list(self._sources.values)
+
+    def record(self, row):
+        item = dict(self._payload[row])
+        item.update(
+            ts=float(self._ts[row]),
+            severity=SEVERITIES[self._sev[row]],
+            cat=self._cats.values[self._cat[row]],
+            source=self._sources.values[self._src[row]],
+            conf=int(self._conf[row]),
+            sources=int(self._nsrc[row]),
+        )
+        if not np.isnan(self._lat[row]):
+            item.update(lat=float(self._lat[row]), lon=float(self._lon[row]))
+        return item
+
+    def points(self, rows):
+        """``(lat, lon, severity_code, conf)`` column slices for ``rows``; NaN where unplaced."""
+        with self._lock:
+            return self._lat[rows], self._lon[rows], self._sev[rows], self._conf[rows]
+
+    def _candidates(self, index, codes, since, until):
+        parts = [index[c].window(since, until) for c in codes if c in index]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        if len(parts) == 1:
+            return parts[0]
+        rows = np.concatenate([p[0] for p in parts])
+        ts = np.concatenate([p[1] for p in parts])
+        order = np.argsort(ts, kind="stable")
+        return rows[order], ts[order]
+
+    def select(self, severity=None, cat=None, source=None, since=None, until=None):
+        """Row ids matching every given filter, newest first.
+
+        ``severity``, ``cat`` and ``source`` accept a single value or an
+        iterable of values. The smallest index posting drives the lookup and
+        the remaining predicates are checked against the columns.
+        """
+        with self._lock:
+            filters = []
+            if severity is not None:
+                filters.append((self._by_sev, self._sev, [SEVERITY_CODE[s] for s in _as_list(severity) if s in SEVERITY_CODE]))
+            if cat is not None:
+                filters.append((self._by_cat, self._cat, [self._cats.codes[c] for c in _as_list(cat) if c in self._cats.codes]))
+            if source is not None:
+                filters.append((self._by_src, self._src, [self._sources.codes[s] for s in _as_list(source) if s in self._sources.codes]))
+
+            if not filters:
+                rows, _ = self._by_time.window(since, until)
+                return rows[::-1].copy()
+
+            def size(f):
+                index, _, codes = f
+                return sum(len(index[c]) for c in codes if c in index)
+
+            filters.sort(key=size)
+            index, _, codes = filters[0]
+            rows, _ = self._candidates(index, codes, since, until)
+            for _, column, codes in filters[1:]:
+                if len(rows) == 0:
+                    break
+                rows = rows[np.isin(column[rows], codes)]
+            return rows[::-1].copy()
+
+    def query(self, limit=None, offset=0, **filters):
+        """Return ``(total, records)`` for one page of a filtered, newest-first query."""
+        with self._lock:
+            rows = self.select(**filters)
+            stop = None if limit is None else offset + limit
+            return len(rows), [self.record(r) for r in rows[offset:stop]]
+
+    def snapshot(self, limit=None):
+        return self.query(limit=limit)[1]
+
+
+def _as_list(value):
+    if isinstance(value, str):
+        return [value]
+    return list(value)
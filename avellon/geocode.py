@@ -0,0 +1,266 @@
+"""Offline gazetteer geocoder for free-text event locations.
+
+Resolution runs entirely against ``data/gazetteer.csv`` -- no network. A
+lookup tries, in order: an exact phrase match over the text's n-grams, an
+IDF-weighted token match, a prefix match on the sorted vocabulary and finally
+a fuzzy (difflib) match on individual tokens. Resolved strings, including
+misses, are kept in a bounded in-memory LRU backed by a SQLite file, so a
+location seen once -- in this process or a previous one -- costs a dict
+lookup.
+"""
+from collections import OrderedDict
+import bisect
+import csv
+import difflib
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from avellon.config import data_path, state_path
+
+DEFAULT_GAZETTEER = data_path("gazetteer.csv")
+DEFAULT_CACHE = "geocode.sqlite"
+# Budget per item placed inline in the ingestion path (title/summary scan plus
+# any ``loc`` lookup); cached lookups take a few microseconds. See
+# benchmarks/bench_geocode.py.
+LATENCY_BUDGET_US = 250
+# Resolved strings kept in memory; older ones are re-read from the SQLite cache.
+MEMO_SIZE = 50_000
+MAX_PHRASE_TOKENS = 5
+FUZZY_CUTOFF = 0.85
+
+# Words that describe a kind of place rather than a place; they never identify
+# a gazetteer entry on their own.
+GENERIC_TOKENS = frozenset("""
+    a an and at bay canal city coast east gulf in island islands lane near north
+    ocean of off on port river sea sector south strait straits terminal the to
+    west global hub zone route region area central upper lower new
+""".split())
+
+# Preference when two phrases of equal length match the same text.
+KIND_RANK = {"port": 0, "chokepoint": 0, "city": 1, "sea": 2, "region": 3, "country": 4}
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return re.findall(r"[a-z0-9]+", text.replace("'", ""))
+
+
+class Gazetteer:
+    """Place entries with phrase, token and prefix indexes."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.phrases = {}
+        self.tokens = {}
+        for i, entry in enumerate(entries):
+            for phrase in [entry["name"]] + entry["aliases"]:
+                key = tuple(normalize(phrase))
+                if not key:
+                    continue
+                current = self.phrases.get(key)
+                if current is None or KIND_RANK.get(entry["kind"], 9) < KIND_RANK.get(entries[current]["kind"], 9):
+                    self.phrases[key] = i
+                for tok in key:
+                    if tok not in GENERIC_TOKENS:
+                        self.tokens.setdefault(tok, set()).add(i)
+        self.vocab = sorted(self.tokens)
+        # Fuzzy candidates are bucketed by initial so a typo is compared against a
+        # few dozen tokens rather than the whole vocabulary.
+        self.by_initial = {}
+        for tok in self.vocab:
+            self.by_initial.setdefault(tok[0], []).append(tok)
+        n = len(entries)
+        self.idf = {tok: math.log(1 + n / len(ids)) for tok, ids in self.tokens.items()}
+        self.checksum = hashlib.sha1(repr(sorted(self.phrases.items())).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def load(cls, path=DEFAULT_GAZETTEER):
+        with open(path, newline="", encoding="utf-8") as fh:
+            entries = [
+                {
+                    "name": row["name"], "lat": float(row["lat"]), "lon": float(row["lon"]),
+                    "kind": row["kind"], "aliases": [a for a in (row.get("aliases") or "").split("|") if a],
+                }
+                for row in csv.DictReader(fh)
+            ]
+        return cls(entries)
+
+    # -- matching strategies ---------------------------------------------------
+    def match_phrase(self, tokens):
+        """Longest gazetteer phrase contained in ``tokens``; leftmost on ties."""
+        best = None
+        for size in range(min(MAX_PHRASE_TOKENS, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                key = tuple(tokens[start:start + size])
+                if size == 1 and key[0] in GENERIC_TOKENS:
+                    continue
+                i = self.phrases.get(key)
+                if i is not None:
+                    rank = KIND_RANK.get(self.entries[i]["kind"], 9)
+                    if best is None or rank < best[0]:
+                        best = (rank, i)
+            if best is not None:
+                return best[1]
+        return None
+
+    def match_tokens(self, tokens):
+        scores = {}
+        for tok in set(tokens):
+            for i in self.tokens.get(tok, ()):
+                scores[i] = scores.get(i, 0.0) + self.idf[tok]
+        if not scores:
+            return None
+        return max(scores, key=lambda i: (scores[i], -KIND_RANK.get(self.entries[i]["kind"], 9)))
+
+    def match_prefix(self, tokens, min_len=4, max_candidates=3):
+        for tok in tokens:
+            if len(tok) < min_len or tok in GENERIC_TOKENS:
+                continue
+            lo = bisect.bisect_left(self.vocab, tok)
+            hi = bisect.bisect_left(self.vocab, tok + "\x7f")
+            if 0 < hi - lo <= max_candidates:
+                return self.match_tokens(self.vocab[lo:hi])
+        return None
+
+    def match_fuzzy(self, tokens, cutoff=FUZZY_CUTOFF):
+        corrected = []
+        for tok in tokens:
+            if len(tok) < 5 or tok in GENERIC_TOKENS:
+                continue
+            candidates = [c for c in self.by_initial.get(tok[0], ()) if abs(len(c) - len(tok)) <= 2]
+            close = difflib.get_close_matches(tok, candidates, n=1, cutoff=cutoff)
+            if close:
+                corrected.append(close[0])
+        return self.match_tokens(corrected) if corrected else None
+
+
+class Geocoder:
+    """Cached geocoding stage for intel items."""
+
+    def __init__(self, gazetteer=None, cache_path=None, memo_size=MEMO_SIZE):
+        self.gazetteer = gazetteer or Gazetteer.load()
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self._pending = []
+        self._lock = threading.Lock()
+        self._db = None
+        if cache_path is not False:
+            self._open_cache(cache_path or state_path(DEFAULT_CACHE))
+        self._stats = {
+            "items": 0, "placed": 0, "lookups": 0, "memory_hits": 0, "disk_hits": 0,
+            "resolved": 0, "unresolved": 0, "lookup_us": 0.0, "place_us": 0.0,
+        }
+
+    def _open_cache(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS geocode (query TEXT PRIMARY KEY, entry INTEGER, method TEXT)"
+        )
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'gazetteer'").fetchone()
+        if row is None or row[0] != self.gazetteer.checksum:
+            # Entry ids are only meaningful for the gazetteer they were resolved against.
+            self._db.execute("DELETE FROM geocode")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('gazetteer', ?)", (self.gazetteer.checksum,))
+
+    def _result(self, hit):
+        if hit is None or hit[0] is None:
+            return None
+        entry = self.gazetteer.entries[hit[0]]
+        return {"name": entry["name"], "lat": entry["lat"], "lon": entry["lon"], "kind": entry["kind"], "method": hit[1]}
+
+    def resolve(self, tokens):
+        """Uncached resolution; returns ``(entry_id, method)`` or ``(None, None)``."""
+        g = self.gazetteer
+        for method, fn in (("phrase", g.match_phrase), ("token", g.match_tokens),
+                           ("prefix", g.match_prefix), ("fuzzy", g.match_fuzzy)):
+            i = fn(tokens)
+            if i is not None:
+                return i, method
+        return None, None
+
+    def geocode(self, text):
+        """Resolve a location string to ``{name, lat, lon, kind, method}`` or ``None``."""
+        started = time.perf_counter()
+        key = " ".join(normalize(text))
+        with self._lock:
+            self._stats["lookups"] += 1
+            hit = self._memo.get(key)
+            if hit is not None:
+                self._memo.move_to_end(key)
+                self._stats["memory_hits"] += 1
+            else:
+                if self._db is not None:
+                    hit = self._db.execute("SELECT entry, method FROM geocode WHERE query = ?", (key,)).fetchone()
+                if hit is not None:
+                    self._stats["disk_hits"] += 1
+                else:
+                    hit = self.resolve(key.split())
+                    self._stats["resolved" if hit[0] is not None else "unresolved"] += 1
+                    if self._db is not None:
+                        self._pending.append((key, hit[0], hit[1]))
+                        if len(self._pending) >= 256:
+                            self._flush_locked()
+                self._memo[key] = hit
+                if len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+            self._stats["lookup_us"] += (time.perf_counter() - started) * 1e6
+        return self._result(hit)
+
+    def _flush_locked(self):
+        if self._pending:
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?)", self._pending)
+            self._pending = []
+
+    def flush(self):
+        """Persist newly resolved strings; called once per ingested batch."""
+        if self._db is not None:
+            with self._lock:
+                self._flush_locked()
+
+    def locate(self, text):
+        """Exact phrase scan of free text (titles, summaries); no fuzzy fallback."""
+        i = self.gazetteer.match_phrase(normalize(text))
+        return self._result((i, "phrase"))
+
+    def place_batch(self, items):
+        """Attach ``loc``/``lat``/``lon`` to items in place.
+
+        Places named in the title or summary win; otherwise the item's own
+        ``loc`` string is geocoded. Unplaced items keep their ``loc``.
+        """
+        started = time.perf_counter()
+        placed = 0
+        for item in items:
+            place = self.locate(item.get("title", "")) or self.locate(item.get("summary", ""))
+            if place is None and item.get("loc"):
+                place = self.geocode(item["loc"])
+            if place is not None:
+                item["loc"], item["lat"], item["lon"] = place["name"], place["lat"], place["lon"]
+                placed += 1
+        self.flush()
+        with self._lock:
+            self._stats["items"] += len(items)
+            self._stats["placed"] += placed
+            self._stats["place_us"] += (time.perf_counter() - started) * 1e6
+        return items
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["lookups"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["lookup_mean_us"] = stats.pop("lookup_us") / lookups if lookups else 0.0
+        # The whole inline cost per item -- phrase scans, lookup and cache flush -- is what the budget covers.
+        stats["mean_us"] = stats.pop("place_us") / stats["items"] if stats["items"] else 0.0
+        stats["budget_us"] = LATENCY_BUDGET_US
+        return stats
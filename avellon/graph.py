@@ -0,0 +1,327 @@
+"""Supplier/asset dependency graph with incremental critical-path analysis.
+
+The graph is held as CSR adjacency arrays (``out_ptr``/``out_idx`` and the
+transpose ``in_ptr``/``in_idx``) over integer node ids, so a graph with tens
+of thousands of nodes is a handful of NumPy arrays. Nodes are layered by a
+frontier-at-a-time Kahn sort; the longest risk-weighted lead-time path into
+and out of every node is computed one layer at a time, and a change to one
+node's risk re-propagates only through the nodes whose values actually move.
+"""
+import csv
+import heapq
+import os
+import threading
+
+import numpy as np
+
+from avellon.config import data_path
+from avellon.events import SEVERITIES, SEVERITY_CODE
+
+DEFAULT_GRAPH_DIR = data_path("supply_graph")
+# Expected lead-time multiplier for a node at each risk level.
+RISK_DELAY = np.array([1.0, 1.25, 1.75, 3.0])
+# Days of inventory cover assumed when nodes.csv has no buffer_days column.
+DEFAULT_BUFFER_DAYS = 7.0
+MAX_NEIGHBORHOOD = 80
+
+
+def load_graph_path():
+    """Graph directory from ``AVELLON_SUPPLY_GRAPH``, else the bundled sample."""
+    return os.environ.get("AVELLON_SUPPLY_GRAPH") or DEFAULT_GRAPH_DIR
+
+
+def _csr(src, dst, n):
+    order = np.argsort(src, kind="stable")
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=ptr[1:])
+    return ptr, dst[order]
+
+
+def _gather(ptr, idx, nodes):
+    # Concatenated CSR rows for ``nodes`` without a Python loop.
+    lo, hi = ptr[nodes], ptr[nodes + 1]
+    counts = hi - lo
+    return idx[np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))]
+
+
+class SupplyGraph:
+    """Directed dependency graph; edges point from supplier to consumer."""
+
+    def __init__(self, ids, names, kinds, risk, lead_days, src, dst, buffer_days=None):
+        n = len(ids)
+        self.ids = list(ids)
+        self.names = list(names)
+        self.kinds = list(kinds)
+        self.index = {node_id: i for i, node_id in enumerate(self.ids)}
+        self._by_name = {name: i for i, name in enumerate(self.names)}
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        self.out_ptr, self.out_idx = _csr(self.src, self.dst, n)
+        self.in_ptr, self.in_idx = _csr(self.dst, self.src, n)
+        self.risk = np.asarray(risk, dtype=np.int8)
+        self.lead = np.asarray(lead_days, dtype=np.float64)
+        self.cost = self.lead * RISK_DELAY[self.risk]
+        self.buffer = np.full(n, DEFAULT_BUFFER_DAYS) if buffer_days is None else np.asarray(buffer_days, dtype=np.float64)
+        self.version = 0
+        self._lock = threading.RLock()
+        self._stats = {"updates": 0, "touched": 0}
+
+        self.level = self._layer()
+        # Edges that close a cycle are ignored for path analysis.
+        dag = self.level[self.src] < self.level[self.dst]
+        self.back_edges = int((~dag).sum())
+        self.dag_out_ptr, self.dag_out_idx = _csr(self.src[dag], self.dst[dag], n)
+        self.dag_in_ptr, self.dag_in_idx = _csr(self.dst[dag], self.src[dag], n)
+        self.layers = self._group_edges(self.src[dag], self.dst[dag])
+        self.dist_to = np.zeros(n)
+        self.dist_from = np.zeros(n)
+        self._longest_paths()
+        self.share = self._path_share()
+        self.articulation = self._articulation_points()
+
+    @classmethod
+    def load(cls, path=DEFAULT_GRAPH_DIR):
+        """Read ``nodes.csv`` (id,name,kind,risk,lead_days[,buffer_days]) and ``edges.csv`` (source,target)."""
+        with open(os.path.join(path, "nodes.csv"), newline="", encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+        ids = [r["id"] for r in rows]
+        index = {node_id: i for i, node_id in enumerate(ids)}
+        src, dst = [], []
+        with open(os.path.join(path, "edges.csv"), newline="", encoding="utf-8") as fh:
+            for r in csv.DictReader(fh):
+                try:
+                    src.append(index[r["source"]])
+                    dst.append(index[r["target"]])
+                except KeyError as exc:
+                    raise ValueError(f"edge references unknown node {exc.args[0]!r}") from None
+        return cls(
+            ids, [r["name"] or r["id"] for r in rows], [r["kind"] for r in rows],
+            [SEVERITY_CODE.get(r["risk"], 0) for r in rows], [float(r["lead_days"] or 0) for r in rows],
+            src, dst,
+            [float(r.get("buffer_days") or DEFAULT_BUFFER_DAYS) for r in rows],
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def find(self, name):
+        """Node id for a node id string or display name, else ``None``."""
+        i = self.index.get(name)
+        return i if i is not None else self._by_name.get(name)
+
+    # -- construction ---------------------------------------------------------
+    def _layer(self):
+        """Longest-path layer of every node (Kahn's sort, one frontier at a time).
+
+        If the frontier empties while nodes remain, they sit on cycles; the one
+        with the fewest unresolved suppliers is forced into the next layer.
+        """
+        n = len(self)
+        indeg = np.bincount(self.dst, minlength=n)
+        level = np.full(n, -1, dtype=np.int64)
+        frontier = np.flatnonzero(indeg == 0)
+        depth = 0
+        while True:
+            if len(frontier) == 0:
+                remaining = np.flatnonzero(level < 0)
+                if len(remaining) == 0:
+                    break
+                frontier = remaining[[np.argmin(indeg[remaining])]]
+            level[frontier] = depth
+            succ = _gather(self.out_ptr, self.out_idx, frontier)
+            np.subtract.at(indeg, succ, 1)
+            succ = np.unique(succ)
+            frontier = succ[(indeg[succ] <= 0) & (level[succ] < 0)]
+            depth += 1
+        return level
+
+    def _group_edges(self, src, dst):
+        # DAG edges bucketed by consumer layer (and sorted by consumer within
+        # a layer, for reduceat), for the layer-at-a-time passes.
+        order = np.lexsort((dst, self.level[dst]))
+        src, dst = src[order], dst[order]
+        bounds = np.searchsorted(self.level[dst], np.arange(self.level.max() + 2))
+        return [(src[a:b], dst[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def _longest_paths(self):
+        best = np.zeros(len(self))
+        for src, dst in self.layers:
+            np.maximum.at(best, dst, self.cost[src] + best[src])
+        self.dist_to = best + self.cost
+        best = np.zeros(len(self))
+        for src, dst in reversed(self.layers):
+            np.maximum.at(best, src, self.cost[dst] + best[dst])
+        self.dist_from = best + self.cost
+
+    def _path_share(self):
+        """Fraction of source-to-sink paths that pass through each node.
+
+        The DAG analogue of betweenness: paths in times paths out, over all
+        source-to-sink paths. Depends on topology only.
+        """
+        up = np.zeros(len(self))
+        up[np.diff(self.dag_in_ptr) == 0] = 1.0
+        for src, dst in self.layers:
+            np.add.at(up, dst, up[src])
+        down = np.zeros(len(self))
+        down[np.diff(self.dag_out_ptr) == 0] = 1.0
+        for src, dst in reversed(self.layers):
+            np.add.at(down, src, down[dst])
+        total = up[np.diff(self.dag_out_ptr) == 0].sum()
+        return up * down / total if total else np.zeros(len(self))
+
+    def _articulation_points(self):
+        """Nodes whose removal disconnects the (undirected) graph; iterative Tarjan."""
+        n = len(self)
+        ptr, adj = _csr(np.concatenate([self.src, self.dst]), np.concatenate([self.dst, self.src]), n)
+        ptr, adj = ptr.tolist(), adj.tolist()
+        disc = [-1] * n
+        low = [0] * n
+        is_cut = [False] * n
+        clock = 0
+        for root in range(n):
+            if disc[root] >= 0:
+                continue
+            disc[root] = low[root] = clock
+            clock += 1
+            children = 0
+            stack = [(root, -1, ptr[root])]
+            while stack:
+                v, parent, pos = stack[-1]
+                if pos < ptr[v + 1]:
+                    stack[-1] = (v, parent, pos + 1)
+                    w = adj[pos]
+                    if disc[w] < 0:
+                        disc[w] = low[w] = clock
+                        clock += 1
+                        if v == root:
+                            children += 1
+                        stack.append((w, v, ptr[w]))
+                    elif w != parent:
+                        low[v] = min(low[v], disc[w])
+                    continue
+                stack.pop()
+                if stack:
+                    u = stack[-1][0]
+                    low[u] = min(low[u], low[v])
+                    if u != root and low[v] >= disc[u]:
+                        is_cut[u] = True
+            if children > 1:
+                is_cut[root] = True
+        return np.flatnonzero(is_cut)
+
+    # -- updates --------------------------------------------------------------
+    def set_risk(self, node, risk):
+        """Change one node's risk level and re-propagate the affected path lengths.
+
+        Returns the number of nodes whose values were recomputed (0 if the
+        risk was unchanged).
+        """
+        code = SEVERITY_CODE[risk] if isinstance(risk, str) else int(risk)
+        with self._lock:
+            if self.risk[node] == code:
+                return 0
+            self.risk[node] = code
+            self.cost[node] = self.lead[node] * RISK_DELAY[code]
+            touched = self._propagate(node, self.dag_in_ptr, self.dag_in_idx, self.dag_out_ptr, self.dag_out_idx, self.dist_to, 1)
+            touched += self._propagate(node, self.dag_out_ptr, self.dag_out_idx, self.dag_in_ptr, self.dag_in_idx, self.dist_from, -1)
+            self.version += 1
+            self._stats["updates"] += 1
+            self._stats["touched"] += touched
+        return touched
+
+    def _propagate(self, start, dep_ptr, dep_idx, next_ptr, next_idx, dist, sign):
+        # Recompute in layer order (reverse layers for dist_from) so every
+        # dependency is final before a node is visited; stop where values hold.
+        heap = [(sign * int(self.level[start]), start)]
+        queued = {start}
+        touched = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            touched += 1
+            deps = dep_idx[dep_ptr[v]:dep_ptr[v + 1]]
+            value = self.cost[v] + (dist[deps].max() if len(deps) else 0.0)
+            if value == dist[v] and v != start:
+                continue
+            dist[v] = value
+            for w in next_idx[next_ptr[v]:next_ptr[v + 1]].tolist():
+                if w not in queued:
+                    queued.add(w)
+                    heapq.heappush(heap, (sign * int(self.level[w]), w))
+        return touched
+
+    # -- reads ----------------------------------------------------------------
+    def through(self):
+        """Longest risk-weighted lead time (days) of any path through each node."""
+        return self.dist_to + self.dist_from - self.cost
+
+    def criticality(self):
+        """Path share weighted by how close each node's longest path is to the critical one."""
+        through = self.through()
+        longest = through.max() if len(through) else 0.0
+        return self.share * (through / longest) if longest else np.zeros(len(self))
+
+    def critical_path(self):
+        """Node ids of the longest risk-weighted lead-time path, supplier first."""
+        with self._lock:
+            if not len(self):
+                return []
+            v = int(np.argmax(self.through()))
+            path = [v]
+            while True:
+                preds = self.dag_in_idx[self.dag_in_ptr[path[0]]:self.dag_in_ptr[path[0] + 1]]
+                if not len(preds):
+                    break
+                path.insert(0, int(preds[np.argmax(self.dist_to[preds])]))
+            while True:
+                succs = self.dag_out_idx[self.dag_out_ptr[path[-1]]:self.dag_out_ptr[path[-1] + 1]]
+                if not len(succs):
+                    break
+                path.append(int(succs[np.argmax(self.dist_from[succs])]))
+            return path
+
+    def top_critical(self, k=10):
+        """Ids of the ``k`` most critical nodes, most critical first."""
+        score = self.criticality()
+        k = min(k, len(score))
+        top = np.argpartition(-score, k - 1)[:k] if k else np.empty(0, dtype=np.int64)
+        return top[np.argsort(-score[top], kind="stable")]
+
+    def neighborhood(self, node, hops=2, max_nodes=MAX_NEIGHBORHOOD):
+        """Nodes within ``hops`` of ``node`` in either direction, plus the edges among them.
+
+        Expansion is breadth-first and stops once ``max_nodes`` is reached, so
+        the result stays small enough for graphviz to lay out interactively.
+        Returns ``(nodes, edges)`` with ``edges`` a list of ``(source, target)``.
+        """
+        seen = {node: 0}
+        frontier = [node]
+        for hop in range(1, hops + 1):
+            nxt = []
+            for v in frontier:
+                for w in (self.in_idx[self.in_ptr[v]:self.in_ptr[v + 1]].tolist()
+                          + self.out_idx[self.out_ptr[v]:self.out_ptr[v + 1]].tolist()):
+                    if w not in seen and len(seen) < max_nodes:
+                        seen[w] = hop
+                        nxt.append(w)
+            frontier = nxt
+        nodes = list(seen)
+        edges = [
+            (v, w) for v in nodes
+            for w in self.out_idx[self.out_ptr[v]:self.out_ptr[v + 1]].tolist() if w in seen
+        ]
+        return nodes, edges
+
+    def node(self, i):
+        return {
+            "id": self.ids[i], "name": self.names[i], "kind": self.kinds[i],
+            "risk": SEVERITIES[self.risk[i]], "lead_days": float(self.lead[i]),
+        }
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(nodes=len(self), edges=len(self.src), back_edges=self.back_edges,
+                     articulation_points=len(self.articulation))
+        stats["mean_touched"] = stats["touched"] / stats["updates"] if stats["updates"] else 0.0
+        return stats
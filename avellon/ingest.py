@@ -0,0 +1,307 @@
+"""Background RSS/Atom ingestion for the Intelligence Stream.
+
+One ``FeedIngestor`` runs per process. Its worker thread polls every
+configured feed concurrently on a thread pool, sends conditional GETs
+(``If-None-Match`` / ``If-Modified-Since``) so unchanged feeds cost a 304, runs
+the optional geocoding, scoring and story-clustering stages, and deduplicates
+entries by GUID (or a content hash when a feed has none) into a bounded
+in-memory ``FeedStore``. Streamlit sessions only ever read the store.
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import calendar
+import hashlib
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import feedparser
+import requests
+
+log = logging.getLogger(__name__)
+
+DEFAULT_FEEDS = [
+    "https://gcaptain.com/feed/",
+    "https://www.maritime-executive.com/articles.rss",
+    "https://www.supplychaindive.com/feeds/news/",
+]
+DEFAULT_INTERVAL = 300
+DEFAULT_MAX_ITEMS = 5000
+USER_AGENT = "AVELLON-Ingest/1.0"
+
+# First keyword hit wins; anything unmatched lands in "General".
+CATEGORY_KEYWORDS = [
+    ("Conflict", ("attack", "missile", "drone", "military", "navy", "war", "strike on", "houthi", "seized")),
+    ("Cyber", ("cyber", "ransomware", "hack", "malware", "outage")),
+    ("Weather", ("typhoon", "hurricane", "storm", "flood", "cyclone", "earthquake", "drought")),
+    ("Labor", ("strike", "union", "labor", "labour", "walkout", "dockworkers")),
+    ("Regulatory", ("sanction", "ofac", "tariff", "export control", "regulation", "embargo")),
+    ("Logistics", ("port", "canal", "congestion", "freight", "shipping", "container", "vessel")),
+]
+
+
+def load_feed_config():
+    """Feed URLs from ``AVELLON_FEEDS`` (comma separated), else the defaults."""
+    raw = os.environ.get("AVELLON_FEEDS", "")
+    feeds = [u.strip() for u in raw.split(",") if u.strip()]
+    return feeds or list(DEFAULT_FEEDS)
+
+
+def classify(text):
+    lowered = text.lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(k in lowered for k in keywords):
+            return category
+    return "General"
+
+
+def content_hash(title, summary):
+    return hashlib.sha1(f"{title}\x1f{summary}".encode("utf-8")).hexdigest()
+
+
+def normalize_entry(entry, source, fetched_at):
+    """Map a feedparser entry onto the intel item dict used by the War Room."""
+    title = (entry.get("title") or "").strip()
+    summary = (entry.get("summary") or entry.get("description") or "").strip()
+    digest = content_hash(title, summary)
+    guid = entry.get("id") or entry.get("guid") or entry.get("link") or digest
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    ts = float(calendar.timegm(parsed)) if parsed else fetched_at
+    return {
+        "id": "EVT-" + hashlib.sha1(guid.encode("utf-8")).hexdigest()[:8].upper(),
+        "guid": guid,
+        "hash": digest,
+        "title": title,
+        "summary": summary,
+        "link": entry.get("link", ""),
+        "source": source,
+        "loc": source,
+        "cat": classify(f"{title} {summary}"),
+        # Defaults for pipelines without a scoring stage.
+        "severity": "LOW",
+        "conf": 50,
+        "ts": ts,
+    }
+
+
+class FeedStore:
+    """Bounded, deduplicating store of intel items.
+
+    Items are keyed by GUID and also indexed by content hash so the same story
+    syndicated under two GUIDs is only kept once. Keys of evicted items are
+    remembered (up to ``seen_factor`` x capacity) so an old entry still present
+    in a feed does not reappear after eviction.
+    """
+
+    def __init__(self, max_items=DEFAULT_MAX_ITEMS, seen_factor=4):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._seen = OrderedDict()
+        self._max_seen = max_items * seen_factor
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def _remember(self, key):
+        self._seen[key] = None
+        self._seen.move_to_end(key)
+        while len(self._seen) > self._max_seen:
+            self._seen.popitem(last=False)
+
+    def add_many(self, items):
+        """Insert new items; returns the list of items that were actually added."""
+        added = []
+        with self._lock:
+            for item in items:
+                guid, digest = item["guid"], item["hash"]
+                if guid in self._seen or digest in self._seen:
+                    continue
+                self._remember(guid)
+                self._remember(digest)
+                self._items[guid] = item
+                added.append(item)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+            if added:
+                self.version += 1
+        return added
+
+    def revise(self, updates):
+        """Apply ``(id, sources, conf)`` story revisions; returns the revised items."""
+        by_id = {item_id: (sources, conf) for item_id, sources, conf in updates}
+        revised = []
+        with self._lock:
+            for guid, item in self._items.items():
+                if item.get("id") in by_id:
+                    sources, conf = by_id[item["id"]]
+                    item = self._items[guid] = dict(item, sources=sources, conf=conf)
+                    revised.append(dict(item, merged=True))
+            if revised:
+                self.version += 1
+        return revised
+
+    def snapshot(self, limit=None):
+        """Items newest first, optionally capped at ``limit``."""
+        with self._lock:
+            items = list(self._items.values())
+        items.sort(key=lambda i: i["ts"], reverse=True)
+        return items[:limit] if limit else items
+
+
+class FeedIngestor:
+    """Per-process polling worker that fills a ``FeedStore`` (or any store with
+    the same ``add_many`` surface, such as ``events.EventStore``).
+
+    With a ``clusterer`` only the first report of each story is stored and
+    published; later reports revise it through the store's ``revise``.
+    """
+
+    def __init__(self, feeds, interval=DEFAULT_INTERVAL, max_items=DEFAULT_MAX_ITEMS,
+                 max_workers=8, timeout=10, scorer=None, store=None, geocoder=None, risk_index=None, bus=None,
+                 clusterer=None):
+        self.feeds = list(feeds)
+        self.scorer = scorer
+        self.clusterer = clusterer
+        self.geocoder = geocoder
+        self.risk_index = risk_index
+        self.bus = bus
+        self.interval = interval
+        self.timeout = timeout
+        self.store = store if store is not None else FeedStore(max_items)
+        self.stats = {"polls": 0, "fetched": 0, "not_modified": 0, "errors": 0, "added": 0, "last_poll": None}
+        self._validators = {}
+        # Validators of fetched bodies, committed to _validators only once poll_once has stored
+        # the batch: a batch that fails after the fetch is then fetched again next poll.
+        self._fetched = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="avellon-feed")
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -- fetching -------------------------------------------------------------
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            self._local.session = session
+        return session
+
+    def _fetch_file(self, url):
+        path = url2pathname(urlparse(url).path)
+        mtime = os.stat(path).st_mtime
+        if self._validators.get(url, {}).get("mtime") == mtime:
+            return None
+        with open(path, "rb") as fh:
+            body = fh.read()
+        self._fetched[url] = {"mtime": mtime}
+        return body
+
+    def _fetch_http(self, url):
+        headers = {}
+        cached = self._validators.get(url, {})
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("modified"):
+            headers["If-Modified-Since"] = cached["modified"]
+        resp = self._session().get(url, headers=headers, timeout=self.timeout)
+        if resp.status_code == 304:
+            return None
+        resp.raise_for_status()
+        self._fetched[url] = {
+            "etag": resp.headers.get("ETag"),
+            # Only the server's own validators are echoed back; a date made up from the local
+            # clock could make a server that compares dates answer 304 to a changed feed.
+            "modified": resp.headers.get("Last-Modified"),
+        }
+        return resp.content
+
+    def fetch(self, url):
+        """Return parsed, normalized items for ``url``; ``None`` when unchanged."""
+        fetched_at = time.time()
+        if urlparse(url).scheme == "file":
+            body = self._fetch_file(url)
+        else:
+            body = self._fetch_http(url)
+        if body is None:
+            return None
+        parsed = feedparser.parse(body)
+        source = parsed.feed.get("title") or urlparse(url).netloc or url
+        return [normalize_entry(e, source, fetched_at) for e in parsed.entries]
+
+    def _fetch_safe(self, url):
+        try:
+            return url, self.fetch(url), None
+        except Exception as exc:  # one bad feed must not stall the others
+            return url, None, exc
+
+    def poll_once(self):
+        """Poll every feed concurrently; returns the newly added items."""
+        added = []
+        for url, items, exc in self._pool.map(self._fetch_safe, self.feeds):
+            if exc is not None:
+                self.stats["errors"] += 1
+                log.warning("Feed poll failed for %s: %s", url, exc)
+            elif items is None:
+                self.stats["not_modified"] += 1
+            else:
+                self.stats["fetched"] += 1
+                if self.geocoder is not None:
+                    self.geocoder.place_batch(items)
+                if self.scorer is not None:
+                    self.scorer.score_batch(items)
+                merged = []
+                if self.clusterer is not None:
+                    items, merged = self.clusterer.assign(items)
+                fresh = self.store.add_many(items)
+                revised = self.store.revise(merged) if merged else []
+                if self.risk_index is not None:
+                    self.risk_index.add_events(fresh)
+                if self.bus is not None:
+                    self.bus.publish(fresh + revised)
+                self._validators[url] = self._fetched.pop(url)
+                added.extend(fresh)
+        self.stats["polls"] += 1
+        self.stats["added"] += len(added)
+        self.stats["last_poll"] = time.time()
+        return added
+
+    # -- snapshots ------------------------------------------------------------
+    def dump_state(self):
+        return {"validators": dict(self._validators)}
+
+    def load_state(self, state):
+        """Restore feed validators, so the first poll after a restart only fetches feeds that changed.
+
+        Snapshot the ingestor before its store: a poll landing between the
+        two is then fetched again after a restore rather than skipped.
+        """
+        feeds = set(self.feeds)
+        self._validators.update((url, v) for url, v in state["validators"].items() if url in feeds)
+
+    # -- lifecycle ------------------------------------------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                log.exception("Ingestion cycle failed")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="avellon-ingest", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pool.shutdown(wait=False)
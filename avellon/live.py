@@ -0,0 +1,128 @@
+"""Per-process pub/sub of feed updates for the War Room live panels.
+
+The ingestion worker publishes every batch of newly stored items, and of
+stored stories revised by a later report, to one ``FeedBus``. Each session
+keeps a ``FeedView`` -- the first page and total for its current filters --
+plus a cursor into the bus; a fragment refresh applies only what was
+published since that cursor instead of re-querying the store and rebuilding
+the whole stream. The bus keeps a bounded backlog:
+a view that falls further behind than ``capacity`` items, or whose filters
+change, resyncs from the store.
+"""
+from collections import deque
+from itertools import islice
+import threading
+import time
+
+DEFAULT_CAPACITY = 10_000
+# Full resync interval; also ages items out of time-windowed views.
+RESYNC_INTERVAL = 60
+
+
+class FeedBus:
+    """Bounded, sequence-numbered log of published feed items."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self._lock = threading.Lock()
+        self._log = deque(maxlen=capacity)
+        self.seq = 0
+        self.batches = 0
+
+    def __len__(self):
+        return len(self._log)
+
+    def publish(self, items):
+        """Ingestion stage: append a batch of stored items; returns them unchanged."""
+        if not items:
+            return items
+        with self._lock:
+            self._log.extend(items)
+            self.seq += len(items)
+            self.batches += 1
+        return items
+
+    def since(self, cursor):
+        """``(seq, items, complete)`` for everything published after ``cursor``.
+
+        ``complete`` is False when part of that range has already been dropped
+        from the backlog; the caller must then resync from the store.
+        """
+        with self._lock:
+            seq, missed = self.seq, self.seq - cursor
+            if missed <= 0:
+                return seq, [], True
+            if missed > len(self._log):
+                return seq, [], False
+            # The newest ``missed`` entries, read from the right end in O(missed).
+            items = list(islice(reversed(self._log), missed))
+        items.reverse()
+        return seq, items, True
+
+
+class FeedView:
+    """One session's newest-first first page and match count for a filter set."""
+
+    def __init__(self, severity=None, cat=None, window=None, size=10):
+        self.filters = (tuple(severity or ()), tuple(cat or ()), window)
+        self.size = size
+        self.cursor = 0
+        # Store's ``appended`` count at the last sync: items stamped at or below it are in ``total``.
+        self.mark = 0
+        self.total = 0
+        self.items = []
+        self.synced = 0.0
+
+    def matches(self, item, now):
+        severity, cat, window = self.filters
+        return (
+            (not severity or item.get("severity") in severity)
+            and (not cat or item.get("cat") in cat)
+            and (window is None or item["ts"] >= now - window)
+        )
+
+    def sync(self, store, bus, now=None):
+        """Reload the page and count from ``store`` and move the cursor to the bus head."""
+        now = time.time() if now is None else now
+        severity, cat, window = self.filters
+        # Taken before the query so nothing published during it is missed. An item
+        # stored before the query but published after it is already in the count; its
+        # ``stored`` stamp is at or below the watermark, so refresh() skips it.
+        self.cursor = bus.seq
+        for _ in range(3):
+            mark = getattr(store, "appended", 0)
+            self.total, self.items = store.query(
+                severity=severity or None, cat=cat or None,
+                since=now - window if window else None, limit=self.size,
+            )
+            # Retried if a batch landed between reading the watermark and the query.
+            if getattr(store, "appended", 0) == mark:
+                break
+        self.mark = mark
+        self.synced = now
+
+    def refresh(self, store, bus, now=None, resync_after=RESYNC_INTERVAL):
+        """Apply items published since the last call; returns True if the page or count changed."""
+        now = time.time() if now is None else now
+        if now - self.synced >= resync_after:
+            self.sync(store, bus, now)
+            return True
+        self.cursor, fresh, complete = bus.since(self.cursor)
+        if not complete:
+            self.sync(store, bus, now)
+            return True
+        seen = {item["id"] for item in self.items}
+        # Revisions of stored stories (new corroborating sources) replace their card in place.
+        revised = {item["id"]: item for item in fresh if item.get("merged") and item["id"] in seen}
+        matched = [
+            item for item in fresh
+            if not item.get("merged") and item.get("stored", self.mark + 1) > self.mark
+            and self.matches(item, now) and item["id"] not in seen
+        ]
+        if not matched and not revised:
+            return False
+        self.total += len(matched)
+        page = [revised.get(item["id"], item) for item in self.items]
+        # Feed items carry their publication time, so a new batch may interleave with the page.
+        merged = sorted(page + matched, key=lambda item: item["ts"], reverse=True)
+        self.items = merged[:self.size]
+        return True
@@ -0,0 +1,205 @@
+"""Viewport culling and server-side clustering for the War Room map.
+
+Points are projected to Web Mercator once and kept sorted by x, so culling a
+viewport is two binary searches plus a mask over the visible x-slice. Dense
+viewports are aggregated on a zoom-dependent pixel grid, so the browser only
+ever receives a bounded number of markers regardless of how many assets are
+loaded. Cluster results are memoized per (zoom, snapped viewport).
+"""
+from collections import OrderedDict
+import html
+import math
+
+import folium
+import numpy as np
+
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+RISK_CODE = {name: code for code, name in enumerate(RISK_LEVELS)}
+RISK_COLORS = {"CRITICAL": "red", "HIGH": "orange", "MEDIUM": "yellow", "LOW": "green"}
+
+TILE_PX = 256
+CELL_PX = 48
+CLUSTER_THRESHOLD = 500
+MAX_LAT = 85.05112878
+WORLD = {"south": -MAX_LAT, "west": -180.0, "north": MAX_LAT, "east": 180.0}
+
+
+def project(lat, lon):
+    """Web Mercator in unit square coordinates (x right, y down)."""
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -MAX_LAT, MAX_LAT)
+    lon = np.asarray(lon, dtype=np.float64)
+    x = (lon + 180.0) / 360.0
+    s = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + s) / (1 - s)) / (4 * math.pi)
+    return x, y
+
+
+def bounds_from_folium(state):
+    """Convert ``st_folium``'s returned ``bounds`` dict to south/west/north/east."""
+    try:
+        sw, ne = state["_southWest"], state["_northEast"]
+        return {"south": sw["lat"], "west": sw["lng"], "north": ne["lat"], "east": ne["lng"]}
+    except (KeyError, TypeError):
+        return None
+
+
+class PointLayer:
+    """Immutable set of map points with culling and clustering queries."""
+
+    def __init__(self, lat, lon, risk, records=None, cache_size=64):
+        x, y = project(lat, lon)
+        order = np.argsort(x, kind="stable")
+        self.x, self.y = x[order], y[order]
+        self.lat = np.asarray(lat, dtype=np.float64)[order]
+        self.lon = np.asarray(lon, dtype=np.float64)[order]
+        self.risk = np.asarray(risk, dtype=np.int8)[order]
+        self.order = order
+        self.records = records
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+
+    @classmethod
+    def from_records(cls, records):
+        lat = [r["lat"] for r in records]
+        lon = [r["lon"] for r in records]
+        risk = [RISK_CODE.get(r["risk"], 0) for r in records]
+        return cls(lat, lon, risk, records=records)
+
+    def __len__(self):
+        return len(self.x)
+
+    def record(self, i):
+        """Original record for sorted position ``i``."""
+        return self.records[self.order[i]] if self.records is not None else None
+
+    def _x_ranges(self, west, east):
+        if west <= east:
+            return [((west + 180.0) / 360.0, (east + 180.0) / 360.0)]
+        # Viewport crosses the antimeridian.
+        return [((west + 180.0) / 360.0, 1.0), (0.0, (east + 180.0) / 360.0)]
+
+    def visible(self, bounds):
+        """Sorted positions of the points inside ``bounds``."""
+        west, east = bounds["west"], bounds["east"]
+        if east - west >= 360.0:
+            west, east = -180.0, 180.0
+        west = (west + 180.0) % 360.0 - 180.0 if west < -180.0 else west
+        east = (east + 180.0) % 360.0 - 180.0 if east > 180.0 else east
+        _, y_top = project(min(bounds["north"], MAX_LAT), 0.0)
+        _, y_bottom = project(max(bounds["south"], -MAX_LAT), 0.0)
+        parts = []
+        for x0, x1 in self._x_ranges(west, east):
+            lo = np.searchsorted(self.x, x0, side="left")
+            hi = np.searchsorted(self.x, x1, side="right")
+            ys = self.y[lo:hi]
+            parts.append(lo + np.flatnonzero((ys >= y_top) & (ys <= y_bottom)))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _snap(self, bounds, zoom):
+        # Snap the viewport outward to whole grid cells so small pans reuse the cache.
+        step = CELL_PX / (TILE_PX * 2 ** zoom) * 360.0
+        return (
+            zoom,
+            math.floor(bounds["west"] / step), math.ceil(bounds["east"] / step),
+            math.floor(bounds["south"] / step), math.ceil(bounds["north"] / step),
+        )
+
+    def clusters(self, bounds, zoom, threshold=CLUSTER_THRESHOLD):
+        """Aggregate the visible points for ``zoom``.
+
+        Returns a dict of equal-length arrays: ``lat``/``lon`` (member mean),
+        ``count``, ``risk`` (highest member risk code) and ``first`` (sorted
+        position of one member, used for singleton popups). When no more than
+        ``threshold`` points are visible every point is its own cluster.
+        """
+        zoom = int(max(0, min(zoom, 22)))
+        key = self._snap(bounds, zoom)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        step = CELL_PX / (TILE_PX * 2 ** zoom) * 360.0
+        snapped = {"west": key[1] * step, "east": key[2] * step, "south": key[3] * step, "north": key[4] * step}
+        idx = self.visible(snapped)
+        if len(idx) <= threshold:
+            result = {
+                "lat": self.lat[idx], "lon": self.lon[idx], "count": np.ones(len(idx), dtype=np.int64),
+                "risk": self.risk[idx], "first": idx,
+            }
+        else:
+            cells_per_side = (TILE_PX * 2 ** zoom) // CELL_PX + 1
+            cx = (self.x[idx] * cells_per_side).astype(np.int64)
+            cy = (self.y[idx] * cells_per_side).astype(np.int64)
+            cell_ids, first, inverse, counts = np.unique(
+                cx * cells_per_side + cy, return_index=True, return_inverse=True, return_counts=True
+            )
+            n = len(cell_ids)
+            lat = np.bincount(inverse, weights=self.lat[idx], minlength=n) / counts
+            lon = np.bincount(inverse, weights=self.lon[idx], minlength=n) / counts
+            # Highest risk level present per cell.
+            levels = np.bincount(inverse * len(RISK_LEVELS) + self.risk[idx], minlength=n * len(RISK_LEVELS))
+            levels = levels.reshape(n, len(RISK_LEVELS)) > 0
+            risk = (len(RISK_LEVELS) - 1 - np.argmax(levels[:, ::-1], axis=1)).astype(np.int8)
+            result = {"lat": lat, "lon": lon, "count": counts, "risk": risk, "first": idx[first]}
+
+        self._cache[key] = result
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+
+def build_base_map():
+    """Tile layer only; the overlay is passed to ``st_folium`` separately on each rerun."""
+    return folium.Map(location=[20, 10], zoom_start=2, tiles="CartoDB dark_matter")
+
+
+def _overlay_style(feature):
+    props = feature["properties"]
+    return {
+        "color": props["color"], "fillColor": props["color"], "radius": props["radius"],
+        "fillOpacity": props["opacity"], "weight": 2,
+    }
+
+
+def build_overlay(layer, clusters, name="assets"):
+    """FeatureGroup holding one GeoJSON layer for the visible clusters.
+
+    A single GeoJSON layer serializes as one JSON document, which is an order of
+    magnitude cheaper for folium/st_folium than one templated CircleMarker per
+    cluster.
+    """
+    features = []
+
+    def add(lat, lon, color, radius, opacity, label):
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {"color": color, "radius": radius, "opacity": opacity, "label": label},
+        })
+
+    for lat, lon, count, risk, first in zip(
+        clusters["lat"].tolist(), clusters["lon"].tolist(), clusters["count"].tolist(),
+        clusters["risk"].tolist(), clusters["first"].tolist(),
+    ):
+        level = RISK_LEVELS[risk]
+        color = RISK_COLORS[level]
+        if count > 1:
+            add(lat, lon, color, round(6 + 3 * math.log2(count), 1), 0.5, f"<b>{count:,} assets</b><br>Max risk: {level}")
+            continue
+        record = layer.record(first)
+        label = f"<b>{html.escape(record['name'])}</b><br>Risk: {record['risk']}<br>Conf: {record['conf']}%" if record else level
+        # Pulse for critical
+        if level == "CRITICAL":
+            add(lat, lon, color, 20, 0.2, label)
+        add(lat, lon, color, 6, 1.0, label)
+
+    fg = folium.FeatureGroup(name=name)
+    if features:
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            marker=folium.CircleMarker(fill=True),
+            style_function=_overlay_style,
+            popup=folium.GeoJsonPopup(fields=["label"], labels=False),
+        ).add_to(fg)
+    return fg
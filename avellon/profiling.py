@@ -0,0 +1,232 @@
+"""Render profiling for ``app.py``: named spans, payload bytes and histograms.
+
+Each span records its wall time, the script-thread CPU time and the bytes
+sent to the browser while it was open (so a parent's bytes include its
+children's). Counting bytes is up to the front end: ``payload_hook``, when
+set, is called as the outermost span opens with a callback taking a byte
+count, and returns a callable that stops the counting (or None). Like the
+rest of the package, this module does not import Streamlit; ``app.py``
+installs the hook that meters its session's messages. Samples go into one
+histogram per span name: fixed cumulative buckets for the Prometheus text
+export plus a rolling window of recent samples for the percentiles on the
+System Logs page.
+
+Profiling is off unless ``AVELLON_PROFILE`` is set (or it is switched on at
+runtime). When off, ``span`` hands back one shared no-op context manager and
+``profiled`` returns the function undecorated; ``app.py`` re-applies its
+decorators on every rerun, so a toggle takes effect on the next run. Set
+``AVELLON_PROFILE_EXPORT`` to a path to have the Prometheus text rewritten
+there at most every ``EXPORT_INTERVAL`` seconds, e.g. for a node_exporter
+textfile collector.
+"""
+from collections import deque
+import bisect
+import contextlib
+import functools
+import os
+import threading
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+# Upper bounds in seconds and bytes; Prometheus adds +Inf.
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+WINDOW = 512
+EXPORT_INTERVAL = 15.0
+_NOOP = contextlib.nullcontext()
+
+
+class _Histogram:
+    """Cumulative bucket counts plus a rolling window of recent samples."""
+
+    def __init__(self, bounds, window):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantile(self, q):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "wall", "cpu", "sent", "stop_counting")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        local = self.profiler._local
+        depth = getattr(local, "depth", 0)
+        self.stop_counting = None
+        hook = self.profiler.payload_hook
+        if depth == 0:
+            local.sent = 0
+            if hook is not None:
+                def add(nbytes):
+                    local.sent += nbytes
+                try:
+                    self.stop_counting = hook(add)
+                except Exception:  # a broken meter must never break the render it measures
+                    log.exception("Payload hook failed; span bytes read 0")
+        local.depth = depth + 1
+        self.sent = local.sent
+        self.wall, self.cpu = time.perf_counter(), time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            wall, cpu = time.perf_counter() - self.wall, time.thread_time() - self.cpu
+            local = self.profiler._local
+            local.depth -= 1
+            sent = local.sent - self.sent
+            # Runs cut short (st.rerun, st.stop, errors) are not representative samples.
+            if exc_type is None:
+                self.profiler.observe(self.name, wall, cpu, sent)
+            if local.depth == 0:
+                self.profiler.maybe_export()
+        finally:
+            # The hook may have patched the front end; undo it whatever failed above.
+            if self.stop_counting is not None:
+                self.stop_counting()
+        return False
+
+
+class Profiler:
+    """Process-wide span histograms for the render path."""
+
+    def __init__(self, enabled=False, window=WINDOW, export_path=None):
+        self.enabled = enabled
+        self.window = window
+        self.export_path = export_path
+        # Front-end byte meter; see the module docstring.
+        self.payload_hook = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._spans = {}
+        self._last_export = 0.0
+
+    def span(self, name):
+        """Context manager timing ``name``; a shared no-op while disabled."""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def profiled(self, name=None):
+        """Decorator wrapping calls in ``span(name or fn.__name__)``; identity while disabled."""
+        def decorator(fn):
+            if not self.enabled:
+                return fn
+            label = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with _Span(self, label):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name, wall, cpu, sent):
+        with self._lock:
+            hists = self._spans.get(name)
+            if hists is None:
+                hists = self._spans[name] = (
+                    _Histogram(TIME_BUCKETS, self.window), _Histogram(TIME_BUCKETS, self.window),
+                    _Histogram(BYTE_BUCKETS, self.window),
+                )
+            for hist, value in zip(hists, (wall, cpu, sent)):
+                hist.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+
+    def stats(self):
+        """Per-span rolling percentiles (seconds, bytes) and lifetime counts, keyed by name."""
+        with self._lock:
+            return {
+                name: {
+                    "count": wall.count,
+                    "samples": len(wall.recent),
+                    "p50": wall.quantile(0.5),
+                    "p95": wall.quantile(0.95),
+                    "max": max(wall.recent, default=0.0),
+                    "cpu_p50": cpu.quantile(0.5),
+                    "bytes_p50": sent.quantile(0.5),
+                    "bytes_max": max(sent.recent, default=0),
+                }
+                for name, (wall, cpu, sent) in self._spans.items()
+            }
+
+    def window_histogram(self, name):
+        """``(upper_bound_seconds, count)`` of the rolling window of wall times for one span."""
+        with self._lock:
+            hists = self._spans.get(name)
+            recent = list(hists[0].recent) if hists else []
+        counts = [0] * (len(TIME_BUCKETS) + 1)
+        for value in recent:
+            counts[bisect.bisect_left(TIME_BUCKETS, value)] += 1
+        return list(zip(TIME_BUCKETS + (float("inf"),), counts))
+
+    def prometheus(self):
+        """All spans in the Prometheus text exposition format."""
+        with self._lock:
+            spans = sorted(self._spans.items())
+            lines = []
+            for metric, index, help_text in (
+                ("avellon_render_seconds", 0, "Wall time of instrumented render spans."),
+                ("avellon_render_cpu_seconds", 1, "Script-thread CPU time of instrumented render spans."),
+                ("avellon_render_payload_bytes", 2, "Bytes sent to the browser during render spans."),
+            ):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for name, hists in spans:
+                    hist = hists[index]
+                    label = name.replace("\\", "\\\\").replace('"', '\\"')
+                    cumulative = 0
+                    for bound, count in zip(hist.bounds + (float("inf"),), hist.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(float(bound))
+                        lines.append(f'{metric}_bucket{{span="{label}",le="{le}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{span="{label}"}} {hist.sum!r}')
+                    lines.append(f'{metric}_count{{span="{label}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=None):
+        """Write the Prometheus text to ``path`` (default ``export_path``) atomically."""
+        path = path or self.export_path
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(self.prometheus())
+        os.replace(tmp, path)
+        return path
+
+    def maybe_export(self):
+        if not self.export_path:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_export < EXPORT_INTERVAL:
+                return
+            self._last_export = now
+        self.export()
+
+
+# The one instance per process.
+profiler = Profiler(
+    enabled=os.environ.get("AVELLON_PROFILE", "").lower() not in ("", "0", "false", "no"),
+    export_path=os.environ.get("AVELLON_PROFILE_EXPORT") or None,
+)
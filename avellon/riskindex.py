@@ -0,0 +1,202 @@
+"""Incrementally maintained Global Risk Index.
+
+The index blends two running aggregates, neither of which is ever recomputed
+from scratch:
+
+* asset exposure -- the confidence-weighted mean risk score of the monitored
+  assets, kept as two running sums, plus per-level counters and a sorted
+  ``(score, asset)`` list for the watchlist;
+* event pressure -- an exponentially decaying sum of event weights (severity
+  times confidence), stored as one value and the time it was last rebased.
+
+Every asset change or event is O(1), apart from an O(log n) bisect into the
+sorted list (plus a memmove). Point-in-time snapshots are appended on read at
+most every ``SNAPSHOT_INTERVAL`` seconds, so the War Room delta is a bisect
+into the snapshot list.
+"""
+import bisect
+import math
+import threading
+import time
+
+from avellon.events import SEVERITIES, SEVERITY_CODE
+
+# Score of an asset at each risk level (LOW..CRITICAL).
+LEVEL_SCORE = (25.0, 50.0, 75.0, 100.0)
+# Contribution of one event at each severity, before confidence weighting.
+EVENT_WEIGHT = (0.25, 1.0, 3.0, 8.0)
+EVENT_HALF_LIFE = 6 * 3600
+# Decayed pressure at which the event component reaches ~63% of its range.
+PRESSURE_SCALE = 25.0
+ASSET_SHARE = 0.7
+WATCHLIST_LEVEL = SEVERITY_CODE["MEDIUM"]
+SNAPSHOT_INTERVAL = 300
+SNAPSHOT_RETENTION = 7 * 86400
+DELTA_WINDOW = 86400
+
+
+class RiskIndex:
+    """Global index, critical count and watchlist under incremental updates."""
+
+    def __init__(self, half_life=EVENT_HALF_LIFE):
+        self._lock = threading.Lock()
+        self._decay = math.log(2) / half_life
+        self._assets = {}
+        self._sorted = []
+        self._weight = 0.0
+        self._weighted_score = 0.0
+        self._levels = [0] * len(SEVERITIES)
+        self._pressure = 0.0
+        self._pressure_ts = 0.0
+        self._snap_ts = []
+        self._snap_values = []
+        self.events = 0
+        self.updates = 0
+
+    # -- updates --------------------------------------------------------------
+    def update_asset(self, key, risk, conf):
+        """Set one asset's risk level and confidence; a no-op when unchanged."""
+        level = SEVERITY_CODE[risk] if isinstance(risk, str) else int(risk)
+        weight = max(float(conf), 1.0) / 100.0
+        with self._lock:
+            current = self._assets.get(key)
+            if current == (level, weight):
+                return False
+            if current is not None:
+                self._remove(key, *current)
+            self._assets[key] = (level, weight)
+            self._weight += weight
+            self._weighted_score += weight * LEVEL_SCORE[level]
+            self._levels[level] += 1
+            bisect.insort(self._sorted, (LEVEL_SCORE[level], key))
+            self.updates += 1
+        return True
+
+    def remove_asset(self, key):
+        with self._lock:
+            current = self._assets.pop(key, None)
+            if current is not None:
+                self._remove(key, *current)
+
+    def _remove(self, key, level, weight):
+        self._weight -= weight
+        self._weighted_score -= weight * LEVEL_SCORE[level]
+        self._levels[level] -= 1
+        i = bisect.bisect_left(self._sorted, (LEVEL_SCORE[level], key))
+        del self._sorted[i]
+
+    def update_assets(self, assets):
+        """Apply ``{name, risk, conf}`` records; returns how many changed."""
+        return sum(self.update_asset(a["name"], a["risk"], a["conf"]) for a in assets)
+
+    def add_event(self, severity, conf, ts=None):
+        now = time.time()
+        ts = min(now, ts if ts is not None else now)
+        level = SEVERITY_CODE.get(severity, 0) if isinstance(severity, str) else int(severity)
+        weight = EVENT_WEIGHT[level] * max(float(conf), 0.0) / 100.0
+        with self._lock:
+            # Pressure is stored as of _pressure_ts; late events are decayed to it,
+            # newer ones move the reference forward.
+            if ts <= self._pressure_ts:
+                self._pressure += weight * math.exp(-self._decay * (self._pressure_ts - ts))
+            else:
+                self._pressure = self._pressure * math.exp(-self._decay * (ts - self._pressure_ts)) + weight
+                self._pressure_ts = ts
+            self.events += 1
+
+    def add_events(self, items):
+        """Ingestion stage: fold newly stored items into the event pressure."""
+        for item in items:
+            self.add_event(item.get("severity"), item.get("conf", 0), item.get("ts"))
+        return items
+
+    # -- reads ----------------------------------------------------------------
+    def pressure(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._pressure * math.exp(-self._decay * max(0.0, now - self._pressure_ts))
+
+    def value(self, now=None):
+        """Global Risk Index on a 0-100 scale."""
+        with self._lock:
+            exposure = self._weighted_score / self._weight if self._weight > 0 else 0.0
+        events = 100.0 * (1.0 - math.exp(-self.pressure(now) / PRESSURE_SCALE))
+        return ASSET_SHARE * exposure + (1.0 - ASSET_SHARE) * events
+
+    def critical_count(self):
+        return self._levels[SEVERITY_CODE["CRITICAL"]]
+
+    def watchlist_size(self):
+        with self._lock:
+            return len(self._sorted) - bisect.bisect_left(self._sorted, (LEVEL_SCORE[WATCHLIST_LEVEL],))
+
+    def watchlist(self, k=None):
+        """Watchlisted asset keys, highest risk first."""
+        with self._lock:
+            start = bisect.bisect_left(self._sorted, (LEVEL_SCORE[WATCHLIST_LEVEL],))
+            keys = [key for _, key in reversed(self._sorted[start:])]
+        return keys if k is None else keys[:k]
+
+    def snapshot(self, now=None):
+        """Current readings; recorded into the history at most every SNAPSHOT_INTERVAL."""
+        now = time.time() if now is None else now
+        current = {"ts": now, "global_index": self.value(now), "critical": self.critical_count(), "watchlist": self.watchlist_size()}
+        with self._lock:
+            if not self._snap_ts or now - self._snap_ts[-1] >= SNAPSHOT_INTERVAL:
+                self._snap_ts.append(now)
+                self._snap_values.append(current)
+                expired = bisect.bisect_left(self._snap_ts, now - SNAPSHOT_RETENTION)
+                if expired:
+                    del self._snap_ts[:expired], self._snap_values[:expired]
+        return current
+
+    def at(self, ts):
+        """Latest snapshot taken at or before ``ts``, or None if none is that old."""
+        with self._lock:
+            i = bisect.bisect_right(self._snap_ts, ts) - 1
+            return self._snap_values[i] if i >= 0 else None
+
+    def delta(self, window=DELTA_WINDOW, now=None):
+        """Percent change of the index against the snapshot ``window`` seconds ago.
+
+        None until the history reaches back ``window`` seconds: a change measured
+        against a younger baseline (such as process start) would be mislabelled.
+        """
+        current = self.snapshot(now)
+        past = self.at(current["ts"] - window)
+        if past is None:
+            return current, None
+        if past["global_index"] <= 0:
+            return current, 0.0
+        return current, 100.0 * (current["global_index"] - past["global_index"]) / past["global_index"]
+
+    def history(self):
+        with self._lock:
+            return list(self._snap_values)
+
+    # -- snapshots ------------------------------------------------------------
+    def dump_state(self):
+        with self._lock:
+            return {
+                "assets": [[key, level, weight] for key, (level, weight) in self._assets.items()],
+                "pressure": self._pressure,
+                "pressure_ts": self._pressure_ts,
+                "history": list(self._snap_values),
+                "events": self.events,
+                "updates": self.updates,
+            }
+
+    def load_state(self, state):
+        """Restore a ``dump_state``; the running sums are rebuilt from the assets."""
+        with self._lock:
+            self._assets, self._sorted, self._levels = {}, [], [0] * len(SEVERITIES)
+            self._weight = self._weighted_score = 0.0
+        for key, level, weight in state["assets"]:
+            self.update_asset(key, level, weight * 100.0)
+        with self._lock:
+            self._pressure = state["pressure"]
+            self._pressure_ts = state["pressure_ts"]
+            self._snap_values = list(state["history"])
+            self._snap_ts = [snap["ts"] for snap in self._snap_values]
+            self.events = state["events"]
+            self.updates = state["updates"]
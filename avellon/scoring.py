@@ -0,0 +1,150 @@
+"""Severity and confidence scoring for incoming intel items.
+
+Items are scored from their title and summary with TextBlob sentiment plus a
+category/keyword prior. Scores are cached by content hash in a process-wide
+LRU, so a story re-sent on a later poll, or read by another session, is never
+scored twice; the cache is carried across restarts in backend snapshots.
+Throughput and cache hit rate are tracked for capacity sizing.
+"""
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+
+import numpy as np
+from textblob import TextBlob
+
+from avellon.events import SEVERITIES, SEVERITY_CODE
+from avellon.snapshot import PackedStrings
+
+DEFAULT_CACHE_SIZE = 50_000
+DEFAULT_BATCH_SIZE = 256
+
+CATEGORY_PRIOR = {
+    "Conflict": 0.60, "Cyber": 0.50, "Weather": 0.45, "Labor": 0.35,
+    "Regulatory": 0.30, "Logistics": 0.30, "General": 0.15,
+}
+ESCALATION_TERMS = (
+    "killed", "explosion", "closure", "closed", "seized", "attack", "emergency",
+    "halt", "blockade", "collapse", "evacuat", "missile", "sanctioned",
+)
+# Lower bound of the composite score for each severity band, highest first.
+SEVERITY_BANDS = (("CRITICAL", 0.75), ("HIGH", 0.55), ("MEDIUM", 0.35), ("LOW", 0.0))
+
+
+def _text(item):
+    return f"{item.get('title', '')}. {item.get('summary', '')}"
+
+
+def _key(item):
+    digest = item.get("hash")
+    if digest:
+        return digest
+    return hashlib.sha1(f"{item.get('title', '')}\x1f{item.get('summary', '')}".encode("utf-8")).hexdigest()
+
+
+def score_text(text, category="General"):
+    """Return ``(severity, conf)`` for one piece of text."""
+    sentiment = TextBlob(text).sentiment
+    lowered = text.lower()
+    hits = sum(1 for term in ESCALATION_TERMS if term in lowered)
+    score = CATEGORY_PRIOR.get(category, CATEGORY_PRIOR["General"])
+    score += min(0.3, 0.12 * hits)
+    score += max(0.0, -sentiment.polarity) * 0.3
+    severity = next(name for name, floor in SEVERITY_BANDS if score >= floor)
+
+    # Objective, longer reports earn more confidence than short opinion pieces.
+    words = len(text.split())
+    conf = 55 + 35 * (1.0 - sentiment.subjectivity) + 10 * min(1.0, words / 40.0)
+    return severity, int(min(99, round(conf)))
+
+
+class SeverityScorer:
+    """LRU-memoized scoring stage.
+
+    TextBlob still scores each uncached item on its own: the speedup comes
+    from the content-hash cache alone. Chunking only bounds how long the
+    cache lock is held, since each chunk is looked up and filled under one
+    lock acquisition and scored outside it.
+    """
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE, batch_size=DEFAULT_BATCH_SIZE):
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._items = 0
+        self._hits = 0
+        self._scored = 0
+        self._busy_seconds = 0.0
+        self._score_seconds = 0.0
+
+    def score_batch(self, items):
+        """Assign ``severity`` and ``conf`` to every item in place, ``batch_size`` items at a time."""
+        for start in range(0, len(items), self.batch_size):
+            self._score_chunk(items[start:start + self.batch_size])
+        return items
+
+    def _score_chunk(self, chunk):
+        started = time.perf_counter()
+        keys = [_key(item) for item in chunk]
+        misses = []
+        with self._lock:
+            for item, key in zip(chunk, keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    misses.append((item, key))
+                else:
+                    self._cache.move_to_end(key)
+                    item["severity"], item["conf"] = cached
+
+        # Score outside the lock; duplicates within the chunk are scored once.
+        scoring = time.perf_counter()
+        fresh = {}
+        for item, key in misses:
+            if key not in fresh:
+                fresh[key] = score_text(_text(item), item.get("cat", "General"))
+            item["severity"], item["conf"] = fresh[key]
+        scoring = time.perf_counter() - scoring
+
+        with self._lock:
+            for key, result in fresh.items():
+                self._cache[key] = result
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self._items += len(chunk)
+            self._hits += len(chunk) - len(fresh)
+            self._scored += len(fresh)
+            self._busy_seconds += time.perf_counter() - started
+            self._score_seconds += scoring
+
+    def stats(self):
+        with self._lock:
+            return {
+                "items": self._items,
+                "scored": self._scored,
+                "cache_size": len(self._cache),
+                "hit_rate": self._hits / self._items if self._items else 0.0,
+                # Cache hits cost next to nothing, so throughput counts only the items actually scored.
+                "scored_per_sec": self._scored / self._score_seconds if self._score_seconds else 0.0,
+                "items_per_sec": self._items / self._busy_seconds if self._busy_seconds else 0.0,
+            }
+
+    def dump_state(self):
+        with self._lock:
+            keys = list(self._cache)
+            results = list(self._cache.values())
+        return {
+            "keys": PackedStrings.pack(keys),
+            "severity": np.array([SEVERITY_CODE[sev] for sev, _ in results], dtype=np.int8),
+            "conf": np.array([conf for _, conf in results], dtype=np.int16),
+        }
+
+    def load_state(self, state):
+        keys = list(state["keys"])[-self.cache_size:]
+        n = len(keys)
+        severity = state["severity"][len(state["severity"]) - n:].tolist()
+        conf = state["conf"][len(state["conf"]) - n:].tolist()
+        with self._lock:
+            self._cache = OrderedDict(zip(keys, ((SEVERITIES[s], c) for s, c in zip(severity, conf))))
@@ -0,0 +1,511 @@
+"""Sanctions screening: fuzzy name matching against locally loaded lists.
+
+Every list is one CSV file (``id,name[,aliases,program]``, aliases separated
+by ``|``) in the sanctions directory. Names are normalized -- accents
+stripped, Cyrillic and Greek transliterated, case-folded, punctuation and
+legal-form words (LLC, GmbH, OOO ...) dropped -- and broken into word-padded
+character trigrams, each packed into one int64. Every alias is its own row.
+
+The index is a tuple of immutable segments. A segment numbers its rows by
+gram count and stores each gram's postings in row order, with an offset
+table by gram and row length, so the postings of a gram for rows of a given
+length range are one contiguous slice. Loading or replacing a list builds
+one new segment from that list alone and tombstones the list's rows in the
+older segments; once there are more than ``MAX_SEGMENTS``, the live rows
+are merged into one segment from their postings, without re-reading any
+file. Readers take the current tuple and never lock. Backend snapshots hold
+the segment arrays and list columns as they are, so a restart maps the index
+back in and only rebuilds the lists whose file changed meanwhile.
+
+A name matches a row when the Dice coefficient of their trigram sets reaches
+the threshold, which bounds the row lengths worth looking at and the overlap
+each length needs. That length window is split into ``LENGTH_BANDS`` bands.
+In each, a row may miss at most ``k`` of the query's grams, so it holds at
+least ``PROBE_EXTRA + 1`` of the query's ``k + 1 + PROBE_EXTRA`` rarest:
+only those postings are read and merged into candidates. Each remaining,
+more common gram is then looked up for the surviving candidates only,
+dropping any that have used up their allowance of misses, and the
+survivors' scores follow from what is left of it. Matching is exact; no
+pair above the threshold is lost.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from avellon.config import data_path
+from avellon.snapshot import PackedStrings
+
+DEFAULT_LISTS_DIR = data_path("sanctions")
+DEFAULT_THRESHOLD = 0.75
+MAX_HITS = 5
+MAX_SEGMENTS = 8
+NAMES_PER_CHUNK = 2_000
+# Distinct names per batch below which a process pool costs more than it saves.
+POOL_MIN_NAMES = 50_000
+# Query-time tuning; see benchmarks/bench_screening.py.
+LENGTH_BANDS = 3
+PROBE_EXTRA = 1
+
+# Company-form and filler words; dropped unless nothing else is left.
+LEGAL_FORMS = frozenset("""
+    ab ag as bhd bv co company corp corporation cv gmbh inc incorporated jsc kg
+    limited llc llp lp ltd nv oao ojsc ooo pao pjsc plc pte pty sa sarl sas spa
+    srl zao fze fzco fzc the and of
+""".split())
+
+# Letters NFKD does not reduce to ASCII, plus Cyrillic and Greek (simplified BGN/PCGN).
+_TRANSLIT = str.maketrans({
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "đ": "d", "ð": "d", "þ": "th", "ł": "l", "ı": "i", "ŀ": "l",
+    "'": "", "’": "", "`": "",
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh", "з": "z", "и": "i", "й": "y",
+    "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "",
+    "э": "e", "ю": "yu", "я": "ya", "і": "i", "ї": "yi", "є": "ye", "ґ": "g",
+    "ђ": "dj", "ј": "j", "љ": "lj", "њ": "nj", "ћ": "c", "џ": "dz",
+    "α": "a", "β": "v", "γ": "g", "δ": "d", "ε": "e", "ζ": "z", "η": "i", "θ": "th", "ι": "i", "κ": "k",
+    "λ": "l", "μ": "m", "ν": "n", "ξ": "x", "ο": "o", "π": "p", "ρ": "r", "σ": "s", "ς": "s", "τ": "t",
+    "υ": "y", "φ": "f", "χ": "ch", "ψ": "ps", "ω": "o",
+})
+_WORD = re.compile(r"[^\W_]+")
+
+# Index state in pool workers, set by _init_worker.
+_index_state = None
+
+
+def load_lists_path():
+    """Sanctions directory from ``AVELLON_SANCTIONS_DIR``, else the bundled sample."""
+    return os.environ.get("AVELLON_SANCTIONS_DIR") or DEFAULT_LISTS_DIR
+
+
+def normalize(name):
+    """Space-joined comparison tokens of ``name``."""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold().translate(_TRANSLIT)
+    tokens = _WORD.findall(text)
+    kept = [t for t in tokens if t not in LEGAL_FORMS]
+    return " ".join(kept or tokens)
+
+
+def grams(normalized):
+    """Distinct word-padded trigrams of a normalized name, packed 21 bits per character."""
+    packed = set()
+    for token in normalized.split():
+        padded = f" {token} "
+        codes = [ord(ch) for ch in padded]
+        for i in range(len(codes) - 2):
+            packed.add((codes[i] << 42) | (codes[i + 1] << 21) | codes[i + 2])
+    return np.fromiter(packed, dtype=np.int64, count=len(packed))
+
+
+SEGMENT_ARRAYS = ("size", "codes", "refs", "alive", "size_start", "grams", "rows", "offsets")
+
+
+class _Segment:
+    """Inverted trigram index over a batch of rows; only ``alive`` ever changes, by copy.
+
+    Rows are numbered shortest first, so the rows of any length range are one
+    id range. ``rows`` holds every gram's postings (row ids, ascending) end
+    to end, and ``offsets[gram * width + length]`` is where the postings of
+    ``gram`` on rows of at least ``length`` grams begin: the postings of any
+    set of query grams within any length bounds are one fancy-index away.
+    """
+
+    def __init__(self, size, packed, codes, refs):
+        # ``packed``: each row's distinct grams, rows concatenated in input order.
+        order = np.argsort(size, kind="stable")
+        packed = packed[_row_ranges(size, order)]
+        self.size = size[order].astype(np.int32)
+        self.codes = codes[order]
+        self.refs = refs[order]
+        self.alive = np.ones(len(order), dtype=bool)
+        self.size_start = np.searchsorted(self.size, np.arange(int(self.size.max(initial=0)) + 2))
+        self.width = len(self.size_start) - 1
+        self.grams, inverse = np.unique(packed, return_inverse=True)
+        n = max(len(order), 1)
+        keys = np.sort(inverse * n + np.repeat(np.arange(len(order), dtype=np.int64), self.size))
+        self.rows = (keys % n).astype(np.int32)
+        counts = np.bincount(keys // n * self.width + self.size[self.rows], minlength=len(self.grams) * self.width)
+        self.offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+
+    @classmethod
+    def build(cls, arrays, codes, refs):
+        size = np.fromiter(map(len, arrays), dtype=np.int64, count=len(arrays))
+        return cls(size, np.concatenate(arrays), np.asarray(codes, dtype=np.int32), np.asarray(refs, dtype=np.int32))
+
+    @classmethod
+    def merge(cls, segments):
+        """One segment holding the live rows of ``segments``."""
+        parts = []
+        for seg in segments:
+            gram = np.repeat(np.arange(len(seg.grams)), np.diff(seg.offsets[::seg.width]))
+            live = seg.alive[seg.rows]
+            by_row = np.argsort(seg.rows[live])
+            packed = seg.grams[gram[live][by_row]]
+            parts.append((seg.size[seg.alive], packed, seg.codes[seg.alive], seg.refs[seg.alive]))
+        return cls(*(np.concatenate(column) for column in zip(*parts)))
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def without(self, code):
+        """A copy with the rows of list ``code`` tombstoned (``self`` if it has none live)."""
+        dead = self.alive & (self.codes == code)
+        if not dead.any():
+            return self
+        seg = object.__new__(_Segment)
+        seg.__dict__.update(self.__dict__)
+        seg.alive = self.alive & ~dead
+        return seg
+
+    def nbytes(self):
+        return sum(a.nbytes for a in self.arrays().values())
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in SEGMENT_ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        seg = object.__new__(cls)
+        seg.__dict__.update(arrays)
+        seg.width = len(seg.size_start) - 1
+        return seg
+
+    def match(self, query, threshold):
+        """Rows scoring at least ``threshold`` against the gram array ``query``, with their scores."""
+        n = len(query)
+        pos = np.searchsorted(self.grams, query)
+        found = pos < len(self.grams)
+        found[found] = self.grams[pos[found]] == query[found]
+        pos = pos[found]
+        lo = math.ceil(threshold * n / (2 - threshold) - 1e-9)
+        hi = min(math.floor((2 - threshold) * n / threshold + 1e-9), self.width - 1)
+        # Dice >= t  <=>  2 * overlap >= t * (n + length): the overlap a row of each length needs.
+        need_at = np.ceil(threshold * (n + np.arange(hi + 2)) / 2 - 1e-9).astype(np.int64)
+        if lo > hi or len(pos) < need_at[lo]:
+            return None
+        # Length bands: longer rows need more overlap, so their bands probe fewer grams.
+        lengths = sorted({lo + (hi + 1 - lo) * k // LENGTH_BANDS for k in range(LENGTH_BANDS + 1)})
+        bounds = self.offsets[pos[:, None] * self.width + np.array(lengths)]
+        found_rows, found_slack = [], []
+        for band in range(len(lengths) - 1):
+            need = int(need_at[lengths[band]])
+            if len(pos) < need:
+                continue
+            starts, ends = bounds[:, band], bounds[:, band + 1]
+            order = np.argsort(ends - starts, kind="stable").tolist()
+            starts, ends = starts.tolist(), ends.tolist()
+            # A row can miss at most len(pos) - need of the query's grams, so it holds at least
+            # ``hits`` of the rarest len(pos) - need + 1 + PROBE_EXTRA.
+            probes = min(len(pos), len(pos) - need + 1 + PROBE_EXTRA)
+            hits = probes - (len(pos) - need)
+            cand = np.concatenate([self.rows[starts[i]:ends[i]] for i in order[:probes]])
+            cand.sort()
+            if hits > 1:
+                # Sorted, so a row with at least ``hits`` postings repeats ``hits - 1`` places on.
+                cand = cand[:1 - hits][cand[hits - 1:] == cand[:1 - hits]]
+            if not len(cand):
+                continue
+            first = np.flatnonzero(np.concatenate(([True], cand[1:] != cand[:-1])))
+            counts = np.diff(np.append(first, len(cand))) + (hits - 1)
+            cand = cand[first]
+            common = order[probes:]
+            # Grams a candidate may still miss before its overlap drops below what its length needs.
+            slack = counts + len(common) - need_at[self.size[cand]]
+            keep = (slack >= 0) & self.alive[cand]
+            cand, slack = cand[keep], slack[keep]
+            for i in common:
+                if not len(cand):
+                    break
+                a, b = starts[i], ends[i]
+                if a == b:
+                    slack -= 1
+                else:
+                    postings = self.rows[a:b]
+                    slack -= postings[postings.searchsorted(cand, "right") - 1] != cand
+                keep = slack >= 0
+                if not keep.all():
+                    cand, slack = cand[keep], slack[keep]
+            if len(cand):
+                found_rows.append(cand)
+                found_slack.append(slack)
+        if not found_rows:
+            return None
+        # A survivor's overlap is exactly what its length needs plus its slack.
+        cand, slack = np.concatenate(found_rows), np.concatenate(found_slack)
+        size = self.size[cand]
+        return cand, 2.0 * (need_at[size] + slack) / (n + size)
+
+
+def _row_ranges(size, order):
+    # Flat indices of rows ``order`` in an array of rows of ``size`` elements laid end to end.
+    start = np.zeros(len(size), dtype=np.int64)
+    np.cumsum(size[:-1], out=start[1:])
+    counts = size[order]
+    return np.repeat(start[order] - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+
+
+class _List:
+    """One loaded sanctions list: entries, plus the name text of each of its index rows."""
+
+    __slots__ = ("name", "path", "fingerprint", "ids", "names", "programs", "row_entry", "row_name", "loaded")
+
+    def __init__(self, name, path, fingerprint):
+        self.name = name
+        self.path = path
+        self.fingerprint = fingerprint
+        self.ids, self.names, self.programs = [], [], []
+        self.row_entry, self.row_name = [], []
+        self.loaded = time.time()
+
+
+class ScreeningIndex:
+    """Segmented trigram index over every loaded list; a changed list rebuilds on its own."""
+
+    def __init__(self, path=None, threshold=DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.version = 0
+        # (segments, lists by code), swapped whole so readers never see a half-applied change.
+        self._state = ((), {})
+        self._codes = {}
+        self._lock = threading.Lock()
+        self._stats = {"builds": 0, "rows_built": 0, "merges": 0, "build_seconds": 0.0}
+
+    @classmethod
+    def load(cls, path=None, threshold=DEFAULT_THRESHOLD):
+        """Index every list under ``path`` (default ``load_lists_path()``) into one segment."""
+        index = cls(path or load_lists_path(), threshold)
+        index.sync()
+        index.compact()
+        return index
+
+    # -- lists ------------------------------------------------------------------
+    def sync(self, path=None):
+        """Rebuild the lists whose ``*.csv`` file is new or changed; drop those whose file is gone.
+
+        A file is unchanged while its size and mtime are. Returns the names of
+        the lists that were rebuilt or dropped.
+        """
+        path = path or self.path
+        files = {}
+        if path and os.path.isdir(path):
+            for fname in sorted(os.listdir(path)):
+                if fname.endswith(".csv"):
+                    full = os.path.join(path, fname)
+                    st = os.stat(full)
+                    files[fname[:-4]] = (full, (st.st_mtime_ns, st.st_size))
+        current = {lst.name: lst for lst in self._state[1].values()}
+        changed = []
+        for name, (full, fingerprint) in files.items():
+            lst = current.get(name)
+            if lst is None or lst.fingerprint != fingerprint:
+                self.load_list(name, full, fingerprint, merge=False)
+                changed.append(name)
+        for name, lst in current.items():
+            if lst.path is not None and name not in files:
+                self.remove_list(name)
+                changed.append(name)
+        self._merge_if_needed()
+        return changed
+
+    def load_list(self, name, path, fingerprint=None, merge=True):
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            entries = list(csv.DictReader(fh))
+        return self.add_list(name, entries, path=path, fingerprint=fingerprint, merge=merge)
+
+    def add_list(self, name, entries, path=None, fingerprint=None, merge=True):
+        """Replace list ``name`` with ``entries`` and return its entry count.
+
+        Entries are dicts with ``name`` and optionally ``id``, ``aliases``
+        (``|``-separated or a list) and ``program``. Only this list is indexed;
+        other lists keep their segments. With ``merge=False`` the segment count
+        is left for the caller to bring down (``sync`` does, once per pass).
+        """
+        started = time.perf_counter()
+        lst = _List(name, path, fingerprint)
+        arrays = []
+        for entry in entries:
+            primary = (entry.get("name") or "").strip()
+            if not primary:
+                continue
+            k = len(lst.names)
+            lst.ids.append((entry.get("id") or "").strip() or f"{name}-{k + 1}")
+            lst.names.append(primary)
+            lst.programs.append((entry.get("program") or "").strip())
+            aliases = entry.get("aliases") or ()
+            if isinstance(aliases, str):
+                aliases = aliases.split("|")
+            for text in dict.fromkeys([primary] + [a.strip() for a in aliases if a.strip()]):
+                row = grams(normalize(text))
+                if len(row):
+                    arrays.append(row)
+                    lst.row_entry.append(k)
+                    lst.row_name.append(text)
+        with self._lock:
+            code = self._codes.setdefault(name, len(self._codes))
+            segment = _Segment.build(arrays, [code] * len(arrays), range(len(arrays)))
+            segments, lists = self._state
+            segments = tuple(s for s in (seg.without(code) for seg in segments) if len(s)) + ((segment,) if arrays else ())
+            self._state = (segments, {**lists, code: lst})
+            self.version += 1
+            self._stats["builds"] += 1
+            self._stats["rows_built"] += len(arrays)
+            self._stats["build_seconds"] += time.perf_counter() - started
+        if merge:
+            self._merge_if_needed()
+        return len(lst.names)
+
+    def remove_list(self, name):
+        with self._lock:
+            code = self._codes.get(name)
+            segments, lists = self._state
+            if code not in lists:
+                return False
+            segments = tuple(s for s in (seg.without(code) for seg in segments) if len(s))
+            self._state = (segments, {c: lst for c, lst in lists.items() if c != code})
+            self.version += 1
+        return True
+
+    def compact(self, max_segments=1):
+        """Merge every segment into one once there are more than ``max_segments``."""
+        with self._lock:
+            segments, lists = self._state
+            if len(segments) > max_segments:
+                self._state = ((_Segment.merge(segments),), lists)
+                self._stats["merges"] += 1
+
+    def _merge_if_needed(self):
+        self.compact(MAX_SEGMENTS)
+
+    # -- snapshots --------------------------------------------------------------
+    def dump_state(self):
+        segments, lists = self._state
+        with self._lock:
+            stats, codes = dict(self._stats), dict(self._codes)
+        return {
+            "codes": codes,
+            "segments": [seg.arrays() for seg in segments],
+            "lists": [
+                {"code": code, "name": lst.name, "path": lst.path, "fingerprint": lst.fingerprint,
+                 "loaded": lst.loaded, "ids": PackedStrings.pack(lst.ids), "names": PackedStrings.pack(lst.names),
+                 "programs": PackedStrings.pack(lst.programs), "row_name": PackedStrings.pack(lst.row_name),
+                 "row_entry": np.asarray(lst.row_entry, dtype=np.int32)}
+                for code, lst in lists.items()
+            ],
+            "stats": stats,
+        }
+
+    def load_state(self, state):
+        """Restore a ``dump_state``; call ``sync`` afterwards to pick up list files changed since."""
+        lists = {}
+        for d in state["lists"]:
+            lst = lists[d["code"]] = _List(d["name"], d["path"], d["fingerprint"] and tuple(d["fingerprint"]))
+            lst.loaded = d["loaded"]
+            lst.ids, lst.names, lst.programs = d["ids"], d["names"], d["programs"]
+            lst.row_entry, lst.row_name = d["row_entry"], d["row_name"]
+        segments = tuple(_Segment.from_arrays(arrays) for arrays in state["segments"])
+        with self._lock:
+            # Codes of dropped lists stay taken, as in ``add_list``.
+            self._codes = dict(state["codes"])
+            self._state = (segments, lists)
+            self._stats.update(state["stats"])
+            self.version += 1
+
+    # -- screening --------------------------------------------------------------
+    def screen(self, name, threshold=None, limit=MAX_HITS):
+        """Best-matching listed entries for ``name``, highest score first.
+
+        Each hit is a dict with the entry's ``list``, ``id``, ``name`` and
+        ``program``, the listed name or alias that ``matched`` and the Dice
+        ``score``; an entry appears once, under its best alias.
+        """
+        return _screen(grams(normalize(name)), threshold or self.threshold, limit, self._state)
+
+    def screen_many(self, names, threshold=None, limit=MAX_HITS, workers=None):
+        """Screen a batch; returns ``{position: hits}`` for every name with a hit.
+
+        Names that normalize alike are screened once, and the whole batch sees
+        one version of the index even if a list is rebuilt meanwhile.
+        ``workers`` > 1 spreads the distinct names over a process pool; by
+        default a pool is used only for batches of ``POOL_MIN_NAMES`` or more.
+        """
+        threshold = threshold or self.threshold
+        state = self._state
+        keys = [normalize(name) for name in names]
+        distinct = list(dict.fromkeys(keys))
+        if workers is None:
+            workers = os.cpu_count() or 1 if len(distinct) >= POOL_MIN_NAMES else 1
+        if workers > 1 and len(distinct) > NAMES_PER_CHUNK:
+            chunks = [distinct[i:i + NAMES_PER_CHUNK] for i in range(0, len(distinct), NAMES_PER_CHUNK)]
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(state,)) as pool:
+                parts = pool.map(_screen_chunk, chunks, [threshold] * len(chunks), [limit] * len(chunks))
+                results = [hits for part in parts for hits in part]
+        else:
+            results = [_screen(grams(key), threshold, limit, state) for key in distinct]
+        found = dict(zip(distinct, results))
+        return {i: found[key] for i, key in enumerate(keys) if found[key]}
+
+    # -- reads ------------------------------------------------------------------
+    def lists(self):
+        """Loaded lists with their entry and row counts, by name."""
+        return [
+            {"list": lst.name, "entries": len(lst.names), "rows": len(lst.row_name), "path": lst.path,
+             "loaded": lst.loaded}
+            for lst in sorted(self._state[1].values(), key=lambda lst: lst.name)
+        ]
+
+    def __len__(self):
+        return sum(len(lst.names) for lst in self._state[1].values())
+
+    def stats(self):
+        segments, lists = self._state
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(
+            lists=len(lists), entries=sum(len(lst.names) for lst in lists.values()),
+            rows=sum(len(seg) for seg in segments), segments=len(segments),
+            grams=sum(len(seg.grams) for seg in segments), index_bytes=sum(seg.nbytes() for seg in segments),
+        )
+        return stats
+
+
+def _screen(query, threshold, limit, state):
+    if not len(query):
+        return []
+    segments, lists = state
+    best = {}
+    for seg in segments:
+        found = seg.match(query, threshold)
+        if found is None:
+            continue
+        for row, score in zip(found[0].tolist(), found[1].tolist()):
+            code, ref = int(seg.codes[row]), int(seg.refs[row])
+            lst = lists[code]
+            key = (code, lst.row_entry[ref])
+            if score > best.get(key, (0.0,))[0]:
+                best[key] = (score, lst, ref)
+    hits = []
+    for (_, k), (score, lst, ref) in sorted(best.items(), key=lambda kv: -kv[1][0])[:limit]:
+        hits.append({
+            "list": lst.name, "id": lst.ids[k], "name": lst.names[k], "program": lst.programs[k],
+            "matched": lst.row_name[ref], "score": round(score, 3),
+        })
+    return hits
+
+
+def _init_worker(state):
+    global _index_state
+    _index_state = state
+
+
+def _screen_chunk(keys, threshold, limit):
+    """Screen already-normalized names against the worker's index state."""
+    return [_screen(grams(key), threshold, limit, _index_state) for key in keys]
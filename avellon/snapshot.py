@@ -0,0 +1,260 @@
+"""Warm-start snapshots of the backend's in-memory state.
+
+Every stateful engine (event store, risk index, score cache, story
+clusterer, risk history, feed validators, screening index) can
+``dump_state()`` to a tree of dicts, lists, scalars, NumPy arrays and
+``PackedStrings``, and ``load_state()`` it back. A ``Snapshotter`` thread
+writes the state of every attached engine every ``interval`` seconds, and
+restores an engine from the latest snapshot when it is attached -- so each
+one is restored only when the process first uses it.
+
+A snapshot is one generation directory under the state directory: every
+array end to end in ``arrays.bin`` (64-byte aligned) and the rest of the
+tree in ``manifest.json``, with arrays replaced by their offset, dtype and
+shape. ``CURRENT`` names the live generation and is swapped atomically, so
+a reader never sees a half-written snapshot. Loading maps ``arrays.bin``
+copy-on-write: arrays are views into the page cache until an engine writes
+to them, and strings are decoded only when read. Engines catch up from
+where the snapshot left off through their usual incremental paths (feed
+validators, dedupe keys, per-list fingerprints).
+"""
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from avellon.config import state_path
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DIR = "snapshot"
+DEFAULT_INTERVAL = 300
+# Bumped whenever an engine's state layout changes; older snapshots are ignored.
+FORMAT = 2
+ALIGN = 64
+
+
+class PackedStrings:
+    """Read-only sequence of strings held as one UTF-8 buffer plus offsets.
+
+    Items are decoded on access, so a snapshot's text columns can stay
+    memory-mapped until they are read.
+    """
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def pack(cls, strings):
+        if isinstance(strings, cls):
+            return strings
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        data, offsets = self.data.tobytes(), self.offsets.tolist()
+        return (data[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:]))
+
+
+def _encode(node, put):
+    if isinstance(node, np.ndarray):
+        return {"__array__": [put(node), node.dtype.str, list(node.shape)]}
+    if isinstance(node, PackedStrings):
+        return {"__strings__": [_encode(node.data, put), _encode(node.offsets, put)]}
+    if isinstance(node, dict):
+        return {str(k): _encode(v, put) for k, v in node.items()}
+    if isinstance(node, (list, tuple)):
+        return [_encode(v, put) for v in node]
+    if isinstance(node, np.generic):
+        return node.item()
+    return node
+
+
+def _decode(node, buf):
+    if isinstance(node, dict):
+        if "__array__" in node:
+            offset, dtype, shape = node["__array__"]
+            dtype = np.dtype(dtype)
+            count = int(np.prod(shape, dtype=np.int64))
+            if not count:
+                return np.empty(shape, dtype=dtype)
+            return np.frombuffer(buf, dtype=dtype, count=count, offset=offset).reshape(shape)
+        if "__strings__" in node:
+            return PackedStrings(*(_decode(part, buf) for part in node["__strings__"]))
+        return {k: _decode(v, buf) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_decode(v, buf) for v in node]
+    return node
+
+
+def write_snapshot(states, directory=None):
+    """Write ``{engine: state}`` as a new generation and make it current; returns its size in bytes."""
+    directory = directory or state_path(DEFAULT_DIR)
+    gen = f"gen-{time.time_ns()}"
+    path = os.path.join(directory, gen)
+    os.makedirs(path)
+    with open(os.path.join(path, "arrays.bin"), "wb") as fh:
+        end = [0]
+
+        def put(arr):
+            arr = np.ascontiguousarray(arr)
+            fh.write(b"\0" * (-end[0] % ALIGN))
+            offset = end[0] + (-end[0] % ALIGN)
+            fh.write(arr.data)
+            end[0] = offset + arr.nbytes
+            return offset
+
+        manifest = {"format": FORMAT, "written": time.time(),
+                    "engines": {name: _encode(state, put) for name, state in states.items()}}
+        fh.flush()
+        os.fsync(fh.fileno())
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, separators=(",", ":"))
+        fh.flush()
+        os.fsync(fh.fileno())
+    pointer = os.path.join(directory, "CURRENT")
+    with open(pointer + ".tmp", "w", encoding="utf-8") as fh:
+        fh.write(gen)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(pointer + ".tmp", pointer)
+    # Open maps of older generations stay valid after their files are unlinked.
+    for old in os.listdir(directory):
+        if old.startswith("gen-") and old != gen:
+            shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return end[0]
+
+
+class Snapshot:
+    """The current generation, mapped copy-on-write; engine states are decoded on request."""
+
+    def __init__(self, manifest, buf):
+        self.written = manifest["written"]
+        self._engines = manifest["engines"]
+        self._buf = buf
+
+    @classmethod
+    def open(cls, directory=None):
+        """The current snapshot under ``directory``, or None if there is no usable one."""
+        directory = directory or state_path(DEFAULT_DIR)
+        try:
+            with open(os.path.join(directory, "CURRENT"), encoding="utf-8") as fh:
+                path = os.path.join(directory, fh.read().strip())
+            with open(os.path.join(path, "manifest.json"), encoding="utf-8") as fh:
+                manifest = json.load(fh)
+            if manifest.get("format") != FORMAT:
+                return None
+            with open(os.path.join(path, "arrays.bin"), "rb") as fh:
+                buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY) if os.fstat(fh.fileno()).st_size else b""
+        except (OSError, ValueError):
+            return None
+        return cls(manifest, buf)
+
+    @property
+    def nbytes(self):
+        return len(self._buf)
+
+    def names(self):
+        return set(self._engines)
+
+    def state(self, name):
+        node = self._engines.get(name)
+        return None if node is None else _decode(node, self._buf)
+
+
+class Snapshotter:
+    """Restores engines from the latest snapshot when attached and snapshots them periodically."""
+
+    def __init__(self, directory=None, interval=DEFAULT_INTERVAL):
+        self.directory = directory or state_path(DEFAULT_DIR)
+        self.interval = interval
+        self._engines = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._snapshot = Snapshot.open(self.directory)
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"restored": {}, "writes": 0, "errors": 0, "write_seconds": 0.0,
+                      "bytes": self._snapshot.nbytes if self._snapshot is not None else 0}
+
+    def attach(self, name, engine):
+        """Restore ``engine`` from the snapshot (if it holds ``name``) and include it in later ones."""
+        snapshot = self._snapshot
+        if snapshot is not None and name in snapshot.names():
+            started = time.perf_counter()
+            try:
+                engine.load_state(snapshot.state(name))
+                self.stats["restored"][name] = (time.perf_counter() - started) * 1000.0
+            except Exception:  # a bad snapshot must never keep the engine from starting empty
+                log.exception("Restoring %s from snapshot failed", name)
+        with self._lock:
+            self._engines[name] = engine
+        return engine
+
+    def write(self):
+        """Snapshot every attached engine now; returns the bytes written."""
+        with self._write_lock:
+            started = time.perf_counter()
+            with self._lock:
+                engines = dict(self._engines)
+            states = {name: engine.dump_state() for name, engine in engines.items()}
+            # Engines this process has not used yet keep their last snapshotted state.
+            previous = self._snapshot
+            if previous is not None:
+                for name in previous.names() - set(states):
+                    states[name] = previous.state(name)
+            size = write_snapshot(states, self.directory)
+            self._snapshot = Snapshot.open(self.directory)
+            self.stats["writes"] += 1
+            self.stats["bytes"] = size
+            self.stats["write_seconds"] = time.perf_counter() - started
+        return size
+
+    def age(self):
+        """Seconds since the current snapshot was written, or None."""
+        snapshot = self._snapshot
+        return None if snapshot is None else time.time() - snapshot.written
+
+    # -- lifecycle ------------------------------------------------------------
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception:
+                self.stats["errors"] += 1
+                log.exception("Snapshot failed")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="avellon-snapshot", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None, final=True):
+        """Stop the thread, writing one last snapshot unless ``final`` is false."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if final:
+            self.write()
@@ -0,0 +1,161 @@
+"""Spatial index over monitored assets and event-to-asset proximity join.
+
+Assets are bucketed on a regular lat/lon grid and stored sorted by cell id
+(CSR layout: one ``starts`` offset per cell), so the candidates for an event
+are a handful of contiguous slices. A batch of events is joined in one pass:
+every (event, neighbouring cell) pair is expanded into candidate asset ids
+with ``np.repeat`` arithmetic and filtered with a vectorized haversine --
+no per-event Python loop and no all-pairs distance matrix.
+"""
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_CELL_DEG = 0.5
+DEFAULT_RADIUS_KM = 250.0
+# Upper bound on candidate pairs materialised at once; larger batches are chunked.
+MAX_CANDIDATES = 4_000_000
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class AssetIndex:
+    """Grid-bucket index over asset coordinates."""
+
+    def __init__(self, lat, lon, cell_deg=DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.rows = int(math.ceil(180.0 / cell_deg))
+        self.cols = int(math.ceil(360.0 / cell_deg))
+        # Exact steps, so columns tile 360 degrees and wrap cleanly at the antimeridian.
+        self.lat_step = 180.0 / self.rows
+        self.lon_step = 360.0 / self.cols
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        cells = self._cell(self._row(lat), self._col(lon))
+        order = np.argsort(cells, kind="stable")
+        self.ids = order
+        self.lat = lat[order]
+        self.lon = lon[order]
+        # starts[c]:starts[c + 1] is the slice of assets in cell c.
+        self.starts = np.searchsorted(cells[order], np.arange(self.rows * self.cols + 1))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row(self, lat):
+        return np.clip(((np.asarray(lat) + 90.0) // self.lat_step).astype(np.int64), 0, self.rows - 1)
+
+    def _col(self, lon):
+        return (((np.asarray(lon) + 180.0) // self.lon_step).astype(np.int64)) % self.cols
+
+    def _cell(self, row, col):
+        return row * self.cols + col
+
+    def _lat_reach(self, radius_km):
+        return int(math.ceil(math.degrees(radius_km / EARTH_RADIUS_KM) / self.lat_step))
+
+    def _lon_reach(self, lat, radius_km):
+        # Widest longitude offset of a spherical cap: asin(sin(r) / cos(lat)),
+        # or every longitude once the cap contains a pole.
+        ang = radius_km / EARTH_RADIUS_KM
+        lat = np.asarray(lat, dtype=np.float64)
+        ratio = math.sin(min(ang, math.pi / 2)) / np.maximum(np.cos(np.radians(lat)), 1e-12)
+        dlon = np.degrees(np.arcsin(np.minimum(ratio, 1.0)))
+        dlon = np.where((np.abs(lat) + math.degrees(ang) >= 90.0) | (ratio >= 1.0), 180.0, dlon)
+        return np.minimum(np.ceil(dlon / self.lon_step).astype(np.int64), self.cols // 2)
+
+    def _candidates(self, ev_lat, ev_lon, radius_km):
+        """Expand events into (event, asset position) candidate pairs."""
+        lat_reach = self._lat_reach(radius_km)
+        rows0 = self._row(ev_lat)
+        cols0 = self._col(ev_lon)
+        lon_reach = self._lon_reach(ev_lat, radius_km)
+        ev_parts, pos_parts = [], []
+        # Events are grouped by column reach so each group is a fixed-shape block.
+        for reach in np.unique(lon_reach):
+            sel = np.flatnonzero(lon_reach == reach)
+            if 2 * reach + 1 >= self.cols:
+                dcols = np.arange(self.cols)
+            else:
+                dcols = np.arange(-reach, reach + 1)
+            drow, dcol = np.meshgrid(np.arange(-lat_reach, lat_reach + 1), dcols, indexing="ij")
+            drow, dcol = drow.ravel(), dcol.ravel()
+            rows = rows0[sel, None] + drow[None, :]
+            valid = (rows >= 0) & (rows < self.rows)
+            cols = (cols0[sel, None] + dcol[None, :]) % self.cols
+            cells = self._cell(np.clip(rows, 0, self.rows - 1), cols)
+            lo = self.starts[cells]
+            counts = np.where(valid, self.starts[cells + 1] - lo, 0).ravel()
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            ev = np.repeat(np.repeat(sel, len(drow)), counts)
+            offsets = np.repeat(lo.ravel() - np.cumsum(counts) + counts, counts)
+            ev_parts.append(ev)
+            pos_parts.append(offsets + np.arange(total))
+        if not ev_parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(ev_parts), np.concatenate(pos_parts)
+
+    def join(self, ev_lat, ev_lon, radius_km=DEFAULT_RADIUS_KM):
+        """All (event, asset) pairs within ``radius_km``.
+
+        Returns ``(event_idx, asset_id, distance_km)`` arrays, where
+        ``asset_id`` indexes the arrays the index was built from.
+        """
+        ev_lat = np.asarray(ev_lat, dtype=np.float64)
+        ev_lon = np.asarray(ev_lon, dtype=np.float64)
+        known = np.flatnonzero(~(np.isnan(ev_lat) | np.isnan(ev_lon)))
+        # Chunk so the candidate expansion stays within MAX_CANDIDATES.
+        per_event = max(1.0, len(self) / (self.rows * self.cols) * 9 * 4)
+        chunk = max(1, int(MAX_CANDIDATES / per_event))
+        out_ev, out_id, out_d = [], [], []
+        for start in range(0, len(known), chunk):
+            idx = known[start:start + chunk]
+            ev, pos = self._candidates(ev_lat[idx], ev_lon[idx], radius_km)
+            if len(ev) == 0:
+                continue
+            d = haversine_km(ev_lat[idx][ev], ev_lon[idx][ev], self.lat[pos], self.lon[pos])
+            hit = d <= radius_km
+            out_ev.append(idx[ev[hit]])
+            out_id.append(self.ids[pos[hit]])
+            out_d.append(d[hit])
+        if not out_ev:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(out_ev), np.concatenate(out_id), np.concatenate(out_d)
+
+    def query(self, lat, lon, radius_km=DEFAULT_RADIUS_KM):
+        """Asset ids within ``radius_km`` of one point, nearest first."""
+        _, ids, d = self.join([lat], [lon], radius_km)
+        order = np.argsort(d, kind="stable")
+        return ids[order], d[order]
+
+
+def escalate(risk, conf, event_idx, asset_id, dist_km, ev_severity, ev_conf, radius_km=DEFAULT_RADIUS_KM):
+    """Raise asset risk/confidence from joined events.
+
+    An event inside half the radius pushes an asset up to the event's severity
+    code; further out it counts one level lower. Assets that escalate take the
+    mean of their own confidence and the strongest contributing event's.
+    Returns new ``(risk, conf)`` arrays; inputs are not modified.
+    """
+    risk = np.asarray(risk, dtype=np.int64).copy()
+    conf = np.asarray(conf, dtype=np.float64).copy()
+    if len(event_idx) == 0:
+        return risk, conf.astype(np.int64)
+    sev = np.asarray(ev_severity, dtype=np.int64)[event_idx]
+    level = np.where(dist_km <= radius_km / 2, sev, np.maximum(sev - 1, 0))
+    pressure = np.zeros(len(risk), dtype=np.int64)
+    np.maximum.at(pressure, asset_id, level)
+    event_conf = np.zeros(len(risk))
+    np.maximum.at(event_conf, asset_id, np.asarray(ev_conf, dtype=np.float64)[event_idx])
+    raised = pressure > risk
+    risk[raised] = pressure[raised]
+    conf[raised] = (conf[raised] + event_conf[raised]) / 2
+    return risk, np.rint(conf).astype(np.int64)
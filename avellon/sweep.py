@@ -0,0 +1,207 @@
+"""Parameter sweeps of the scenario engines with a persistent result cache.
+
+A sweep runs the Monte Carlo and cascade engines for every cell of a
+scenario x severity x duration grid; each scenario shocks its most critical
+eligible node, as the Scenario Modeling page does by default. Cells are
+independent, so they are farmed out to a process pool (each worker gets the
+cascade model once, through the pool initializer) and ``run_sweep`` yields
+them as they finish, for the page to redraw its heatmap.
+
+Finished cells are written to a SQLite cache under the state directory,
+keyed by the cell parameters and ``data_version`` -- a digest of the cascade
+model (topology, live risk-adjusted lead times and buffers) and the engine
+constants. Re-opening a sweep, or a colleague opening the same one on any
+session that shares the state directory, reads the cells back instead of
+recomputing them; a risk change or an engine retune changes the version,
+so stale cells are never served.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from avellon import cascade
+from avellon.cascade import SHOCK_KINDS, build_model, simulate_cascade
+from avellon.config import state_path
+from avellon.simulation import DEFAULT_PATHS, DEFAULT_SEED, SCENARIOS, SEVERITY_MULTIPLIER, run_simulation
+
+DEFAULT_CACHE = "sweeps.sqlite"
+DEFAULT_DURATIONS = (7, 14, 30, 60, 90)
+# Cells kept on disk; the least recently written are pruned past this.
+MAX_CELLS = 50_000
+# Cells below which a process pool costs more than it saves.
+POOL_MIN_CELLS = 8
+# Bumped whenever the cell result layout, or what an engine computes for it, changes.
+CELL_FORMAT = 2
+
+# Heatmap metrics: label -> cell result field.
+METRICS = {
+    "Revenue at Risk P50 ($M)": "revenue_p50",
+    "Revenue at Risk P95 ($M)": "revenue_p95",
+    "Inventory Burn P50 (%)": "burn_p50",
+    "Stockout Probability": "stockout_probability",
+    "Cascade Probability": "cascade_probability",
+    "Failed Nodes P50": "failed_nodes_p50",
+}
+
+# Cascade model in pool workers, set by _init_worker; never set in the app process.
+_model = None
+
+
+def data_version(model):
+    """Digest of everything a cell result depends on besides its parameters."""
+    h = hashlib.blake2b(digest_size=16)
+    for name in ("lead", "buffer", "need", "sinks"):
+        h.update(np.ascontiguousarray(model[name]).tobytes())
+    for src, dst in model["layers"]:
+        h.update(src.tobytes())
+        h.update(dst.tobytes())
+    h.update(repr((
+        CELL_FORMAT, sorted(SCENARIOS.items()), sorted(SEVERITY_MULTIPLIER.items()), DEFAULT_PATHS, DEFAULT_SEED,
+        cascade.DEFAULT_TRIALS, cascade.TRIALS_PER_BLOCK, cascade.FAILURE_THRESHOLD, cascade.EDGE_DELAY_SIGMA,
+        cascade.BUFFER_SHAPE,
+    )).encode("utf-8"))
+    return h.hexdigest()
+
+
+def default_shock(graph, scenario):
+    """Most critical node of a kind ``scenario`` can strike (the page's default target)."""
+    score = graph.criticality()
+    eligible = [i for i in range(len(graph)) if graph.kinds[i] in SHOCK_KINDS[scenario]]
+    return max(eligible, key=lambda i: score[i])
+
+
+def grid(scenarios=None, severities=None, durations=DEFAULT_DURATIONS):
+    """Sweep cells ``(scenario, severity, days)``, scenario-major."""
+    return [
+        (scenario, severity, int(days))
+        for scenario in scenarios or SCENARIOS
+        for severity in severities or SEVERITY_MULTIPLIER
+        for days in durations
+    ]
+
+
+def cell_key(version, scenario, severity, days, shock):
+    return hashlib.sha1(json.dumps([version, scenario, severity, days, shock]).encode("utf-8")).hexdigest()
+
+
+def _init_worker(model):
+    global _model
+    _model = model
+
+
+def _run_cell(scenario, severity, days, shock, model=None):
+    started = time.perf_counter()
+    sim = run_simulation(scenario, days, severity)
+    out = simulate_cascade(_model if model is None else model, [shock], scenario, days, severity, workers=1)
+    rev_p5, rev_p50, rev_p95 = sim["revenue_at_risk"]
+    return {
+        "revenue_p5": rev_p5,
+        "revenue_p50": rev_p50,
+        "revenue_p95": rev_p95,
+        "burn_p50": sim["inventory_burn"][1],
+        "stockout_probability": sim["stockout_probability"],
+        "cascade_probability": float(np.isfinite(out["time_to_cascade"]).mean()),
+        "failed_nodes_p50": float(np.percentile(out["failed_nodes"], 50)),
+        "elapsed_ms": (time.perf_counter() - started) * 1000.0,
+    }
+
+
+class SweepCache:
+    """On-disk store of finished sweep cells, shared by every session."""
+
+    def __init__(self, path=None, max_cells=MAX_CELLS):
+        self.max_cells = max_cells
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or state_path(DEFAULT_CACHE), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS cells (key TEXT PRIMARY KEY, result TEXT, written REAL)")
+        self._stats = {"hits": 0, "misses": 0, "written": 0}
+        with self._lock:
+            self._prune_locked()
+
+    def _prune_locked(self):
+        self._db.execute(
+            "DELETE FROM cells WHERE key IN (SELECT key FROM cells ORDER BY written DESC LIMIT -1 OFFSET ?)",
+            (self.max_cells,),
+        )
+
+    def get_many(self, keys):
+        """Cached results for ``keys``, as ``{key: result}``."""
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, result FROM cells WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((key, json.loads(result)) for key, result in rows)
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put(self, key, result):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO cells VALUES (?, ?, ?)", (key, json.dumps(result), time.time()))
+            self._stats["written"] += 1
+            if self._stats["written"] % 1000 == 0:
+                self._prune_locked()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cells").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+def run_sweep(graph, cells, cache=None, workers=None, compute=True):
+    """Yield ``(cell, result, cached)`` for every ``(scenario, severity, days)`` cell.
+
+    Cached cells come first, then computed ones in completion order, each
+    written to ``cache`` as it finishes -- a sweep abandoned halfway keeps
+    what it finished. With ``compute`` false only the cached cells are
+    yielded. ``workers`` > 1 runs cells on a process pool; by
+    default every core is used once ``POOL_MIN_CELLS`` cells need computing.
+    """
+    model = build_model(graph)
+    version = data_version(model)
+    shocks = {scenario: default_shock(graph, scenario) for scenario in {cell[0] for cell in cells}}
+    keyed = {cell_key(version, *cell, shocks[cell[0]]): cell for cell in cells}
+    hits = cache.get_many(list(keyed)) if cache is not None else {}
+    for key, result in hits.items():
+        yield keyed[key], result, True
+    todo = [(key, cell) for key, cell in keyed.items() if key not in hits] if compute else []
+    if workers is None:
+        workers = min(len(todo), os.cpu_count() or 1) if len(todo) >= POOL_MIN_CELLS else 1
+    if workers > 1:
+        # Spawned, not forked: the Streamlit server is multi-threaded, and a forked child
+        # inherits whatever locks its other threads held at that moment.
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(model,))
+        try:
+            futures = {pool.submit(_run_cell, *cell, shocks[cell[0]]): (key, cell) for key, cell in todo}
+            for future in as_completed(futures):
+                key, cell = futures[future]
+                result = future.result()
+                if cache is not None:
+                    cache.put(key, result)
+                yield cell, result, False
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    else:
+        # In-process the model is passed down explicitly, to here and to the cascade engine:
+        # a module global would be shared with every other session in this process.
+        for key, cell in todo:
+            result = _run_cell(*cell, shocks[cell[0]], model)
+            if cache is not None:
+                cache.put(key, result)
+            yield cell, result, False
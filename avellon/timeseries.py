@@ -0,0 +1,269 @@
+"""Rolled-up risk time series with LTTB downsampling for the trend chart.
+
+Each series is kept at three resolutions (minute, hour, day) as columnar
+NumPy buckets holding sum/count/min/max, updated on write -- a batch of
+samples is folded in with one ``np.unique``/``bincount`` pass per
+resolution. A query picks the finest rollup with a bounded number of
+buckets in the window and reduces it with Largest-Triangle-Three-Buckets,
+so the browser always receives about ``DEFAULT_POINTS`` points whether the
+window is a day of minutes or a year of them. A ``HistoryRecorder`` thread
+samples the live series once a minute, whether or not anyone is viewing
+them. Snapshots hold each rollup's filled columns, which are mapped back in
+place on restore.
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+RESOLUTIONS = (MINUTE, HOUR, DAY)
+RESOLUTION_LABELS = {MINUTE: "minute", HOUR: "hour", DAY: "day"}
+# Buckets kept per resolution (about 13 months of minutes; hours and days effectively unbounded).
+RETENTION = {MINUTE: 400 * 1440, HOUR: 20 * 8760, DAY: 100 * 366}
+DEFAULT_POINTS = 1000
+# Rollups with more buckets than this in the window are skipped for a coarser one.
+MAX_LTTB_INPUT = 50 * DEFAULT_POINTS
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of ``n_out`` visually representative points."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # Bucket i (of n_out - 2) covers [edges[i], edges[i + 1]); first and last points are always kept.
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    sizes = np.diff(edges)
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / sizes
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / sizes
+    # The third vertex of each triangle is the mean of the next bucket (the last point for the last bucket).
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+COLUMNS = ("start", "sum", "count", "min", "max")
+
+
+class _Rollup:
+    """Fixed-width buckets for one series at one resolution."""
+
+    def __init__(self, width, retention):
+        self.width = width
+        self.retention = retention
+        self.n = 0
+        self.start = np.empty(0, dtype=np.int64)
+        self.sum = np.empty(0)
+        self.count = np.empty(0, dtype=np.int64)
+        self.min = np.empty(0)
+        self.max = np.empty(0)
+
+    def _grow(self, extra):
+        capacity = max(64, len(self.start))
+        while capacity < self.n + extra:
+            capacity *= 2
+        if capacity == len(self.start):
+            return
+        for name in COLUMNS:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def extend(self, ts, values):
+        buckets = ts.astype(np.int64) // self.width * self.width
+        keys, inverse = np.unique(buckets, return_inverse=True)
+        k = len(keys)
+        sums = np.bincount(inverse, weights=values, minlength=k)
+        counts = np.bincount(inverse, minlength=k)
+        mins = np.full(k, np.inf)
+        np.minimum.at(mins, inverse, values)
+        maxs = np.full(k, -np.inf)
+        np.maximum.at(maxs, inverse, values)
+
+        n = self.n
+        if n and keys[0] < self.start[n - 1]:
+            # Late data: fold into existing buckets where present, then re-sort.
+            pos = np.searchsorted(self.start[:n], keys)
+            hit = (pos < n) & (self.start[np.minimum(pos, n - 1)] == keys)
+            p = pos[hit]
+            self.sum[p] += sums[hit]
+            self.count[p] += counts[hit]
+            self.min[p] = np.minimum(self.min[p], mins[hit])
+            self.max[p] = np.maximum(self.max[p], maxs[hit])
+            keys, sums, counts, mins, maxs = keys[~hit], sums[~hit], counts[~hit], mins[~hit], maxs[~hit]
+            self._append(keys, sums, counts, mins, maxs)
+            order = np.argsort(self.start[:self.n], kind="stable")
+            for name in COLUMNS:
+                col = getattr(self, name)
+                col[:self.n] = col[:self.n][order]
+        else:
+            if n and keys[0] == self.start[n - 1]:
+                # First new bucket continues the open one.
+                self.sum[n - 1] += sums[0]
+                self.count[n - 1] += counts[0]
+                self.min[n - 1] = min(self.min[n - 1], mins[0])
+                self.max[n - 1] = max(self.max[n - 1], maxs[0])
+                keys, sums, counts, mins, maxs = keys[1:], sums[1:], counts[1:], mins[1:], maxs[1:]
+            self._append(keys, sums, counts, mins, maxs)
+        if self.n > self.retention * 1.1:
+            # Trim in one slice once retention is exceeded by 10%, so the copy is amortised.
+            drop = self.n - self.retention
+            for name in COLUMNS:
+                col = getattr(self, name)
+                col[:self.retention] = col[drop:self.n]
+            self.n = self.retention
+
+    def _append(self, keys, sums, counts, mins, maxs):
+        k = len(keys)
+        if not k:
+            return
+        self._grow(k)
+        n = self.n
+        self.start[n:n + k], self.sum[n:n + k], self.count[n:n + k] = keys, sums, counts
+        self.min[n:n + k], self.max[n:n + k] = mins, maxs
+        self.n += k
+
+    def span(self, since=None, until=None):
+        starts = self.start[:self.n]
+        lo = 0 if since is None else np.searchsorted(starts, since // self.width * self.width, side="left")
+        hi = self.n if until is None else np.searchsorted(starts, until, side="right")
+        return lo, hi
+
+    def window(self, since=None, until=None):
+        lo, hi = self.span(since, until)
+        return self.start[lo:hi], self.sum[lo:hi] / self.count[lo:hi]
+
+
+class TimeSeriesStore:
+    """Named series (``global``, ``region:<name>``, ``asset:<name>``) with rollups."""
+
+    def __init__(self, resolutions=RESOLUTIONS, retention=None):
+        self.resolutions = tuple(resolutions)
+        self.retention = dict(RETENTION, **(retention or {}))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        return sorted(self._series)
+
+    def extend(self, name, ts, values):
+        """Append a batch of samples (``ts`` in epoch seconds) to one series."""
+        ts = np.asarray(ts, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if not len(ts):
+            return
+        with self._lock:
+            rollups = self._series.get(name)
+            if rollups is None:
+                rollups = self._series[name] = [_Rollup(w, self.retention[w]) for w in self.resolutions]
+            for rollup in rollups:
+                rollup.extend(ts, values)
+
+    def record(self, values, ts=None):
+        """One sample per series from a ``{name: value}`` mapping, all at ``ts`` (default now)."""
+        ts = time.time() if ts is None else ts
+        for name, value in values.items():
+            self.extend(name, [ts], [value])
+
+    def query(self, name, since=None, until=None, max_points=DEFAULT_POINTS):
+        """``(ts, value, resolution)`` for a window, downsampled to at most ``max_points``.
+
+        Uses the finest rollup with no more than ``MAX_LTTB_INPUT`` buckets in
+        the window, then LTTB. ``ts`` is the bucket start in epoch seconds.
+        """
+        with self._lock:
+            rollups = self._series.get(name)
+            if rollups is None:
+                return np.empty(0, dtype=np.int64), np.empty(0), self.resolutions[0]
+            for rollup in rollups:
+                lo, hi = rollup.span(since, until)
+                if hi - lo <= max(MAX_LTTB_INPUT, max_points):
+                    break
+            ts, values = rollup.window(since, until)
+        keep = lttb(ts.astype(np.float64), values, max_points)
+        return ts[keep], values[keep], rollup.width
+
+    def stats(self):
+        with self._lock:
+            return {
+                "series": len(self._series),
+                "buckets": sum(r.n for rollups in self._series.values() for r in rollups),
+            }
+
+    # -- snapshots ------------------------------------------------------------
+    def dump_state(self):
+        with self._lock:
+            return {
+                name: [dict(width=r.width, **{c: getattr(r, c)[:r.n].copy() for c in COLUMNS}) for r in rollups]
+                for name, rollups in self._series.items()
+            }
+
+    def load_state(self, state):
+        """Restore a ``dump_state``; rollups at resolutions this store no longer keeps are dropped."""
+        series = {}
+        for name, dumped in state.items():
+            by_width = {d["width"]: d for d in dumped}
+            rollups = series[name] = [_Rollup(w, self.retention[w]) for w in self.resolutions]
+            for rollup in rollups:
+                d = by_width.get(rollup.width)
+                if d is not None:
+                    for c in COLUMNS:
+                        setattr(rollup, c, d[c])
+                    rollup.n = len(d["start"])
+        with self._lock:
+            self._series = series
+
+
+class HistoryRecorder:
+    """Background thread that records ``sample()`` -- a ``{series: value}`` mapping -- every ``interval`` seconds."""
+
+    def __init__(self, store, sample, interval=MINUTE):
+        self.store = store
+        self.sample = sample
+        self.interval = interval
+        self.stats = {"samples": 0, "errors": 0, "last_sample": None}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record_once(self, now=None):
+        now = time.time() if now is None else now
+        values = self.sample()
+        if values:
+            self.store.record(values, now)
+        self.stats["samples"] += 1
+        self.stats["last_sample"] = now
+
+    # -- lifecycle ------------------------------------------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.record_once()
+            except Exception:
+                self.stats["errors"] += 1
+                log.exception("Risk history sample failed")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="avellon-history", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
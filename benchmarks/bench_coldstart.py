@@ -0,0 +1,80 @@
+"""Cold start of app.py: import time and time to first render of Home.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_coldstart
+
+Every sample is a fresh interpreter, as on a newly scaled-up container. It
+times importing Streamlit, the first ``AppTest`` run of the public Home page
+and then, in the same process, the first War Room render after login (where
+the deferred modules are paid for). The "eager" rows import the data stack
+up front, as ``app.py`` did when everything was imported at module top.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RUNS = 5
+HEAVY = ("numpy", "pandas", "altair", "graphviz", "folium", "streamlit_folium", "feedparser", "textblob")
+
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+out = {"import_streamlit": time.perf_counter() - started}
+if os.environ.get("BENCH_EAGER"):
+    t = time.perf_counter()
+    for name in HEAVY:
+        __import__(name)
+    import avellon.cascade, avellon.events, avellon.geocode, avellon.graph, avellon.ingest
+    import avellon.mapping, avellon.riskindex, avellon.scoring, avellon.simulation, avellon.spatial, avellon.timeseries
+    out["import_eager"] = time.perf_counter() - t
+t = time.perf_counter()
+at = AppTest.from_file(APP, default_timeout=120)
+at.run()
+assert not at.exception, at.exception
+out["first_home"] = time.perf_counter() - t
+out["to_first_home"] = time.perf_counter() - started
+out["loaded"] = [name for name in HEAVY if name in sys.modules]
+t = time.perf_counter()
+at.session_state["authenticated"] = True
+at.run()
+at.sidebar.radio[0].set_value("War Room").run()
+assert not at.exception, at.exception
+out["first_war_room"] = time.perf_counter() - t
+print(json.dumps(out))
+"""
+
+
+def sample(eager, env):
+    env = dict(env, BENCH_EAGER="1" if eager else "")
+    prelude = f"HEAVY = {HEAVY!r}\nAPP = {os.path.abspath('app.py')!r}\n"
+    proc = subprocess.run([sys.executable, "-c", prelude + CHILD], env=env, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    feed = os.path.join(tmp, "feed.xml")
+    with open(feed, "w") as fh:
+        fh.write("<rss version='2.0'><channel><title>bench</title></channel></rss>")
+    env = dict(os.environ, AVELLON_FEEDS="file://" + feed, AVELLON_STATE_DIR=os.path.join(tmp, "state"))
+
+    print(f"{'mode':<6} {'import st':>10} {'eager imp':>10} {'Home run':>9} {'to Home':>8} {'War Room':>9}  heavy modules on Home")
+    for eager in (True, False):
+        runs = [sample(eager, env) for _ in range(RUNS)]
+
+        def med(key):
+            return statistics.median(r.get(key, 0.0) for r in runs) * 1e3
+
+        loaded = ", ".join(runs[-1]["loaded"]) or "none"
+        print(f"{'eager' if eager else 'lazy':<6} {med('import_streamlit'):>8.0f}ms {med('import_eager'):>8.0f}ms "
+              f"{med('first_home'):>7.0f}ms {med('to_first_home'):>6.0f}ms {med('first_war_room'):>7.0f}ms  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
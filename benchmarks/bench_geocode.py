@@ -0,0 +1,76 @@
+"""Per-item latency of the offline geocoder.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_geocode
+
+Reports p50/p99 latency for cold lookups (each strategy: phrase, token,
+prefix, fuzzy, miss), warm in-memory hits, disk-cache hits from a fresh
+process-equivalent instance, and the free-text ``locate`` scan used on titles.
+Compare against ``geocode.LATENCY_BUDGET_US``.
+"""
+import random
+import statistics
+import tempfile
+import time
+
+from avellon.geocode import LATENCY_BUDGET_US, Gazetteer, Geocoder
+
+QUERIES = {
+    "phrase": ["Red Sea Sector 4", "Hamburg Terminal", "Strait of Hormuz approach", "Port of Long Beach berth 7"],
+    "token": ["Malacca shipping lane", "Yantian container yard", "Nansha terminal"],
+    "prefix": ["Hambu", "Kaohs", "Rotterd"],
+    "fuzzy": ["Rotterdm port", "Singapure anchorage", "Kaohsuing", "Felixtowe"],
+    "miss": ["Global / OFAC", "gCaptain", "Undisclosed location"],
+}
+TITLES = [
+    "Drone attack reported near Red Sea shipping lane off Yemen",
+    "Typhoon forms in Philippine Sea as Taiwan braces for landfall",
+    "Dockworkers strike halts operations at Port of Felixstowe",
+    "New sanctions list issued targeting tanker operators",
+]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def timed(fn, arg):
+    started = time.perf_counter()
+    fn(arg)
+    return (time.perf_counter() - started) * 1e6
+
+
+def main():
+    gazetteer = Gazetteer.load()
+    cache = tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False).name
+    print(f"latency budget: {LATENCY_BUDGET_US} us/item (uncached)")
+    print(f"{'case':<14} {'p50 us':>8} {'p99 us':>8}")
+    for method, queries in QUERIES.items():
+        samples = []
+        for i in range(200):
+            # A fresh memo each round so every lookup is a true cold resolve.
+            geocoder = Geocoder(gazetteer, cache_path=False)
+            samples.append(timed(geocoder.geocode, random.choice(queries) + f" {'x' * (i % 3)}"))
+        p50, p99 = percentiles(samples)
+        print(f"{'cold ' + method:<14} {p50:>8.1f} {p99:>8.1f}")
+
+    geocoder = Geocoder(gazetteer, cache_path=cache)
+    everything = [q for qs in QUERIES.values() for q in qs]
+    for q in everything:
+        geocoder.geocode(q)
+    geocoder.flush()
+    p50, p99 = percentiles([timed(geocoder.geocode, random.choice(everything)) for _ in range(10_000)])
+    print(f"{'memory hit':<14} {p50:>8.1f} {p99:>8.1f}")
+
+    reopened = Geocoder(gazetteer, cache_path=cache)
+    p50, p99 = percentiles([timed(reopened.geocode, q) for q in everything])
+    print(f"{'disk hit':<14} {p50:>8.1f} {p99:>8.1f}")
+
+    p50, p99 = percentiles([timed(geocoder.locate, random.choice(TITLES)) for _ in range(10_000)])
+    print(f"{'locate title':<14} {p50:>8.1f} {p99:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
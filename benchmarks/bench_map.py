@@ -0,0 +1,86 @@
+"""Rerun latency of the War Room map at 10k / 100k / 1M points.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_map
+
+Each "rerun" does what ``render_war_room`` does server-side: cull and cluster
+the layer for the current viewport, build the overlay FeatureGroup and
+serialize base map + overlay the way ``st_folium`` does. "cold" is the first
+visit to a viewport, "warm" a revisit served from the cluster cache. The
+legacy column rebuilds a ``folium.Map`` with one marker per point, as the page
+did before clustering; it is skipped above 10k points.
+"""
+import copy
+import statistics
+import time
+
+import folium
+import numpy as np
+# Private helpers: they are exactly what st_folium runs on every call.
+from streamlit_folium import _get_feature_group_string, _get_map_string, generate_leaflet_string
+
+from avellon.mapping import RISK_COLORS, RISK_LEVELS, WORLD, PointLayer, build_base_map, build_overlay
+
+SCALES = (10_000, 100_000, 1_000_000)
+VIEWS = {
+    "world z2": (WORLD, 2),
+    "europe z5": ({"south": 35.0, "west": -12.0, "north": 60.0, "east": 30.0}, 5),
+    "strait z9": ({"south": 1.0, "west": 100.0, "north": 3.0, "east": 104.0}, 9),
+}
+REPEATS = 5
+
+
+def synthetic_layer(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Points concentrated around a few hundred hubs, like ports and facilities.
+    hubs_lat = rng.uniform(-50, 65, 400)
+    hubs_lon = rng.uniform(-170, 170, 400)
+    hub = rng.integers(0, 400, n)
+    lat = np.clip(hubs_lat[hub] + rng.normal(0, 2.0, n), -80, 80)
+    lon = np.clip(hubs_lon[hub] + rng.normal(0, 3.0, n), -180, 180)
+    risk = rng.choice(4, n, p=[0.6, 0.25, 0.1, 0.05])
+    return PointLayer(lat, lon, risk)
+
+
+def rerun(base, layer, bounds, zoom):
+    started = time.perf_counter()
+    clusters = layer.clusters(bounds, zoom)
+    overlay = build_overlay(layer, clusters)
+    # The page renders a copy of its base map, which st_folium then adds the overlay to.
+    base = copy.deepcopy(base)
+    base.get_root().render()
+    payload = len(_get_map_string(base)) + len(_get_feature_group_string(overlay, map=base))
+    return (time.perf_counter() - started) * 1000.0, len(clusters["count"]), payload
+
+
+def legacy_rerun(layer):
+    started = time.perf_counter()
+    m = folium.Map(location=[20, 10], zoom_start=2, tiles="CartoDB dark_matter")
+    for lat, lon, risk in zip(layer.lat.tolist(), layer.lon.tolist(), layer.risk.tolist()):
+        color = RISK_COLORS[RISK_LEVELS[risk]]
+        folium.CircleMarker(location=[lat, lon], radius=6, color=color, fill=True, fill_color=color, fill_opacity=1).add_to(m)
+    m.get_root().render()
+    payload = len(_get_map_string(m))
+    return (time.perf_counter() - started) * 1000.0, payload
+
+
+def main():
+    print(f"{'points':>9} {'view':<10} {'build ms':>9} {'cold ms':>9} {'warm ms':>9} {'markers':>8} {'payload KB':>10}")
+    for n in SCALES:
+        started = time.perf_counter()
+        layer = synthetic_layer(n)
+        build_ms = (time.perf_counter() - started) * 1000.0
+        base = build_base_map()
+        generate_leaflet_string(base)
+        for name, (bounds, zoom) in VIEWS.items():
+            cold_ms, markers, payload = rerun(base, layer, bounds, zoom)
+            warm = [rerun(base, layer, bounds, zoom)[0] for _ in range(REPEATS)]
+            print(f"{n:>9,} {name:<10} {build_ms:>9.1f} {cold_ms:>9.1f} {statistics.median(warm):>9.1f} {markers:>8,} {payload / 1024:>10.1f}")
+        if n <= 10_000:
+            legacy_ms, payload = legacy_rerun(layer)
+            print(f"{n:>9,} {'legacy':<10} {'':>9} {legacy_ms:>9.1f} {'':>9} {n:>8,} {payload / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
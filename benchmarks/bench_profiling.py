@@ -0,0 +1,95 @@
+"""Cost of render profiling, and where a War Room rerun spends its time.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_profiling
+
+First times one ``span`` enter/exit and one ``profiled`` call with the
+profiler off and on. Then reruns the War Room under ``AppTest`` against a
+local feed with profiling off and on (the difference is the end-to-end
+overhead), prints the per-span breakdown collected while on -- wall, CPU and
+bytes sent to the browser -- and the size and render time of the Prometheus
+export.
+"""
+import os
+import statistics
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from avellon.profiling import Profiler, profiler
+from benchmarks.bench_refresh import write_feed
+
+N_CALLS = 200_000
+RERUNS = 30
+
+
+def per_call_ns(fn):
+    started = time.perf_counter()
+    for _ in range(N_CALLS):
+        fn()
+    return (time.perf_counter() - started) / N_CALLS * 1e9
+
+
+def micro():
+    for enabled in (False, True):
+        prof = Profiler(enabled=enabled)
+
+        def span():
+            with prof.span("x"):
+                pass
+
+        @prof.profiled()
+        def call():
+            pass
+        print(f"profiler {'on ' if enabled else 'off'}: span {per_call_ns(span):6.0f} ns   "
+              f"profiled call {per_call_ns(call):6.0f} ns   (bare call {per_call_ns(lambda: None):.0f} ns)")
+
+
+def reruns(at):
+    times = []
+    for _ in range(RERUNS):
+        started = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - started)
+        assert not at.exception, at.exception
+    return statistics.median(times) * 1e3
+
+
+def main():
+    micro()
+
+    tmp = tempfile.mkdtemp()
+    feed = os.path.join(tmp, "feed.xml")
+    write_feed(feed, 2_000)
+    os.environ["AVELLON_FEEDS"] = "file://" + feed
+    os.environ["AVELLON_STATE_DIR"] = os.path.join(tmp, "state")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    at = AppTest.from_file(os.path.join(root, "app.py"), default_timeout=120)
+    at.session_state["authenticated"] = True
+    at.run()
+    at.sidebar.radio[0].set_value("War Room").run()
+    time.sleep(2)
+    reruns(at)  # warm caches and the session base map
+
+    profiler.enabled = False
+    off = reruns(at)
+    profiler.enabled = True
+    profiler.reset()
+    on = reruns(at)
+    print(f"War Room rerun p50: profiling off {off:.1f} ms, on {on:.1f} ms ({on - off:+.1f} ms)")
+
+    print(f"{'span':<28} {'p50 ms':>8} {'p95 ms':>8} {'cpu p50':>8} {'KB p50':>8}")
+    for name, r in sorted(profiler.stats().items(), key=lambda kv: -kv[1]["p50"]):
+        print(f"{name:<28} {r['p50'] * 1e3:>8.2f} {r['p95'] * 1e3:>8.2f} {r['cpu_p50'] * 1e3:>8.2f} "
+              f"{r['bytes_p50'] / 1024:>8.1f}")
+
+    started = time.perf_counter()
+    text = profiler.prometheus()
+    print(f"prometheus export: {len(text.splitlines()):,} lines, {len(text) / 1024:.1f} KB "
+          f"in {(time.perf_counter() - started) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
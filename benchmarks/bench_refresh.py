@@ -0,0 +1,114 @@
+"""Rerun latency and CPU of the War Room: full-page rerun vs. fragment ticks.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_refresh
+
+Drives ``app.py`` headless with ``AppTest`` against a local RSS file. Each
+round appends a few items to the feed, runs one ingestion poll (scoring,
+geocoding, store, risk index and feed bus) and reruns the page. A full
+rerun is what every refresh cost when the page was one script run; the
+panel rows are what one ``st.fragment`` tick of that panel costs now
+(``timed_panel`` wall and script-thread CPU). The last table projects CPU
+per session per minute with every panel refreshed at the feed interval as
+one page, against each panel on its own interval.
+"""
+import gc
+import os
+import random
+import statistics
+import tempfile
+import time
+from email.utils import formatdate
+from xml.sax.saxutils import escape
+
+from streamlit.testing.v1 import AppTest
+
+from avellon.profiling import profiler
+
+BASE_ITEMS = 2_000
+NEW_PER_ROUND = 5
+ROUNDS = 20
+TITLES = ("Missile strike near {}", "Port congestion at {}", "Typhoon warning for {}", "Ransomware outage at {}")
+# Mirrors METRICS_REFRESH / MAP_REFRESH / FEED_REFRESH in app.py.
+REFRESH = {"render_header_metrics": 10, "render_theater_map": 30, "render_intel_stream": 5}
+PLACES = ("Suez Canal", "Strait of Malacca", "Rotterdam", "Gulf of Aden", "Panama Canal", "Taiwan Strait")
+SYLLABLES = ("ka", "lo", "ri", "ten", "mar", "vo", "sul", "dre", "an", "pe", "quo", "zin", "bel", "tho", "ru", "gan")
+
+
+def codename(i, words=8):
+    # Words seeded by the item number, so no two items read as the same story.
+    rng = random.Random(i)
+    return " ".join("".join(rng.choices(SYLLABLES, k=3)).capitalize() for _ in range(words))
+
+
+def write_feed(path, n):
+    now = time.time()
+    entries = []
+    for i in range(n):
+        title = f"{TITLES[i % len(TITLES)].format(PLACES[i % len(PLACES)])}: {codename(i)}"
+        entries.append(
+            f"<item><title>{escape(title)}</title><guid>bench-{i}</guid>"
+            f"<description>{escape(title)} reported.</description>"
+            f"<pubDate>{formatdate(now - (n - i) * 30)}</pubDate></item>"
+        )
+    with open(path, "w") as fh:
+        fh.write(f"<rss version='2.0'><channel><title>bench</title>{''.join(entries)}</channel></rss>")
+
+
+def find_ingestor():
+    from avellon.ingest import FeedIngestor
+    return next(o for o in gc.get_objects() if isinstance(o, FeedIngestor))
+
+
+def pct(values, q):
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    feed = os.path.join(tmp, "feed.xml")
+    write_feed(feed, BASE_ITEMS)
+    os.environ["AVELLON_FEEDS"] = "file://" + feed
+    os.environ["AVELLON_STATE_DIR"] = os.path.join(tmp, "state")
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    at = AppTest.from_file(os.path.join(root, "app.py"), default_timeout=120)
+    at.session_state["authenticated"] = True
+    at.run()
+    at.sidebar.radio[0].set_value("War Room").run()
+    ingestor = find_ingestor()
+    deadline = time.time() + 60
+    while len(ingestor.store) < BASE_ITEMS and time.time() < deadline:
+        time.sleep(0.1)
+    profiler.enabled = True
+    for _ in range(3):
+        at.run()
+    profiler.reset()
+
+    full_wall, full_cpu = [], []
+    for r in range(ROUNDS):
+        write_feed(feed, BASE_ITEMS + (r + 1) * NEW_PER_ROUND)
+        ingestor.poll_once()
+        wall, cpu = time.perf_counter(), time.process_time()
+        at.run()
+        full_wall.append(time.perf_counter() - wall)
+        full_cpu.append(time.process_time() - cpu)
+        assert not at.exception, at.exception
+    spans = profiler.stats()
+
+    print(f"{len(ingestor.store):,} events in store, {ingestor.bus.seq:,} published, {ROUNDS} rounds")
+    print(f"{'rerun':<28} {'p50 ms':>8} {'p95 ms':>8} {'cpu p50 ms':>11}")
+    print(f"{'full page':<28} {pct(full_wall, 50) * 1e3:>8.1f} {pct(full_wall, 95) * 1e3:>8.1f} "
+          f"{pct(full_cpu, 50) * 1e3:>11.1f}")
+    for name in REFRESH:
+        span = spans[name]
+        print(f"{name + ' tick':<28} {span['p50'] * 1e3:>8.1f} {span['p95'] * 1e3:>8.1f} {span['cpu_p50'] * 1e3:>11.1f}")
+
+    before = 60 / REFRESH["render_intel_stream"] * pct(full_cpu, 50)
+    after = sum(60 / interval * spans[name]["cpu_p50"] for name, interval in REFRESH.items())
+    print(f"cpu per session per minute: full-page refresh {before * 1e3:,.0f} ms, fragments {after * 1e3:,.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
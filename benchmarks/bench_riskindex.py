@@ -0,0 +1,55 @@
+"""Per-update and per-read cost of the incremental Global Risk Index.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_riskindex
+
+Applies asset risk changes across 100k assets and a stream of events, then
+times the reads the War Room does on every rerun (index, critical count,
+watchlist size and the 24h delta).
+"""
+import time
+
+import numpy as np
+
+from avellon.riskindex import RiskIndex
+
+N_ASSETS = 100_000
+N_UPDATES = 500_000
+N_EVENTS = 500_000
+N_READS = 50_000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    index = RiskIndex()
+    keys = [f"asset-{i}" for i in range(N_ASSETS)]
+    assets = rng.integers(0, N_ASSETS, N_UPDATES).tolist()
+    levels = rng.integers(0, 4, N_UPDATES).tolist()
+    confs = rng.integers(40, 100, N_UPDATES).tolist()
+    started = time.perf_counter()
+    for a, level, conf in zip(assets, levels, confs):
+        index.update_asset(keys[a], level, conf)
+    update_us = (time.perf_counter() - started) / N_UPDATES * 1e6
+
+    now = time.time()
+    sev = rng.integers(0, 4, N_EVENTS).tolist()
+    ts = (now - rng.uniform(0, 86400, N_EVENTS)).tolist()
+    started = time.perf_counter()
+    for s, t in zip(sev, ts):
+        index.add_event(s, 75, t)
+    event_us = (time.perf_counter() - started) / N_EVENTS * 1e6
+
+    started = time.perf_counter()
+    for _ in range(N_READS):
+        index.delta()
+    read_us = (time.perf_counter() - started) / N_READS * 1e6
+    current, change = index.delta()
+    print(f"asset update: {update_us:.2f} us   event: {event_us:.2f} us   rerun read: {read_us:.2f} us")
+    change = "no 24h baseline yet" if change is None else f"{change:+.1f}%"
+    print(f"index {current['global_index']:.1f} ({change}), critical {current['critical']:,}, "
+          f"watchlist {current['watchlist']:,} of {N_ASSETS:,} assets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Sanctions screening: index build, single-name latency, batch throughput, list rebuild.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_screening
+
+Builds ``LISTS`` synthetic sanctions lists (``ENTRIES`` entries in all, each
+with a couple of aliases, some in Cyrillic) from invented company and person
+names, then screens:
+
+* single names -- listed names, misspelled listed names and clean names;
+* a supplier master of ``SUPPLIERS`` rows, ``DIRTY`` of them misspelled
+  listed names (recall is checked on those) and a tenth duplicates;
+* the rebuild after one list file changes, against building every list.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from avellon.screening import ScreeningIndex
+
+LISTS = 24
+ENTRIES = 200_000
+SUPPLIERS = 1_000_000
+DIRTY = 0.02
+SINGLE = 2_000
+# Onset, nucleus and coda clusters seen in romanized names from many scripts.
+ONSETS = ("", "b", "c", "d", "f", "g", "h", "j", "k", "l", "m", "n", "p", "r", "s", "t", "v", "w", "y", "z", "ch",
+          "sh", "th", "kh", "zh", "ts", "br", "kr", "st", "tr", "gr", "pl", "sl", "dr", "fr", "gl", "qu")
+NUCLEI = ("a", "e", "i", "o", "u", "y", "ai", "ou", "ia", "ei", "ee", "oo", "ya", "yu")
+CODAS = ("", "", "", "n", "r", "s", "l", "k", "t", "m", "d", "sh", "ng", "v", "z", "ff", "x", "rt", "nd", "st", "ch")
+SYLLABLES = tuple(o + v + c for o in ONSETS for v in NUCLEI for c in CODAS)
+TRADES = ("Trading", "Shipping", "Logistics", "Petrochemical", "Metals", "Holdings", "Marine", "Industrial",
+          "Components", "Freight", "Energy", "Mining", "Technologies", "Import Export", "Services")
+FORMS = ("LLC", "Ltd", "JSC", "GmbH", "FZE", "OOO", "SA", "Inc", "Co", "")
+CYRILLIC = str.maketrans("aeikmnoprstuvbdglz", "аеикмнопрстувбдглз")
+
+
+def word(rng, lo=1, hi=3):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(lo, hi))).capitalize()
+
+
+def company(rng):
+    # Trade and form words are shared by many names; the distinctive part is what screening keys on.
+    return " ".join(filter(None, (word(rng, 2, 3), word(rng) if rng.random() < 0.5 else "", rng.choice(TRADES),
+                                  rng.choice(FORMS))))
+
+
+def person(rng):
+    return f"{word(rng)} {word(rng)} {word(rng, 2, 4)}"
+
+
+def misspell(rng, name):
+    chars = list(name)
+    i = rng.randrange(1, len(chars) - 1)
+    op = rng.random()
+    if op < 0.4:
+        chars[i] = rng.choice("aeiouyk")
+    elif op < 0.7:
+        del chars[i]
+    else:
+        chars.insert(i, chars[i])
+    return "".join(chars).upper() if rng.random() < 0.2 else "".join(chars)
+
+
+def synthetic_lists(rng):
+    lists = {f"list_{k:02d}": [] for k in range(LISTS)}
+    names = list(lists)
+    for i in range(ENTRIES):
+        name = person(rng) if rng.random() < 0.3 else company(rng)
+        aliases = [misspell(rng, name)]
+        if rng.random() < 0.3:
+            aliases.append(name.lower().translate(CYRILLIC))
+        lists[names[i % LISTS]].append({"id": f"SYN-{i:07d}", "name": name, "aliases": "|".join(aliases),
+                                        "program": "SYNTHETIC"})
+    return lists
+
+
+def write_list(path, entries):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("id,name,aliases,program\n")
+        for e in entries:
+            fh.write(f"{e['id']},{e['name']},{e['aliases']},{e['program']}\n")
+
+
+def pct(values, q):
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def main():
+    rng = random.Random(7)
+    lists = synthetic_lists(rng)
+    listed = [e["name"] for entries in lists.values() for e in entries]
+    tmp = tempfile.mkdtemp()
+    for name, entries in lists.items():
+        write_list(os.path.join(tmp, f"{name}.csv"), entries)
+
+    started = time.perf_counter()
+    index = ScreeningIndex.load(tmp)
+    full = time.perf_counter() - started
+    stats = index.stats()
+    print(f"build: {stats['entries']:,} entries / {stats['rows']:,} rows in {LISTS} lists in {full:.1f}s, "
+          f"{stats['grams']:,} distinct grams, index {stats['index_bytes'] / 2**20:.0f} MB, {stats['segments']} segment(s)")
+
+    print(f"{'single name':<22} {'p50 us':>8} {'p95 us':>8} {'hit rate':>9}")
+    for label, names in (
+        ("listed", rng.sample(listed, SINGLE)),
+        ("misspelled listed", [misspell(rng, n) for n in rng.sample(listed, SINGLE)]),
+        ("clean", [company(rng) for _ in range(SINGLE)]),
+    ):
+        times, hits = [], 0
+        for name in names:
+            t = time.perf_counter()
+            hits += bool(index.screen(name))
+            times.append((time.perf_counter() - t) * 1e6)
+        print(f"{label:<22} {pct(times, 50):>8.0f} {pct(times, 95):>8.0f} {hits / len(names):>9.1%}")
+
+    truth = {}
+    suppliers = []
+    for i in range(SUPPLIERS):
+        if rng.random() < DIRTY:
+            source = rng.choice(listed)
+            truth[i] = source
+            suppliers.append(misspell(rng, source))
+        elif suppliers and rng.random() < 0.1:
+            suppliers.append(suppliers[rng.randrange(len(suppliers))])
+        else:
+            suppliers.append(company(rng))
+    started = time.perf_counter()
+    flagged = index.screen_many(suppliers)
+    batch = time.perf_counter() - started
+    found = sum(any(h["name"] == source for h in flagged.get(i, ())) for i, source in truth.items())
+    print(f"batch: {SUPPLIERS:,} suppliers in {batch:.0f}s ({SUPPLIERS / batch:,.0f}/s), {len(flagged):,} flagged, "
+          f"recall on {len(truth):,} misspelled listed names {found / len(truth):.1%}")
+
+    name = "list_03"
+    entries = lists[name][: len(lists[name]) // 2] + [
+        {"id": f"NEW-{i}", "name": company(rng), "aliases": "", "program": "SYNTHETIC"} for i in range(500)
+    ]
+    write_list(os.path.join(tmp, f"{name}.csv"), entries)
+    os.utime(os.path.join(tmp, f"{name}.csv"), ns=(time.time_ns(), time.time_ns() + 1))
+    started = time.perf_counter()
+    changed = index.sync()
+    rebuild = time.perf_counter() - started
+    stats = index.stats()
+    print(f"rebuild after one list changed: {changed} in {rebuild * 1e3:,.0f} ms "
+          f"(full build {full * 1e3:,.0f} ms), {stats['segments']} segment(s)")
+    started = time.perf_counter()
+    index.compact()
+    print(f"compact: {time.perf_counter() - started:.2f}s, {index.stats()['rows']:,} live rows")
+    dropped = lists[name][-1]
+    assert all(h["id"] != dropped["id"] for h in index.screen(dropped["name"])), "dropped entry still matches"
+
+
+if __name__ == "__main__":
+    main()
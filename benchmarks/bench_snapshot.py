@@ -0,0 +1,135 @@
+"""Warm start: restoring backend state from a snapshot against rebuilding it.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_snapshot
+
+Fills every snapshotted engine the way a long-running process would: the
+ingestion stages (scoring, story clustering, event store, risk index) with
+``ITEMS`` synthetic intel items, the risk history with ``DAYS`` days of
+minute samples for ``SERIES`` series, and the screening index with the
+synthetic lists of ``bench_screening``. Prints, per engine, what a cold
+start costs to rebuild it against restoring it from a snapshot, and the
+first read after the restore (which touches the mapped pages); then the
+snapshot write time and size, and the cost of catching up on ``CATCH_UP``
+new items once restored.
+"""
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from avellon.events import EventStore
+from avellon.riskindex import RiskIndex
+from avellon.scoring import SeverityScorer
+from avellon.screening import ScreeningIndex
+from avellon.snapshot import Snapshotter
+from avellon.stories import StoryClusterer
+from avellon.timeseries import TimeSeriesStore
+from benchmarks.bench_refresh import PLACES, TITLES, codename
+from benchmarks.bench_screening import synthetic_lists, write_list
+
+ITEMS = 20_000
+CATCH_UP = 200
+SERIES = 8
+DAYS = 30
+SOURCES = ("gCaptain", "Maritime Executive", "Supply Chain Dive", "Reuters")
+
+
+def intel_items(start, n, now):
+    rng = random.Random(start)
+    items = []
+    for i in range(start, start + n):
+        title = f"{TITLES[i % len(TITLES)].format(PLACES[i % len(PLACES)])}: {codename(i)}"
+        items.append({
+            "id": f"EVT-{i:07d}", "guid": f"bench-{i}", "hash": f"h{i}", "title": title,
+            "summary": f"{title} reported by local authorities.", "link": "", "source": rng.choice(SOURCES),
+            "cat": "General", "loc": PLACES[i % len(PLACES)], "ts": now - (start + n - i) * 5.0,
+        })
+    return items
+
+
+def ingest(engines, items, now):
+    scorer, clusterer, store, risk_index = engines
+    scorer.score_batch(items)
+    leads, merged = clusterer.assign(items, now)
+    risk_index.add_events(store.add_many(leads))
+    store.revise(merged)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - started, out
+
+
+def main():
+    now = time.time()
+    items = intel_items(0, ITEMS, now)
+    tmp = tempfile.mkdtemp()
+    lists_dir = os.path.join(tmp, "lists")
+    os.makedirs(lists_dir)
+    for name, entries in synthetic_lists(random.Random(7)).items():
+        write_list(os.path.join(lists_dir, f"{name}.csv"), entries)
+    ts = now - np.arange(DAYS * 1440)[::-1] * 60.0
+    samples = {f"series-{k}": np.random.default_rng(k).random(len(ts)) * 100 for k in range(SERIES)}
+
+    def build_ingest():
+        engines = (SeverityScorer(), StoryClusterer(), EventStore(), RiskIndex())
+        ingest(engines, [dict(item) for item in items], now)
+        return engines
+
+    def build_history():
+        history = TimeSeriesStore()
+        for name, values in samples.items():
+            history.extend(name, ts, values)
+        return history
+
+    rebuild = {}
+    rebuild["ingestion"], engines = timed(build_ingest)
+    rebuild["risk_history"], history = timed(build_history)
+    rebuild["screening"], index = timed(lambda: ScreeningIndex.load(lists_dir))
+
+    snapshots = Snapshotter(os.path.join(tmp, "snapshot"))
+    for name, engine in zip(("scoring", "stories", "events", "risk_index"), engines):
+        snapshots.attach(name, engine)
+    snapshots.attach("risk_history", history)
+    snapshots.attach("screening", index)
+    size = snapshots.write()
+    print(f"snapshot: {size / 2**20:,.1f} MB written in {snapshots.stats['write_seconds'] * 1e3:,.0f} ms "
+          f"({len(engines[2]):,} events, {len(engines[1]):,} stories, {index.stats()['rows']:,} screening rows)")
+
+    restored = Snapshotter(snapshots.directory)
+    warm = (SeverityScorer(), StoryClusterer(), EventStore(), RiskIndex())
+    for name, engine in zip(("scoring", "stories", "events", "risk_index"), warm):
+        restored.attach(name, engine)
+    warm_history = restored.attach("risk_history", TimeSeriesStore())
+    warm_index = restored.attach("screening", ScreeningIndex(lists_dir))
+    ms = restored.stats["restored"]
+
+    first = {
+        "ingestion": timed(lambda: warm[2].query(limit=50))[0],
+        "risk_history": timed(lambda: warm_history.query("series-0"))[0],
+        "screening": timed(lambda: (warm_index.sync(), warm_index.screen(items[0]["title"])))[0],
+    }
+    assert warm[2].query() == engines[2].query()
+    restore = {
+        "ingestion": sum(ms[name] for name in ("scoring", "stories", "events", "risk_index")) / 1e3,
+        "risk_history": ms["risk_history"] / 1e3,
+        "screening": ms["screening"] / 1e3,
+    }
+    print(f"{'engine':<14} {'rebuild ms':>11} {'restore ms':>11} {'first read ms':>14} {'speedup':>8}")
+    for name in rebuild:
+        print(f"{name:<14} {rebuild[name] * 1e3:>11,.0f} {restore[name] * 1e3:>11,.1f} {first[name] * 1e3:>14,.1f} "
+              f"{rebuild[name] / (restore[name] + first[name]):>7,.0f}x")
+
+    fresh = intel_items(ITEMS, CATCH_UP, now)
+    catch_up, _ = timed(lambda: ingest(warm, fresh + [dict(item) for item in items[-CATCH_UP:]], now))
+    print(f"catch-up: {CATCH_UP} new + {CATCH_UP} re-sent items in {catch_up * 1e3:,.0f} ms, "
+          f"store {len(warm[2]):,} events, score cache hit rate {warm[0].stats()['hit_rate']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
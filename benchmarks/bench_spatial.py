@@ -0,0 +1,58 @@
+"""Throughput of the event-to-asset proximity join.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_spatial
+
+Joins batches of 10k events against 1M hub-clustered assets (ports and
+facilities bunch up, which is the hard case for a grid index) and reports the
+sustainable events/minute for each radius.
+"""
+import time
+
+import numpy as np
+
+from avellon.spatial import AssetIndex, escalate
+
+N_ASSETS = 1_000_000
+N_EVENTS = 10_000
+RADII_KM = (50, 250, 500)
+
+
+def synthetic(n_assets, n_events, seed=0):
+    rng = np.random.default_rng(seed)
+    hubs_lat = rng.uniform(-50, 65, 400)
+    hubs_lon = rng.uniform(-170, 170, 400)
+    hub = rng.integers(0, 400, n_assets)
+    lat = np.clip(hubs_lat[hub] + rng.normal(0, 2.0, n_assets), -80, 80)
+    lon = np.clip(hubs_lon[hub] + rng.normal(0, 3.0, n_assets), -180, 180)
+    ev_hub = rng.integers(0, 400, n_events)
+    ev_lat = np.clip(hubs_lat[ev_hub] + rng.normal(0, 3.0, n_events), -85, 85)
+    ev_lon = np.clip(hubs_lon[ev_hub] + rng.normal(0, 3.0, n_events), -180, 180)
+    return lat, lon, ev_lat, ev_lon, rng
+
+
+def main():
+    lat, lon, ev_lat, ev_lon, rng = synthetic(N_ASSETS, N_EVENTS)
+    started = time.perf_counter()
+    index = AssetIndex(lat, lon)
+    print(f"index build: {N_ASSETS:,} assets in {time.perf_counter() - started:.2f}s")
+
+    risk = rng.integers(0, 4, N_ASSETS)
+    conf = rng.integers(60, 100, N_ASSETS)
+    ev_sev = rng.integers(0, 4, N_EVENTS)
+    ev_conf = rng.integers(40, 100, N_EVENTS)
+    print(f"{'radius km':>9} {'join s':>8} {'escalate s':>10} {'pairs':>12} {'events/min':>12}")
+    for radius in RADII_KM:
+        started = time.perf_counter()
+        ev, ids, dist = index.join(ev_lat, ev_lon, radius)
+        join_s = time.perf_counter() - started
+        started = time.perf_counter()
+        escalate(risk, conf, ev, ids, dist, ev_sev, ev_conf, radius)
+        esc_s = time.perf_counter() - started
+        rate = N_EVENTS / (join_s + esc_s) * 60
+        print(f"{radius:>9} {join_s:>8.2f} {esc_s:>10.2f} {len(ev):>12,} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
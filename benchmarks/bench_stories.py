@@ -0,0 +1,115 @@
+"""Story clustering: cost per item as live stories grow, accuracy, and memory bound.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_stories
+
+Generates ``INCIDENTS`` synthetic incidents (random headlines over a
+``VOCABULARY``-word vocabulary plus a named vessel or company) and reports
+each one from one to ``MAX_REPORTS`` sources: the first verbatim, the others
+syndicated with a source suffix, with a word dropped, inserted or swapped,
+or re-cased. Items arrive in time order, ``RATE`` per second, and go through
+``StoryClusterer.assign`` in poll-sized batches. Prints the per-item cost at
+increasing numbers of live stories (flat: lookups go through LSH buckets, not
+over the stories), how many reports joined their own incident's story
+(recall) and how many joined another's (false merges), and the stories,
+buckets and members held once the window has rolled over several times.
+"""
+import random
+import time
+
+from avellon.stories import StoryClusterer
+
+INCIDENTS = 100_000
+MAX_REPORTS = 4
+VOCABULARY = 3_000
+RATE = 2.0
+BATCH = 50
+WINDOW = 6 * 3600
+CHECKPOINTS = (1_000, 10_000, 50_000, 100_000)
+SOURCES = ("gCaptain", "Maritime Executive", "Supply Chain Dive", "Lloyd's List", "Reuters", "Splash247")
+LETTERS = "abcdefghiklmnoprstuvyz"
+
+
+def token(rng, lo=3, hi=9):
+    return "".join(rng.choice(LETTERS) for _ in range(rng.randint(lo, hi)))
+
+
+def variant(rng, words, source):
+    words = list(words)
+    op = rng.random()
+    if op < 0.25:
+        words.append(f"- {source}")
+    elif op < 0.45:
+        del words[rng.randrange(len(words))]
+    elif op < 0.65:
+        words.insert(rng.randrange(len(words)), rng.choice(("reportedly", "update", "breaking", "again")))
+    elif op < 0.8:
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    else:
+        return " ".join(words).upper()
+    return " ".join(words)
+
+
+def stream(rng):
+    vocabulary = [token(rng) for _ in range(VOCABULARY)]
+    items, t = [], 0.0
+    for incident in range(INCIDENTS):
+        words = rng.sample(vocabulary, rng.randint(5, 9)) + [token(rng).capitalize()]
+        summary = " ".join(rng.sample(vocabulary, 20))
+        sources = rng.sample(SOURCES, rng.randint(1, MAX_REPORTS))
+        for k, source in enumerate(sources):
+            t += rng.expovariate(RATE)
+            items.append({
+                "id": f"EVT-{len(items)}", "guid": f"bench-{len(items)}", "incident": incident,
+                "title": " ".join(words) if k == 0 else variant(rng, words, source), "summary": summary,
+                "source": source, "conf": rng.randint(40, 90), "ts": t,
+            })
+    return items
+
+
+def main():
+    rng = random.Random(5)
+    items = stream(rng)
+    clusterer = StoryClusterer(window=float("inf"), max_stories=len(items))
+    checkpoints = list(CHECKPOINTS)
+    print(f"{len(items):,} reports of {INCIDENTS:,} incidents from {len(SOURCES)} sources, window {WINDOW // 3600}h")
+    print(f"{'live stories':>12} {'us/item':>8}")
+    # No expiry on this pass, so the cost is measured against every story so far.
+    elapsed, done = 0.0, 0
+    for i in range(0, len(items), BATCH):
+        batch = items[i:i + BATCH]
+        started = time.perf_counter()
+        clusterer.assign(batch, now=batch[-1]["ts"])
+        elapsed += time.perf_counter() - started
+        done += len(batch)
+        if checkpoints and len(clusterer) >= checkpoints[0]:
+            print(f"{len(clusterer):>12,} {elapsed / done * 1e6:>8.1f}")
+            checkpoints.pop(0)
+            elapsed, done = 0.0, 0
+
+    story = {item["guid"]: clusterer._members[item["guid"]] for item in items}
+    incident_of = {item["id"]: item["incident"] for item in items}
+    first = {}
+    for item in items:
+        first.setdefault(item["incident"], story[item["guid"]])
+    joined = sum(story[item["guid"]] == first[item["incident"]] for item in items) - INCIDENTS
+    wrong = sum(incident_of[story[item["guid"]]] != item["incident"] for item in items)
+    print(f"{len(clusterer):,} stories for {INCIDENTS:,} incidents; repeat reports joined their story "
+          f"{joined / (len(items) - INCIDENTS):.1%}, reports in another incident's story {wrong / len(items):.2%}")
+
+    clusterer = StoryClusterer(window=WINDOW)
+    started = time.perf_counter()
+    for i in range(0, len(items), BATCH):
+        batch = items[i:i + BATCH]
+        clusterer.assign(batch, now=batch[-1]["ts"])
+    spent = time.perf_counter() - started
+    print(f"windowed: {len(items):,} items over {items[-1]['ts'] / 3600:.0f}h in {spent:.1f}s "
+          f"({spent / len(items) * 1e6:.1f} us/item); held {len(clusterer):,} stories, "
+          f"{len(clusterer._buckets):,} buckets, {len(clusterer._members):,} members; "
+          f"{clusterer.stats['expired']:,} expired")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Scenario sweeps: cold grid in-process and on a pool, then re-opened from the cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sweep [workers]
+
+Sweeps the default grid (every scenario and severity at ``DEFAULT_DURATIONS``)
+and a dense one (every third day up to 90) over the bundled supply graph.
+Each grid runs cold in-process and, if more than one core is available, cold
+on a process pool (checking both give identical cells), then is re-opened
+through a fresh ``SweepCache`` on the same file, as another session or
+replica would. Prints wall time, time to the first finished cell and cells
+per second.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from avellon.graph import SupplyGraph, load_graph_path
+from avellon.sweep import SweepCache, grid, run_sweep
+
+DENSE_DURATIONS = range(3, 91, 3)
+
+
+def timed_sweep(graph, cells, cache, workers):
+    started = time.perf_counter()
+    first, results = None, {}
+    for cell, result, _ in run_sweep(graph, cells, cache, workers=workers):
+        first = first if first is not None else time.perf_counter() - started
+        results[cell] = result
+    return time.perf_counter() - started, first, results
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    graph = SupplyGraph.load(load_graph_path())
+    print(f"{len(graph):,} nodes, {workers} worker(s)")
+    print(f"{'grid':>8} {'cells':>6} {'run':>8} {'wall s':>8} {'first ms':>9} {'cells/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, durations in (("default", None), ("dense", DENSE_DURATIONS)):
+            cells = grid() if durations is None else grid(durations=durations)
+            runs = [("1 proc", 1)] + ([("pool", workers)] if workers > 1 else [])
+            for run, n in runs:
+                path = os.path.join(tmp, f"{label}-{run}.sqlite")
+                wall, first, results = timed_sweep(graph, cells, SweepCache(path), n)
+                print(f"{label:>8} {len(cells):>6} {run:>8} {wall:>8.2f} {first * 1e3:>9.1f} {len(cells) / wall:>9.1f}")
+                if n == 1:
+                    reference = results
+                else:
+                    assert all(dict(r, elapsed_ms=0) == dict(reference[c], elapsed_ms=0) for c, r in results.items())
+            wall, first, results = timed_sweep(graph, cells, SweepCache(path), workers)
+            assert len(results) == len(cells)
+            print(f"{label:>8} {len(cells):>6} {'reopen':>8} {wall:>8.3f} {first * 1e3:>9.1f} {len(cells) / wall:>9,.0f}")
+
+
+if __name__ == "__main__":
+    main()
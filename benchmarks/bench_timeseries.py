@@ -0,0 +1,55 @@
+"""Risk trend query cost and chart payload size across windows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_timeseries
+
+Loads one year of per-minute samples (525,600 points) into a series, then
+for each window reports the rollup used, the points sent to the chart, the
+query + LTTB time and the Vega-Lite JSON size of the resulting Altair chart
+(the payload Streamlit ships to the browser). The legacy path -- every raw
+sample in the window straight into Altair -- is shown for comparison.
+"""
+import time
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from avellon.timeseries import RESOLUTION_LABELS, TimeSeriesStore
+
+YEAR_MINUTES = 365 * 1440
+WINDOWS = {"24h": 86400, "7d": 7 * 86400, "30d": 30 * 86400, "1y": 365 * 86400}
+
+
+def chart_json(ts, values):
+    data = pd.DataFrame({"Date": pd.to_datetime(ts, unit="s"), "Risk Score": values})
+    return alt.Chart(data).mark_area().encode(x="Date", y="Risk Score").to_json()
+
+
+def main():
+    rng = np.random.default_rng(0)
+    end = time.time() // 60 * 60
+    ts = end - 60.0 * np.arange(YEAR_MINUTES)[::-1]
+    values = np.clip(60 + np.cumsum(rng.normal(0, 0.15, YEAR_MINUTES)), 0, 100)
+    store = TimeSeriesStore()
+    started = time.perf_counter()
+    for chunk in np.array_split(np.arange(YEAR_MINUTES), 365):
+        store.extend("global", ts[chunk], values[chunk])
+    print(f"ingest: {YEAR_MINUTES:,} samples in {time.perf_counter() - started:.2f}s (daily batches)")
+
+    with alt.data_transformers.disable_max_rows():
+        print(f"{'window':>6} {'rollup':>7} {'points':>7} {'query ms':>9} {'json KB':>8} {'legacy pts':>11} {'legacy KB':>10}")
+        for label, window in WINDOWS.items():
+            started = time.perf_counter()
+            t, v, res = store.query("global", since=end - window)
+            query_ms = (time.perf_counter() - started) * 1e3
+            size = len(chart_json(t, v)) / 1024
+            raw = ts >= end - window
+            legacy = len(chart_json(ts[raw], values[raw])) / 1024
+            print(f"{label:>6} {RESOLUTION_LABELS[res]:>7} {len(t):>7,} {query_ms:>9.1f} {size:>8.0f} "
+                  f"{int(raw.sum()):>11,} {legacy:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""Headless benchmark suite: every route in ``app.py`` plus engine microbenchmarks.
+
+Run from the repository root:
+
+    python -m benchmarks.suite                          # run and compare with the baseline
+    python -m benchmarks.suite --scales 10,10000 --reruns 10
+    python -m benchmarks.suite --update-baseline        # accept the current numbers
+
+Each scale runs in a fresh interpreter with its own state directory, an
+empty local feed and a synthetic data set of ``scale`` intel events (placed
+around the monitored assets, spread over 30 days) and ``scale`` audit-log
+rows. The child drives ``app.py`` with ``AppTest``: every public route, then
+the login form through ``render_login``, then every secure route. Per route
+it records the first (cold) run and p50/p95/max over warm reruns; the same
+reruns seen from inside the script (the profiler's ``page:<route>`` span,
+which excludes AppTest's own overhead) with the bytes sent to the browser;
+and the peak Python allocation of one extra rerun (``tracemalloc``; AppTest
+recompiles ``app.py`` on every run, which sets a floor of about 4 MB). It
+also times the event-store and audit-log queries those pages issue, at that
+scale.
+
+The parent adds scale-independent engine microbenchmarks (simulation,
+cascade, scoring, end-to-end ingestion), writes everything to ``--output``
+as JSON and compares it with ``--baseline``. Only medians that exclude the
+harness (script time, queries, engines), payload size and peak memory are
+gated; a metric regresses when it is more than ``--tolerance`` slower (or
+larger) than the baseline and by more than an absolute floor, so
+sub-millisecond noise does not fail a run. First runs, tails and AppTest
+wall times are recorded and printed but too noisy to gate on. The
+exit status is 1 when anything regressed. Baselines are machine-specific:
+regenerate one on the deployment hardware with ``--update-baseline``.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SCALES = (10, 10_000, 1_000_000)
+PUBLIC_ROUTES = ("Home", "Platform", "Solutions", "Services", "Insights", "About", "Contact")
+SECURE_ROUTES = ("War Room", "Analytics", "Simulation", "System Logs")
+RERUNS = 20
+QUERY_REPEATS = 200
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+TOLERANCE = 0.25
+# Metrics that can fail a run: medians measured without AppTest's overhead, payload
+# and memory. Tails, first runs and harness wall times are reported only.
+GATED = ("p50_ms", "p50_us", "script_p50_ms", "payload_kb", "peak_kb")
+# Absolute slack per unit before a relative slowdown counts as a regression.
+FLOORS = {"_ms": 2.0, "_us": 5.0, "_kb": 256.0}
+ASSETS = ((4.2105, 101.9758), (23.9037, 119.6763), (30.5852, 32.3999), (51.9225, 4.47917), (9.1012, -79.6955), (12.8, 45.0))
+CATEGORIES = ("Conflict", "Cyber", "Weather", "Labor", "Regulatory", "Logistics", "General")
+SEVERITIES = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+USERS = ("analyst", "commander", "auditor", "ops")
+ACTIONS = ("LOGIN_SUCCESS", "ACCESS_WAR_ROOM", "ACCESS_ANALYTICS", "VIEW_HOME", "LOGOUT")
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": statistics.median(ordered) * 1e3,
+        "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1e3,
+        "max_ms": ordered[-1] * 1e3,
+    }
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+# -- synthetic data ------------------------------------------------------------
+def synthetic_events(n, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    asset = rng.integers(0, len(ASSETS), n)
+    lat = np.array([a[0] for a in ASSETS])[asset] + rng.normal(0, 2.0, n)
+    lon = np.array([a[1] for a in ASSETS])[asset] + rng.normal(0, 2.0, n)
+    ts = now - rng.uniform(0, 30 * 86400, n)
+    sev = rng.choice(4, n, p=[0.5, 0.3, 0.15, 0.05])
+    cat = rng.integers(0, len(CATEGORIES), n)
+    conf = rng.integers(40, 100, n)
+    for i in range(n):
+        yield {
+            "id": f"EVT-{i:08X}", "guid": f"bench-{i}", "hash": f"h{i}", "title": f"Synthetic event {i}",
+            "summary": "", "link": "", "source": "bench", "loc": "bench", "cat": CATEGORIES[cat[i]],
+            "severity": SEVERITIES[sev[i]], "conf": int(conf[i]), "ts": float(ts[i]),
+            "lat": float(lat[i]), "lon": float(lon[i]),
+        }
+
+
+def load_events(ingestor, n, chunk=50_000):
+    """Swap a store holding ``n`` synthetic events into the app's running ingestor."""
+    from avellon.events import DEFAULT_MAX_ROWS, EventStore
+    from avellon.live import FeedBus
+    store = EventStore(max_rows=max(n, DEFAULT_MAX_ROWS))
+    batch = []
+    for item in synthetic_events(n):
+        batch.append(item)
+        if len(batch) == chunk:
+            ingestor.risk_index.add_events(store.add_many(batch))
+            batch = []
+    ingestor.risk_index.add_events(store.add_many(batch))
+    ingestor.store, ingestor.bus = store, FeedBus()
+    return store
+
+
+def load_audit(n, chunk=50_000):
+    from avellon.audit import AuditLog
+    log = AuditLog()
+    start = time.time() - 30 * 86400
+    step = 30 * 86400 / max(n, 1)
+    for i in range(n):
+        log.record(USERS[i % len(USERS)], ACTIONS[i % len(ACTIONS)], f"10.0.{i % 256}.{i % 7}", ts=start + i * step)
+        if i % chunk == chunk - 1:
+            log.flush()
+    log.flush()
+    return log
+
+
+# -- one scale, in a child interpreter -----------------------------------------
+def measure_route(at, route, reruns):
+    from avellon.profiling import profiler
+    started = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - started
+    assert not at.exception, at.exception
+    profiler.reset()
+    samples = timed(at.run, reruns)
+    assert not at.exception, at.exception
+    page = profiler.stats()[f"page:{route}"]
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    at.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return dict(
+        {f"wall_{key}": value for key, value in summarize(samples).items()}, first_ms=first * 1e3, peak_kb=peak / 1024,
+        script_p50_ms=page["p50"] * 1e3, script_p95_ms=page["p95"] * 1e3, payload_kb=page["bytes_p50"] / 1024,
+    )
+
+
+def run_scale(scale, reruns):
+    from streamlit.testing.v1 import AppTest
+    from avellon.cache import backend_cache
+    from avellon.ingest import FeedIngestor
+    from avellon.profiling import profiler
+
+    profiler.enabled = True
+    audit = load_audit(scale)
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+    at.run()
+    pages = {}
+    for route in PUBLIC_ROUTES:
+        at.sidebar.radio[0].set_value(route)
+        pages[route] = measure_route(at, route, reruns)
+
+    # Log in through the form: Secure Login routes to render_login, Authenticate lands on the War Room.
+    at.sidebar.button[0].click()
+    pages["Login"] = measure_route(at, "Login", reruns)
+    at.text_input[0].input("bench")
+    at.text_input[1].input("bench")
+    started = time.perf_counter()
+    next(b for b in at.button if b.label == "Authenticate").click().run()
+    pages["Login"]["submit_ms"] = (time.perf_counter() - started) * 1e3
+    assert at.session_state["authenticated"], "login failed"
+
+    ingestor = next(o for o in gc.get_objects() if isinstance(o, FeedIngestor))
+    started = time.perf_counter()
+    store = load_events(ingestor, scale)
+    load_s = time.perf_counter() - started
+    backend_cache.invalidate()
+    if "feed_view" in at.session_state:
+        del at.session_state["feed_view"]
+
+    for route in SECURE_ROUTES:
+        at.sidebar.radio[0].set_value(route)
+        pages[route] = measure_route(at, route, reruns)
+
+    day = time.time() - 86400
+    queries = {
+        "events.query_page": lambda: store.query(limit=10),
+        "events.query_filtered": lambda: store.query(severity=["CRITICAL", "HIGH"], cat=["Conflict"], since=day, limit=10),
+        "events.select_24h": lambda: store.select(since=day),
+        "audit.query_page": lambda: audit.query(limit=50),
+        "audit.query_action": lambda: audit.query(action="LOGOUT", limit=50),
+        "audit.query_deep": lambda: audit.query(before_id=max(2, scale // 2), limit=50),
+    }
+    engines = {name: summarize(timed(fn, QUERY_REPEATS)) for name, fn in queries.items()}
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    return {"pages": pages, "engines": engines, "load_s": load_s, "events": len(store), "rss_kb": rss_kb}
+
+
+def child(scale, reruns):
+    print(json.dumps(run_scale(scale, reruns)))
+
+
+def spawn(scale, reruns):
+    tmp = tempfile.mkdtemp(prefix="avellon-bench-")
+    feed = os.path.join(tmp, "feed.xml")
+    with open(feed, "w") as fh:
+        fh.write("<rss version='2.0'><channel><title>bench</title></channel></rss>")
+    env = dict(os.environ, AVELLON_FEEDS="file://" + feed, AVELLON_STATE_DIR=os.path.join(tmp, "state"))
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--child", str(scale), "--reruns", str(reruns)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"scale {scale:,} failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# -- engines, in the parent ----------------------------------------------------
+def run_engines():
+    from avellon.cascade import build_model, simulate_cascade
+    from avellon.events import EventStore
+    from avellon.geocode import Geocoder
+    from avellon.graph import SupplyGraph, load_graph_path
+    from avellon.ingest import FeedIngestor
+    from avellon.live import FeedBus
+    from avellon.riskindex import RiskIndex
+    from avellon.scoring import SeverityScorer
+    from avellon.simulation import simulate_paths
+    from avellon.stories import StoryClusterer
+    from benchmarks.bench_refresh import write_feed
+
+    engines = {"simulation.paths_100k": summarize(timed(lambda: simulate_paths("Strait Closure", 14, "Regional"), 10))}
+
+    graph = SupplyGraph.load(load_graph_path())
+    model = build_model(graph)
+    shock = [int(graph.top_critical(1)[0])]
+    engines["cascade.single_shock"] = summarize(timed(
+        lambda: simulate_cascade(model, shock, "Strait Closure", 14, "Regional", workers=1), 5))
+
+    items = list(synthetic_events(5_000, seed=1))
+    for item in items:
+        item["title"] = f"Missile strike disrupts shipping near port {item['id']}"
+    started = time.perf_counter()
+    scorer = SeverityScorer()
+    scorer.score_batch(items)
+    cold = time.perf_counter() - started
+    warm = min(timed(lambda: scorer.score_batch(items), 3))
+    engines["scoring.cold_item_us"] = {"p50_us": cold / len(items) * 1e6}
+    engines["scoring.cached_item_us"] = {"p50_us": warm / len(items) * 1e6}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        feed = os.path.join(tmp, "feed.xml")
+        write_feed(feed, 2_000)
+        samples = []
+        for _ in range(3):
+            ingestor = FeedIngestor(
+                ["file://" + feed], scorer=SeverityScorer(), geocoder=Geocoder(cache_path=os.path.join(tmp, "geo.sqlite")),
+                store=EventStore(), risk_index=RiskIndex(), bus=FeedBus(), clusterer=StoryClusterer(),
+            )
+            started = time.perf_counter()
+            added = ingestor.poll_once()
+            samples.append((time.perf_counter() - started) / len(added))
+            ingestor.stop()
+    engines["ingest.poll_item_us"] = {"p50_us": statistics.median(samples) * 1e6}
+    return engines
+
+
+# -- results and baseline ------------------------------------------------------
+def flatten(results):
+    flat = {}
+
+    def walk(prefix, node):
+        for key, value in node.items():
+            path = f"{prefix}/{key}" if prefix else key
+            if isinstance(value, dict):
+                walk(path, value)
+            elif key in GATED and isinstance(value, (int, float)):
+                flat[path] = float(value)
+    walk("", {"scales": results["scales"], "engines": results["engines"]})
+    return flat
+
+
+def compare(current, baseline, tolerance):
+    cur, base = flatten(current), flatten(baseline)
+    regressions, improved = [], 0
+    for key in sorted(cur.keys() & base.keys()):
+        floor = next(f for unit, f in FLOORS.items() if key.endswith(unit))
+        if cur[key] > base[key] * (1 + tolerance) and cur[key] - base[key] > floor:
+            regressions.append((key, base[key], cur[key]))
+        elif base[key] > cur[key] * (1 + tolerance) and base[key] - cur[key] > floor:
+            improved += 1
+    return regressions, improved, sorted(base.keys() - cur.keys())
+
+
+def report(results):
+    for scale, data in results["scales"].items():
+        print(f"\nscale {int(scale):,}: {data['events']:,} events loaded in {data['load_s']:.1f}s, "
+              f"peak RSS {data['rss_kb'] / 1024:,.0f} MB")
+        print(f"  {'route':<13} {'first ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+              f"{'script p50':>11} {'script p95':>11} {'payload KB':>11} {'peak KB':>9}")
+        for route, r in data["pages"].items():
+            print(f"  {route:<13} {r['first_ms']:>9.1f} {r['wall_p50_ms']:>8.1f} {r['wall_p95_ms']:>8.1f} {r['wall_max_ms']:>8.1f} "
+                  f"{r['script_p50_ms']:>11.1f} {r['script_p95_ms']:>11.1f} {r['payload_kb']:>11.1f} {r['peak_kb']:>9,.0f}")
+        for name, r in data["engines"].items():
+            print(f"  {name:<24} p50 {r['p50_ms']:.3f} ms  p95 {r['p95_ms']:.3f} ms")
+    print("\nengines:")
+    for name, r in results["engines"].items():
+        value = ", ".join(f"{k} {v:,.3f}" for k, v in r.items())
+        print(f"  {name:<28} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=",".join(map(str, SCALES)))
+    parser.add_argument("--reruns", type=int, default=RERUNS)
+    parser.add_argument("--output", default=None, help="results JSON (default: <state dir>/bench_results.json)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        return child(args.child, args.reruns)
+
+    from avellon.config import state_path
+    results = {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "reruns": args.reruns,
+        },
+        "scales": {},
+    }
+    for scale in (int(s) for s in args.scales.split(",")):
+        results["scales"][str(scale)] = spawn(scale, args.reruns)
+    results["engines"] = run_engines()
+    report(results)
+
+    output = args.output or state_path("bench_results.json")
+    with open(output, "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"\nresults: {output}")
+    if args.update_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"baseline updated: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against; run with --update-baseline")
+        return 0
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    regressions, improved, missing = compare(results, baseline, args.tolerance)
+    print(f"baseline {baseline['meta']['created']} ({baseline['meta']['platform']}): "
+          f"{len(regressions)} regressed, {improved} improved beyond {args.tolerance:.0%}")
+    for key, old, new in regressions:
+        print(f"  REGRESSION {key}: {old:,.2f} -> {new:,.2f} ({new / old - 1:+.0%})" if old else f"  REGRESSION {key}: {old} -> {new:,.2f}")
+    if missing:
+        print(f"  {len(missing)} baseline metrics not measured in this run")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())